@@ -0,0 +1,44 @@
+"""
+Measure the throughput of the chunked CSV import.
+
+Run from the repository root:
+
+    python -m benchmarks.csv_import [rows] [chunk_size]
+
+A synthetic department (see benchmarks.generator) is exported to a temporary CSV file,
+shuffled so that team members often come before their managers, and imported back.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.generator import generate_department
+from models.csv_import import DEFAULT_CHUNK_SIZE, export_csv, import_csv
+
+
+def main(rows=1_000_000, chunk_size=DEFAULT_CHUNK_SIZE):
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "employees.csv")
+        export_csv(generate_department(rows).managers, filename)
+        with open(filename, 'r') as file:
+            header, *lines = file.readlines()
+        random.Random(0).shuffle(lines)
+        with open(filename, 'w') as file:
+            file.write(header)
+            file.writelines(lines)
+        del lines
+        size = os.path.getsize(filename)
+
+        start = time.perf_counter()
+        result = import_csv(filename, chunk_size)
+        elapsed = time.perf_counter() - start
+
+    assert not result.errors and result.imported == rows
+    print(f"{rows} rows ({size / 2 ** 20:.1f} MiB), chunks of {chunk_size}")
+    print(f"import_csv: {elapsed:.2f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:]))
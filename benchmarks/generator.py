@@ -0,0 +1,69 @@
+"""
+Deterministic synthetic organizations for the benchmarks.
+
+The same arguments (including the seed) always give the same department, so results of
+different runs and branches measure the same workload.
+"""
+import random
+from collections import deque
+
+from models.department import Department
+from models.designer import Designer
+from models.developer import Developer
+from models.manager import Manager
+
+FIRST_NAMES = ["John", "Jane", "Alice", "Bob", "Charlie", "Emily", "Eve", "Max", "Lisa", "Tom"]
+LAST_NAMES = ["Doe", "Smith", "Johnson", "Brown", "Wilson", "Davis", "White", "Black", "Green"]
+
+# Share of each role among team members; managers at the deepest level become Developers
+DEFAULT_ROLE_MIX = {'Developer': 0.6, 'Designer': 0.3, 'Manager': 0.1}
+
+
+def _details(rng):
+    return (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES),
+            rng.randrange(800, 3000), rng.randrange(0, 15))
+
+
+def generate_department(headcount, team_size=(3, 12), depth=3, role_mix=None, seed=0):
+    """
+    Build a department of exactly headcount employees.
+
+    Top-level managers are added until the headcount is reached. Every manager's team size is
+    drawn uniformly from team_size, and team members get a role drawn from role_mix; nested
+    managers get teams of their own, breadth first, down to depth levels of managers.
+
+    Args:
+    headcount (int): The total number of employees, managers included.
+    team_size (tuple): The smallest and largest team size.
+    depth (int): The number of manager levels; 1 means only top-level managers.
+    role_mix (dict, optional): Role name -> weight for team members; defaults to DEFAULT_ROLE_MIX.
+    seed (int): The seed of the random generator.
+
+    Returns:
+    Department: The generated department.
+    """
+    rng = random.Random(seed)
+    roles, weights = zip(*(role_mix or DEFAULT_ROLE_MIX).items())
+    department = Department()
+    created = 0
+    while created < headcount:
+        root = Manager(*_details(rng))
+        created += 1
+        queue = deque([(root, 1)])
+        while queue and created < headcount:
+            manager, level = queue.popleft()
+            size = min(rng.randint(*team_size), headcount - created)
+            members = []
+            for role in rng.choices(roles, weights, k=size):
+                if role == 'Manager' and level < depth:
+                    members.append(Manager(*_details(rng)))
+                elif role == 'Designer':
+                    members.append(Designer(*_details(rng), round(rng.random(), 2)))
+                else:
+                    members.append(Developer(*_details(rng)))
+            manager.team.extend(members)
+            created += size
+            queue.extend((member, level + 1) for member in members if isinstance(member, Manager))
+        department.add_manager(root)
+    return department
+
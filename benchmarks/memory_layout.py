@@ -0,0 +1,90 @@
+"""
+Compare the memory used by the __slots__-based model classes with the previous
+__dict__-based layout.
+
+Run from the repository root:
+
+    python -m benchmarks.memory_layout [count]
+"""
+import sys
+import tracemalloc
+
+from models.designer import Designer
+from models.developer import Developer
+from models.manager import Manager
+
+FIRST_NAMES = ["John", "Jane", "Alice", "Bob", "Charlie", "Emily", "Eve", "Max"]
+LAST_NAMES = ["Doe", "Smith", "Johnson", "Brown", "Wilson", "Davis", "White", "Black"]
+
+
+class DictEmployee:
+    """
+    The previous employee layout: a plain class with a per-instance __dict__ and no interning.
+    """
+
+    def __init__(self, first_name, last_name, base_salary, experience):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.base_salary = base_salary
+        self.experience = experience
+
+
+class DictDeveloper(DictEmployee):
+    pass
+
+
+class DictDesigner(DictEmployee):
+    def __init__(self, first_name, last_name, base_salary, experience, eff_coeff):
+        super().__init__(first_name, last_name, base_salary, experience)
+        self.eff_coeff = eff_coeff
+
+
+class DictManager(DictEmployee):
+    def __init__(self, first_name, last_name, base_salary, experience, team=None):
+        super().__init__(first_name, last_name, base_salary, experience)
+        self.team = team or []
+
+
+def build(count, manager_class, developer_class, designer_class):
+    """
+    Build count employees in teams of ten, as they would be after loading a department.
+
+    Names are copied so that, as with data parsed from a file, equal names start out as
+    distinct string objects.
+    """
+    managers = []
+    for start in range(0, count, 10):
+        team = []
+        for index in range(start + 1, min(start + 10, count)):
+            first_name = ''.join(FIRST_NAMES[index % len(FIRST_NAMES)])
+            last_name = ''.join(LAST_NAMES[index // len(FIRST_NAMES) % len(LAST_NAMES)])
+            if index % 3:
+                team.append(developer_class(first_name, last_name, 1000 + index % 500, index % 10))
+            else:
+                team.append(designer_class(first_name, last_name, 1000 + index % 500, index % 10, 0.5))
+        managers.append(manager_class("Bob", "Brown", 2000, 5, team))
+    return managers
+
+
+def measure(count, *classes):
+    """
+    Return the number of bytes allocated to build count employees with the given classes.
+    """
+    tracemalloc.start()
+    managers = build(count, *classes)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del managers
+    return size
+
+
+def main(count=100_000):
+    slots = measure(count, Manager, Developer, Designer)
+    dicts = measure(count, DictManager, DictDeveloper, DictDesigner)
+    print(f"{count} employees")
+    print(f"__dict__ layout: {dicts / count:8.1f} bytes per employee")
+    print(f"__slots__ layout: {slots / count:7.1f} bytes per employee ({1 - slots / dicts:.0%} less)")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:]))
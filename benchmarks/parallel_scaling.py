@@ -0,0 +1,64 @@
+"""
+Measure how the parallel payroll scales from 1 to N workers.
+
+Run from the repository root:
+
+    python -m benchmarks.parallel_scaling [employees] [max_workers]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from models.department import Department
+from models.designer import Designer
+from models.developer import Developer
+from models.manager import Manager
+from models.parallel import snapshot_salaries
+from models.snapshot import read_snapshot
+
+
+def build_department(employees, team_size=10):
+    """
+    Build a department of about the given number of employees in teams of team_size.
+    """
+    department = Department()
+    for start in range(0, employees, team_size + 1):
+        team = [Developer("John", "Doe", 1000 + index, index % 10) if index % 3
+                else Designer("Jane", "Smith", 1200, index % 10, 0.5)
+                for index in range(team_size)]
+        department.add_manager(Manager("Bob", "Brown", 2000, start % 10, team))
+    return department
+
+
+def timed(function):
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main(employees=200_000, max_workers=None):
+    department = build_department(employees)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "employees.snap")
+        department.save_snapshot(filename)
+
+        serial = timed(department.calculate_salaries)
+        snapshot = timed(lambda: read_snapshot(filename).calculate_salaries())
+        print(f"{employees} employees on {os.cpu_count()} CPU(s)")
+        print(f"serial, objects:         {serial:.3f}s")
+        print(f"serial, snapshot pass:   {snapshot:.3f}s")
+        print("workers  objects  speedup  snapshot  speedup (each against itself with 1 worker)")
+        for workers in range(1, max_workers + 1):
+            objects = timed(lambda: department.calculate_salaries_parallel(workers=workers))
+            ranges = timed(lambda: snapshot_salaries(filename, workers=workers))
+            if workers == 1:
+                objects_base, ranges_base = objects, ranges
+            print(f"{workers:7d}  {objects:7.3f}  {objects_base / objects:6.2f}x  {ranges:8.3f}  "
+                  f"{ranges_base / ranges:6.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:]))
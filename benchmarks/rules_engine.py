@@ -0,0 +1,57 @@
+"""
+Compare the compiled salary rules with the calculate_salary methods.
+
+Run from the repository root:
+
+    python -m benchmarks.rules_engine [employees] [repeat]
+"""
+import sys
+import timeit
+
+from models.designer import Designer
+from models.developer import Developer
+from models.manager import Manager
+from models.rules import DEFAULT_SALARY_RULES
+
+
+def build_employees(count):
+    """
+    Build a mix of developers, designers and managers (managers with uncached salaries).
+    """
+    employees = []
+    for index in range(count):
+        if index % 10 == 0:
+            employees.append(Manager("Bob", "Brown", 2000, index % 10,
+                                     [Developer("John", "Doe", 1000, 3)] * (index % 13)))
+        elif index % 3:
+            employees.append(Developer("John", "Doe", 1000 + index % 500, index % 10))
+        else:
+            employees.append(Designer("Jane", "Smith", 1200, index % 10, 0.5))
+    return employees
+
+
+def main(count=100_000, repeat=5):
+    employees = build_employees(count)
+    managers = [employee for employee in employees if isinstance(employee, Manager)]
+
+    def methods():
+        # Managers cache their salary; reset it so both sides do the same work
+        for manager in managers:
+            manager.base_salary = manager.base_salary
+        return [employee.calculate_salary() for employee in employees]
+
+    def rules():
+        for manager in managers:
+            manager.base_salary = manager.base_salary
+        return DEFAULT_SALARY_RULES.calculate_many(employees)
+
+    assert methods() == rules()
+    method_time = min(timeit.repeat(methods, number=1, repeat=repeat))
+    rules_time = min(timeit.repeat(rules, number=1, repeat=repeat))
+    print(f"{count} employees")
+    print(f"calculate_salary methods: {method_time:.3f}s")
+    print(f"compiled salary rules:    {rules_time:.3f}s ({method_time / rules_time:.2f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(argument) for argument in sys.argv[1:]))
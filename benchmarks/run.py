@@ -0,0 +1,161 @@
+"""
+Time and measure the memory of payroll, save and load on synthetic organizations.
+
+Run from the repository root:
+
+    python -m benchmarks.run [--sizes 1000,100000,1000000] [--output results.json]
+                             [--compare previous.json] [--repeat 3] [--seed 0] [--no-memory]
+
+Every operation is timed repeat times (the best time is kept) and, unless --no-memory is
+given, run once more under tracemalloc to record its peak memory. The results are written as
+JSON; --compare prints the time ratio of every operation against an earlier results file.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.generator import generate_department
+from models.department import Department
+from models.factory import build_from_columns
+from models.manager import Manager
+from models.payroll import TextReportSink
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def _operations(department, directory):
+    """
+    Return the benchmarked operations as (name, setup, function) tuples.
+
+    setup (or None) is called before every measured call of function, without being timed,
+    and its result is passed to function.
+    """
+    json_filename = os.path.join(directory, "employees.json")
+    snapshot_filename = os.path.join(directory, "employees.snap")
+    columns = department.to_columns()
+
+    def fresh_managers():
+        # calculate_salary caches manager salaries, so every pass needs new objects
+        return build_from_columns(columns, trusted=True)
+
+    def calculate_salary(managers):
+        stack = list(managers)
+        while stack:
+            employee = stack.pop()
+            employee.calculate_salary()
+            if isinstance(employee, Manager):
+                stack.extend(employee.team)
+
+    def give_salary(_):
+        with open(os.devnull, 'w') as file:
+            department.give_salary(TextReportSink(file))
+
+    return [
+        ("calculate_salary", fresh_managers, calculate_salary),
+        ("calculate_salaries", None, lambda _: department.calculate_salaries()),
+        ("give_salary", None, give_salary),
+        ("save_employees", None, lambda _: department.save_employees(json_filename)),
+        ("save_employees_stream", None,
+         lambda _: department.save_employees(json_filename, stream=True, compact=True)),
+        ("load_employees", None, lambda _: Department().load_employees(json_filename)),
+        ("load_employees_stream", None, lambda _: Department().load_employees(json_filename, stream=True)),
+        ("save_snapshot", None, lambda _: department.save_snapshot(snapshot_filename)),
+        ("load_snapshot", None, lambda _: Department().load_snapshot(snapshot_filename)),
+    ]
+
+
+def measure(function, setup=None, repeat=1, memory=True):
+    """
+    Measure a function.
+
+    Returns:
+    dict: The best time in seconds over repeat calls and, if memory is True, the peak number
+          of bytes allocated during one more call.
+    """
+    seconds = []
+    for _ in range(repeat):
+        argument = setup() if setup is not None else None
+        start = time.perf_counter()
+        function(argument)
+        seconds.append(time.perf_counter() - start)
+    result = {'seconds': min(seconds)}
+    if memory:
+        argument = setup() if setup is not None else None
+        tracemalloc.start()
+        try:
+            function(argument)
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def run(sizes=DEFAULT_SIZES, repeat=3, seed=0, memory=True, log=print):
+    """
+    Run the benchmarks for every department size.
+
+    Returns:
+    dict: The environment and one result per size and operation.
+    """
+    results = []
+    for size in sizes:
+        start = time.perf_counter()
+        department = generate_department(size, seed=seed)
+        log(f"{size} employees generated in {time.perf_counter() - start:.2f}s")
+        with tempfile.TemporaryDirectory() as directory:
+            for name, setup, function in _operations(department, directory):
+                result = measure(function, setup, repeat, memory)
+                results.append({'employees': size, 'operation': name, **result})
+                peak = f"{result['peak_bytes'] / 2 ** 20:10.1f} MiB" if 'peak_bytes' in result else ""
+                log(f"  {name:24s} {result['seconds']:9.3f}s {peak}")
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'seed': seed,
+        'repeat': repeat,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'results': results,
+    }
+
+
+def compare(current, previous, log=print):
+    """
+    Print the time ratio (current / previous) of every operation measured in both runs.
+    """
+    earlier = {(result['employees'], result['operation']): result['seconds'] for result in previous['results']}
+    log("employees  operation                  ratio")
+    for result in current['results']:
+        key = (result['employees'], result['operation'])
+        if key in earlier and earlier[key] > 0:
+            log(f"{key[0]:9d}  {key[1]:24s} {result['seconds'] / earlier[key]:6.2f}x")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated department sizes")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--compare', help="compare with an earlier results file")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc measurements")
+    options = parser.parse_args(arguments)
+
+    sizes = [int(size) for size in options.sizes.split(',')]
+    results = run(sizes, options.repeat, options.seed, not options.no_memory)
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=4)
+    if options.compare:
+        with open(options.compare, 'r') as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,324 @@
+import heapq
+import math
+
+# Roles tracked separately by PayrollAnalytics; other roles are only counted in the totals
+ROLES = ('Developer', 'Designer', 'Manager')
+
+
+class QuantileSketch:
+    """
+    An approximate quantile sketch with a bounded relative error (DDSketch style).
+
+    Values are counted in logarithmic buckets, so any quantile is returned within
+    relative_accuracy of the true value, whatever the number of values. Sketches with the
+    same accuracy can be merged, e.g. after processing chunks separately.
+    """
+
+    def __init__(self, relative_accuracy=0.01, max_buckets=2048):
+        """
+        Initialize an empty sketch.
+
+        Args:
+        relative_accuracy (float): The relative error of the returned quantiles (0 < a < 1).
+        max_buckets (int): The largest number of buckets kept; beyond it the lowest buckets
+                           are collapsed, which only affects the accuracy of low quantiles.
+        """
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("Relative accuracy must be between 0 and 1.")
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._buckets = {}
+        self._zero_count = 0  # Values <= 0 (salaries are positive, but the sketch accepts any value)
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value, count=1):
+        """
+        Add a value (count times) to the sketch.
+        """
+        if value > 0:
+            bucket = math.ceil(math.log(value) / self._log_gamma)
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + count
+            if len(self._buckets) > self.max_buckets:
+                self._collapse()
+        else:
+            self._zero_count += count
+        self.count += count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def _collapse(self):
+        # Fold the lowest buckets into one
+        keys = sorted(self._buckets)
+        excess = len(keys) - self.max_buckets + 1
+        self._buckets[keys[excess]] += sum(self._buckets.pop(key) for key in keys[:excess])
+
+    def merge(self, other):
+        """
+        Add the values of another sketch with the same relative accuracy.
+
+        Returns:
+        QuantileSketch: This sketch.
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Only sketches with the same relative accuracy can be merged.")
+        for bucket, count in other._buckets.items():
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + count
+        if len(self._buckets) > self.max_buckets:
+            self._collapse()
+        self._zero_count += other._zero_count
+        self.count += other.count
+        if other.count:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def quantile(self, q):
+        """
+        Return the approximate q-quantile (0 <= q <= 1), or None if the sketch is empty.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be between 0 and 1.")
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self._zero_count
+        if rank < seen:
+            return min(self.min, 0)
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if rank < seen:
+                value = 2 * self._gamma ** bucket / (self._gamma + 1)
+                # The extremes are known exactly
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class SalaryHistogram:
+    """
+    Counts of values in fixed-width bins between lower and upper, plus underflow and overflow.
+    """
+
+    def __init__(self, lower=0, upper=10000, bins=20):
+        """
+        Initialize an empty histogram.
+
+        Args:
+        lower (float): The lower edge of the first bin.
+        upper (float): The upper edge of the last bin.
+        bins (int): The number of bins.
+        """
+        if upper <= lower or bins < 1:
+            raise ValueError("A histogram needs lower < upper and at least one bin.")
+        self.lower = lower
+        self.upper = upper
+        self.counts = [0] * bins
+        self.underflow = 0
+        self.overflow = 0
+        self._width = (upper - lower) / bins
+
+    def add(self, value, count=1):
+        """
+        Count a value (count times).
+        """
+        if value < self.lower:
+            self.underflow += count
+        elif value >= self.upper:
+            self.overflow += count
+        else:
+            self.counts[min(int((value - self.lower) / self._width), len(self.counts) - 1)] += count
+
+    def merge(self, other):
+        """
+        Add the counts of a histogram with the same bins.
+
+        Returns:
+        SalaryHistogram: This histogram.
+        """
+        if (other.lower, other.upper, len(other.counts)) != (self.lower, self.upper, len(self.counts)):
+            raise ValueError("Only histograms with the same bins can be merged.")
+        self.counts = [mine + theirs for mine, theirs in zip(self.counts, other.counts)]
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def edges(self):
+        """
+        Return the bin edges, from lower to upper.
+        """
+        return [self.lower + index * self._width for index in range(len(self.counts))] + [self.upper]
+
+
+class TopN:
+    """
+    The n largest salaries seen, kept in a min-heap of size n.
+    """
+
+    def __init__(self, n=10):
+        self.n = n
+        self._heap = []
+        self._sequence = 0  # Breaks ties, so equal salaries keep their arrival order
+
+    def add(self, salary, name, role):
+        """
+        Offer an employee's salary.
+        """
+        self._sequence += 1
+        # Earlier arrivals win ties: a larger negated sequence number ranks higher in the heap
+        item = (salary, -self._sequence, name, role)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def merge(self, other):
+        """
+        Offer every salary kept by another TopN.
+
+        Returns:
+        TopN: This object.
+        """
+        for salary, _, name, role in sorted(other._heap, reverse=True):
+            self.add(salary, name, role)
+        return self
+
+    def items(self):
+        """
+        Return (salary, name, role) tuples, highest salary first.
+        """
+        return [(salary, name, role) for salary, _, name, role in sorted(self._heap, reverse=True)]
+
+
+class _Statistics:
+    # The sketch, histogram and top-N of one role (or of everyone)
+
+    def __init__(self, relative_accuracy, histogram_bins, top_n):
+        self.sketch = QuantileSketch(relative_accuracy)
+        self.histogram = SalaryHistogram(*histogram_bins)
+        self.top = TopN(top_n)
+        self.total = 0
+
+    def add(self, record):
+        self.sketch.add(record.salary)
+        self.histogram.add(record.salary)
+        self.top.add(record.salary, record.name, record.role)
+        self.total += record.salary
+
+    def merge(self, other):
+        self.sketch.merge(other.sketch)
+        self.histogram.merge(other.histogram)
+        self.top.merge(other.top)
+        self.total += other.total
+
+
+class PayrollAnalytics:
+    """
+    Salary quantiles, histograms and top earners per role, computed in one streaming pass
+    over PayrollRecords in bounded memory.
+
+    It can be passed to Department.give_salary as a sink. Analytics built from separate chunks
+    with the same settings can be merged.
+    """
+
+    def __init__(self, relative_accuracy=0.01, histogram_bins=(0, 10000, 20), top_n=10):
+        """
+        Initialize empty analytics.
+
+        Args:
+        relative_accuracy (float): The relative error of the quantiles.
+        histogram_bins (tuple): (lower, upper, bins) of the salary histograms.
+        top_n (int): The number of top earners kept per role.
+        """
+        self._settings = (relative_accuracy, tuple(histogram_bins), top_n)
+        self._overall = _Statistics(*self._settings)
+        self._roles = {role: _Statistics(*self._settings) for role in ROLES}
+
+    def write(self, record):
+        """
+        Add a PayrollRecord.
+        """
+        self._overall.add(record)
+        statistics = self._roles.get(record.role)
+        if statistics is not None:
+            statistics.add(record)
+
+    def write_all(self, records):
+        """
+        Add every PayrollRecord of an iterable.
+        """
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """
+        Nothing is buffered; present so the analytics can be used as a payroll sink.
+        """
+
+    def merge(self, other):
+        """
+        Add the analytics of another chunk computed with the same settings.
+
+        Returns:
+        PayrollAnalytics: This object.
+        """
+        if other._settings != self._settings:
+            raise ValueError("Only analytics with the same settings can be merged.")
+        self._overall.merge(other._overall)
+        for role, statistics in self._roles.items():
+            statistics.merge(other._roles[role])
+        return self
+
+    def _statistics(self, role):
+        if role is None:
+            return self._overall
+        name = role if isinstance(role, str) else role.__name__
+        if name not in self._roles:
+            raise ValueError(f"Role must be one of {', '.join(ROLES)}.")
+        return self._roles[name]
+
+    def count(self, role=None):
+        """
+        Return the number of salaries of a role (a class or class name), or of everyone.
+        """
+        return self._statistics(role).sketch.count
+
+    def quantile(self, q, role=None):
+        """
+        Return the approximate q-quantile of the salaries of a role, or of everyone.
+        """
+        return self._statistics(role).sketch.quantile(q)
+
+    def histogram(self, role=None):
+        """
+        Return the SalaryHistogram of a role, or of everyone.
+        """
+        return self._statistics(role).histogram
+
+    def top(self, role=None):
+        """
+        Return the top earners of a role, or of everyone, as (salary, name, role) tuples.
+        """
+        return self._statistics(role).top.items()
+
+    def summary(self, quantiles=(0.5, 0.9, 0.99)):
+        """
+        Return the count, total, mean, quantiles and top earners overall and per role.
+
+        Returns:
+        dict: None (everyone) or a role name -> summary dictionary.
+        """
+        result = {}
+        for role in (None,) + ROLES:
+            statistics = self._statistics(role)
+            count = statistics.sketch.count
+            result[role] = {
+                'count': count,
+                'total': statistics.total,
+                'mean': statistics.total / count if count else None,
+                'quantiles': {q: statistics.sketch.quantile(q) for q in quantiles},
+                'top': statistics.top.items(),
+            }
+        return result
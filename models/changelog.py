@@ -0,0 +1,254 @@
+import json
+import os
+
+from .designer import Designer
+from .serialization import atomic_write, employee_from_dict, file_digest, write_json_array
+
+# Fields that can be changed with an update event
+UPDATABLE_FIELDS = ('first_name', 'last_name', 'base_salary', 'experience', 'eff_coeff')
+
+
+def employee_path(department, employee):
+    """
+    Return the position of an employee in a department as a list of indexes.
+
+    [i] is department.managers[i], [i, j] is member j of that manager's team, and so on.
+
+    Args:
+    department (Department): The department containing the employee.
+    employee (Employee): The employee to locate.
+
+    Returns:
+    list: The indexes from the department down to the employee.
+
+    Raises:
+    ValueError: If the employee is not part of the department.
+    """
+    def position(members, employee):
+        return next(index for index, member in enumerate(members) if member is employee)
+
+    path = []
+    try:
+        manager = department.manager_of(employee)
+        while manager is not None:
+            path.append(position(manager.team, employee))
+            employee, manager = manager, department.manager_of(manager)
+        path.append(position(department.managers, employee))
+    except (KeyError, StopIteration):
+        raise ValueError(f"{employee.first_name} {employee.last_name} is not part of the department.")
+    return path[::-1]
+
+
+def resolve_path(department, path):
+    """
+    Return the employee at a position returned by employee_path.
+
+    An empty path stands for the department itself.
+    """
+    if not path:
+        return department
+    employee = department.managers[path[0]]
+    for index in path[1:]:
+        employee = employee.team[index]
+    return employee
+
+
+def _validate_update(employee, fields):
+    # Re-run the constructor validation on the updated values
+    unknown = set(fields) - set(UPDATABLE_FIELDS)
+    if unknown or ('eff_coeff' in fields and not isinstance(employee, Designer)):
+        raise ValueError(f"Cannot update fields: {', '.join(sorted(unknown or {'eff_coeff'}))}.")
+    data = employee.to_dict()
+    data.update(fields)
+    data.pop('team', None)
+    type(employee)(**data)
+
+
+def apply_change(department, change):
+    """
+    Apply a single change event to a department.
+
+    Args:
+    department (Department): The department to change.
+    change (dict): An 'add', 'remove' or 'update' event as written by ChangeLog.
+    """
+    operation = change['op']
+    target = resolve_path(department, change['path'])
+    if operation == 'add':
+        employee = employee_from_dict(change['data'])
+        if target is department:
+            department.add_manager(employee)
+        else:
+            target.add_team_member(employee)
+    elif operation == 'remove':
+        parent = resolve_path(department, change['path'][:-1])
+        if parent is department:
+            department.remove_manager(target)
+        else:
+            parent.remove_team_member(target)
+    elif operation == 'update':
+        _validate_update(target, change['fields'])
+        for field, value in change['fields'].items():
+            setattr(target, field, value)
+        department.reindex(target)
+    else:
+        raise ValueError(f"Unknown change operation '{operation}'.")
+
+
+class ChangeLog:
+    """
+    An append-only log of the changes made to a Department since its last JSON snapshot.
+
+    Every change is applied to the department and appended to the log as one JSON line, so
+    saving costs as much as the change instead of rewriting the whole organization. The first
+    line of the log records the digest of the snapshot it applies to; a log left over from an
+    older snapshot (e.g. after an interrupted compaction) is ignored.
+    """
+
+    def __init__(self, department, snapshot_filename, log_filename):
+        """
+        Initialize the change log of a department loaded from snapshot_filename.
+
+        Args:
+        department (Department): The department the changes are applied to.
+        snapshot_filename (str): The JSON snapshot written by Department.save_employees.
+        log_filename (str): The file the changes are appended to.
+        """
+        self.department = department
+        self.snapshot_filename = snapshot_filename
+        self.log_filename = log_filename
+        self._digest = None
+        self._log_ready = False
+
+    @classmethod
+    def load(cls, department, snapshot_filename, log_filename):
+        """
+        Load a snapshot and replay its change log into a department.
+
+        Args:
+        department (Department): The (empty) department to populate.
+        snapshot_filename (str): The JSON snapshot.
+        log_filename (str): The change log; it does not have to exist.
+
+        Returns:
+        ChangeLog: The change log, ready to record further changes.
+        """
+        department.load_employees(snapshot_filename)
+        change_log = cls(department, snapshot_filename, log_filename)
+        for change in change_log.changes():
+            apply_change(department, change)
+        return change_log
+
+    def changes(self):
+        """
+        Iterate over the change events recorded for the current snapshot.
+
+        A last line cut short by an interrupted write is ignored.
+
+        Yields:
+        dict: The change events, oldest first.
+        """
+        if not self._log_matches_snapshot():
+            return
+        with open(self.log_filename, 'r') as file:
+            file.readline()  # The header
+            for line in file:
+                if not line.endswith('\n'):
+                    return
+                yield json.loads(line)
+
+    def _snapshot_digest(self):
+        # The digest is computed once per snapshot, not once per change
+        if self._digest is None and os.path.exists(self.snapshot_filename):
+            self._digest = file_digest(self.snapshot_filename)
+        return self._digest
+
+    def _log_matches_snapshot(self):
+        if not os.path.exists(self.log_filename):
+            return False
+        with open(self.log_filename, 'r') as file:
+            header = file.readline()
+        return header.endswith('\n') and json.loads(header).get('snapshot') == self._snapshot_digest()
+
+    def _truncate_partial_line(self):
+        # Cut a last line left unfinished by an interrupted write, so appends start on a new line
+        with open(self.log_filename, 'rb+') as file:
+            end = file.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 4096)
+                file.seek(start)
+                block = file.read(position - start)
+                newline = block.rfind(b'\n')
+                if newline >= 0:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position != end:
+                file.truncate(position)
+
+    def _append(self, change):
+        # Start a new log (with its header) if there is none for the current snapshot
+        if not self._log_ready:
+            if self._log_matches_snapshot():
+                self._truncate_partial_line()
+            else:
+                with open(self.log_filename, 'w') as file:
+                    file.write(json.dumps({'snapshot': self._snapshot_digest()}) + '\n')
+            self._log_ready = True
+        with open(self.log_filename, 'a') as file:
+            file.write(json.dumps(change) + '\n')
+            file.flush()
+            os.fsync(file.fileno())
+
+    def add_manager(self, manager):
+        """
+        Add a top-level manager to the department and record the change.
+        """
+        self.department.add_manager(manager)
+        self._append({'op': 'add', 'path': [], 'data': manager.to_dict()})
+
+    def add_member(self, manager, employee):
+        """
+        Add an employee to the team of a manager of the department and record the change.
+        """
+        path = employee_path(self.department, manager)
+        manager.add_team_member(employee)
+        self._append({'op': 'add', 'path': path, 'data': employee.to_dict()})
+
+    def remove(self, employee):
+        """
+        Remove an employee (with its team, for a manager) from the department and record the change.
+        """
+        path = employee_path(self.department, employee)
+        apply_change(self.department, {'op': 'remove', 'path': path})
+        self._append({'op': 'remove', 'path': path})
+
+    def update(self, employee, **fields):
+        """
+        Change fields of an employee of the department and record the change.
+
+        Args:
+        employee (Employee): The employee to change.
+        **fields: New values for first_name, last_name, base_salary, experience or eff_coeff.
+
+        Raises:
+        ValueError: If a field cannot be updated or a value is invalid.
+        """
+        change = {'op': 'update', 'path': employee_path(self.department, employee), 'fields': fields}
+        apply_change(self.department, change)
+        self._append(change)
+
+    def compact(self):
+        """
+        Fold the change log into a new snapshot and start an empty log.
+
+        The snapshot is replaced atomically first; the old log then no longer matches it, so
+        an interruption before the log is removed cannot apply the changes twice.
+        """
+        with atomic_write(self.snapshot_filename) as file:
+            write_json_array(file, (manager.to_dict() for manager in self.department.managers))
+        self._digest = None
+        self._log_ready = False
+        if os.path.exists(self.log_filename):
+            os.remove(self.log_filename)
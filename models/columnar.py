@@ -0,0 +1,190 @@
+from array import array
+
+from .designer import Designer
+from .developer import Developer
+from .manager import Manager
+
+# Role codes used by the columnar representation
+ROLE_EMPLOYEE = 0
+ROLE_DEVELOPER = 1
+ROLE_DESIGNER = 2
+ROLE_MANAGER = 3
+
+# Role codes -> class names
+ROLE_NAMES = {
+    ROLE_EMPLOYEE: 'Employee',
+    ROLE_DEVELOPER: 'Developer',
+    ROLE_DESIGNER: 'Designer',
+    ROLE_MANAGER: 'Manager',
+}
+
+
+def role_code(employee):
+    """
+    Return the role code of an employee object.
+
+    Args:
+    employee (Employee): The employee whose role should be determined.
+
+    Returns:
+    int: One of ROLE_MANAGER, ROLE_DESIGNER, ROLE_DEVELOPER or ROLE_EMPLOYEE.
+    """
+    if isinstance(employee, Manager):
+        return ROLE_MANAGER
+    if isinstance(employee, Designer):
+        return ROLE_DESIGNER
+    if isinstance(employee, Developer):
+        return ROLE_DEVELOPER
+    return ROLE_EMPLOYEE
+
+
+class DepartmentColumns:
+    """
+    A columnar (structure-of-arrays) representation of a Department.
+
+    Every employee of the department, including nested managers and their teams, is stored
+    as one row of parallel arrays. Rows are ordered depth-first: a manager is followed by
+    the members of its team. The manager_index column holds the row of the manager whose
+    team the employee belongs to, or -1 for the department's top-level managers.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty columns.
+        """
+        self.first_names = []
+        self.last_names = []
+        self.base_salary = array('d')
+        self.experience = array('d')
+        self.eff_coeff = array('d')  # 0 for everyone who is not a Designer
+        self.role = array('b')
+        self.manager_index = array('q')
+        self.employees = []  # The source objects, when built from a Department
+
+    def __len__(self):
+        return len(self.role)
+
+    def append(self, first_name, last_name, base_salary, experience, eff_coeff, role, manager_index):
+        """
+        Append a single row to the columns.
+
+        Args:
+        first_name (str): The first name of the employee.
+        last_name (str): The last name of the employee.
+        base_salary (float): The base salary of the employee.
+        experience (int): The number of years of experience.
+        eff_coeff (float): The efficiency coefficient (0 for non-designers).
+        role (int): The role code of the employee.
+        manager_index (int): The row of the employee's manager, or -1.
+
+        Returns:
+        int: The index of the appended row.
+        """
+        self.first_names.append(first_name)
+        self.last_names.append(last_name)
+        self.base_salary.append(base_salary)
+        self.experience.append(experience)
+        self.eff_coeff.append(eff_coeff)
+        self.role.append(role)
+        self.manager_index.append(manager_index)
+        return len(self.role) - 1
+
+    @classmethod
+    def from_department(cls, department):
+        """
+        Build the columns from a Department object.
+
+        The organization tree is walked iteratively, so arbitrarily deep manager chains
+        are supported.
+
+        Args:
+        department (Department): The department to convert.
+
+        Returns:
+        DepartmentColumns: The columnar representation of the department.
+        """
+        return cls.from_managers(department.managers)
+
+    @classmethod
+    def from_managers(cls, managers):
+        """
+        Build the columns from a list of top-level managers.
+
+        Args:
+        managers (list): The Manager objects to convert, with their teams.
+
+        Returns:
+        DepartmentColumns: The columnar representation of the managers.
+        """
+        columns = cls()
+        # Stack of (employee, manager row); reversed so rows keep the original order
+        stack = [(manager, -1) for manager in reversed(managers)]
+        while stack:
+            employee, parent = stack.pop()
+            role = role_code(employee)
+            row = columns.append(
+                employee.first_name,
+                employee.last_name,
+                employee.base_salary,
+                employee.experience,
+                employee.eff_coeff if role == ROLE_DESIGNER else 0.0,
+                role,
+                parent,
+            )
+            columns.employees.append(employee)
+            if role == ROLE_MANAGER:
+                stack.extend((member, row) for member in reversed(employee.team))
+        return columns
+
+    def team_counts(self):
+        """
+        Count the team size and the number of developers of every row.
+
+        Returns:
+        tuple: Two lists (team_size, developer_count) indexed by row.
+        """
+        team_size = [0] * len(self)
+        developer_count = [0] * len(self)
+        for parent, role in zip(self.manager_index, self.role):
+            if parent >= 0:
+                team_size[parent] += 1
+                if role == ROLE_DEVELOPER:
+                    developer_count[parent] += 1
+        return team_size, developer_count
+
+    def calculate_salaries(self):
+        """
+        Calculate the salary of every row in a few column-wise passes.
+
+        The passes reproduce Employee, Designer and Manager calculate_salary exactly:
+        - experience tiers for everyone,
+        - the efficiency bonus (eff_coeff is 0 for non-designers, so the pass is a no-op for them),
+        - the team-size and developer-majority bonuses and the rounding for managers.
+
+        Returns:
+        array: The salary of every row, in row order.
+        """
+        # Experience tiers
+        salaries = array('d', [
+            base * 1.2 + 500 if experience > 5 else (base + 200 if experience > 2 else base)
+            for base, experience in zip(self.base_salary, self.experience)
+        ])
+
+        # Designer efficiency bonus
+        salaries = array('d', [
+            salary + salary * eff_coeff for salary, eff_coeff in zip(salaries, self.eff_coeff)
+        ])
+
+        # Manager team-size and developer-majority bonuses
+        team_size, developer_count = self.team_counts()
+        for row in [row for row, role in enumerate(self.role) if role == ROLE_MANAGER]:
+            salary = salaries[row]
+            size = team_size[row]
+            if size > 10:
+                salary += 300
+            elif size > 5:
+                salary += 200
+            if size > 1 and developer_count[row] > size / 2:
+                salary *= 1.1
+            salaries[row] = round(salary)
+        return salaries
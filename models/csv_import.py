@@ -0,0 +1,239 @@
+import csv
+from collections import Counter
+from itertools import islice
+
+from . import instrumentation
+from .factory import ROLE_CLASSES, gc_paused, new_employee, validate_columns
+from .designer import Designer
+from .manager import Manager
+
+# Logical column -> header of the flat HR export; override with the columns argument
+DEFAULT_COLUMNS = {
+    'id': 'id',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'role': 'role',
+    'base_salary': 'base_salary',
+    'experience': 'experience',
+    'eff_coeff': 'eff_coeff',
+    'manager_id': 'manager_id',
+}
+
+DEFAULT_CHUNK_SIZE = 10000
+
+
+def _parse_number(text):
+    # Numbers are restored as int when they are written as whole numbers; None if not a number
+    text = text.strip()
+    try:
+        return int(text)
+    except ValueError:
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+
+class CsvImportResult:
+    """
+    The outcome of a CSV import.
+
+    Attributes:
+    managers (list): The top-level Manager objects, with their (possibly nested) teams, in file order.
+    errors (list): (line, message) pairs for every rejected row, sorted by line. Lines count
+                   the header as 1 and one line per row (quoted fields spanning lines are not counted).
+    rows (int): The number of data rows read.
+    """
+
+    def __init__(self, managers, errors, rows):
+        self.managers = managers
+        self.errors = errors
+        self.rows = rows
+
+    @property
+    def imported(self):
+        """
+        int: The number of employees imported, nested team members included.
+        """
+        return self.rows - len({line for line, _ in self.errors})
+
+
+def import_csv(file, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """
+    Import a flat CSV export with one row per employee and a reference to their manager.
+
+    The file is read in chunks of chunk_size rows; each chunk is validated with the checks of
+    the Employee and Designer constructors and its objects are created. Manager references
+    are resolved by id through a dictionary, so rows may come in any order (a team member
+    before their manager) and managers may be nested. Every team is built once, in file
+    order, after the last row.
+
+    Invalid rows are skipped and reported instead of aborting the import: rows failing
+    validation, unknown roles, duplicate ids, references to missing (or rejected) employees
+    or to non-managers, cycles of manager references and top-level rows that are not managers.
+
+    Args:
+    file (str or file object): The CSV file, with a header row.
+    chunk_size (int): The number of rows validated and built at a time.
+    columns (dict, optional): Logical column -> header, for exports with other headers
+                              (see DEFAULT_COLUMNS). The role and eff_coeff columns are optional.
+
+    Returns:
+    CsvImportResult: The top-level managers and the per-row errors.
+    """
+    if isinstance(file, str):
+        with open(file, 'r', newline='') as opened:
+            return import_csv(opened, chunk_size, columns)
+    with gc_paused():
+        return _import(file, chunk_size, columns)
+
+
+def _import(file, chunk_size, columns):
+    names = dict(DEFAULT_COLUMNS, **(columns or {}))
+    reader = csv.reader(file)
+    header = next(reader, [])
+    missing = [names[column] for column in ('id', 'first_name', 'last_name', 'base_salary', 'experience',
+                                            'manager_id') if names[column] not in header]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}.")
+    position = {column: header.index(name) for column, name in names.items() if name in header}
+    id_at, manager_at = position['id'], position['manager_id']
+    first_at, last_at = position['first_name'], position['last_name']
+    salary_at, experience_at = position['base_salary'], position['experience']
+    role_at, coeff_at = position.get('role'), position.get('eff_coeff')
+
+    errors = []
+    by_id = {}  # Employee id -> (object, line)
+    members = {}  # Manager id -> the members referencing it, in file order
+    top_level = []  # (object, line) of the rows without a manager
+    rows = 0
+    line = 1
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            break
+        lines = range(line + 1, line + 1 + len(chunk))
+        line += len(chunk)
+        rows += len(chunk)
+
+        classes, valid = [], []
+        for row_line, row in zip(lines, chunk):
+            if len(row) != len(header):
+                errors.append((row_line, f"Expected {len(header)} fields, found {len(row)}."))
+                classes.append(None)
+                continue
+            role = row[role_at].strip() if role_at is not None else ''
+            if not role:
+                # Without a role, designers are recognized by their coefficient
+                role = 'Designer' if coeff_at is not None and row[coeff_at].strip() else 'Developer'
+            cls = ROLE_CLASSES.get(role)
+            if cls is None:
+                errors.append((row_line, f"Unknown role '{role}'."))
+            classes.append(cls)
+
+        rows_checked = [(row_line, row, cls) for row_line, row, cls in zip(lines, chunk, classes) if cls is not None]
+        first_names = [row[first_at] for _, row, _ in rows_checked]
+        last_names = [row[last_at] for _, row, _ in rows_checked]
+        base_salaries = [_parse_number(row[salary_at]) for _, row, _ in rows_checked]
+        experiences = [_parse_number(row[experience_at]) for _, row, _ in rows_checked]
+        eff_coeffs = [_parse_number(row[coeff_at]) if coeff_at is not None and row[coeff_at].strip() else None
+                      for _, row, _ in rows_checked]
+        rejected = set()
+        for index, message in validate_columns(first_names, last_names, base_salaries, experiences, eff_coeffs,
+                                               [issubclass(cls, Designer) for _, _, cls in rows_checked]):
+            errors.append((rows_checked[index][0], message))
+            rejected.add(index)
+
+        for index, (row_line, row, cls) in enumerate(rows_checked):
+            if index in rejected:
+                continue
+            employee_id = row[id_at].strip()
+            if employee_id in by_id:
+                errors.append((row_line, f"Duplicate id '{employee_id}' (first used on line {by_id[employee_id][1]})."))
+                continue
+            employee = new_employee(cls, first_names[index], last_names[index], base_salaries[index],
+                                    experiences[index], eff_coeffs[index])
+            by_id[employee_id] = (employee, row_line)
+            manager_id = row[manager_at].strip()
+            if manager_id:
+                members.setdefault(manager_id, []).append((employee, row_line))
+            else:
+                top_level.append((employee, row_line))
+            valid.append(cls)
+
+        if instrumentation.enabled:
+            for cls, count in Counter(valid).items():
+                instrumentation.increment('objects.' + cls.__name__, count)
+
+    # Resolve the manager references now that every row is known
+    teams = {}  # id(manager) -> its members
+    for manager_id, team in members.items():
+        manager = by_id.get(manager_id, (None, None))[0]
+        if manager is None:
+            errors.extend((row_line, f"Unknown manager id '{manager_id}'.") for _, row_line in team)
+        elif not isinstance(manager, Manager):
+            errors.extend((row_line, f"Employee '{manager_id}' is not a Manager.") for _, row_line in team)
+        else:
+            teams[id(manager)] = team
+
+    managers = []
+    for employee, row_line in top_level:
+        if isinstance(employee, Manager):
+            managers.append(employee)
+        else:
+            errors.append((row_line, "An employee without a manager must be a Manager."))
+
+    # Attach the teams reachable from the top level; whatever is left hangs below a rejected
+    # row or is part of a cycle
+    reached = set()
+    stack = list(managers)
+    while stack:
+        manager = stack.pop()
+        team = teams.get(id(manager), [])
+        manager.team = [employee for employee, _ in team]
+        for employee, row_line in team:
+            reached.add(row_line)
+            if isinstance(employee, Manager):
+                stack.append(employee)
+    for manager_id, team in members.items():
+        if id(by_id.get(manager_id, (None,))[0]) in teams:
+            errors.extend((row_line, "Not reachable from a top-level manager (rejected manager or cyclic references).")
+                          for _, row_line in team if row_line not in reached)
+
+    errors.sort(key=lambda error: error[0])
+    if errors and instrumentation.enabled:
+        instrumentation.increment('validation.failures', len(errors))
+    return CsvImportResult(managers, errors, rows)
+
+
+def export_csv(managers, file, columns=None):
+    """
+    Write employees as a flat CSV export that import_csv reads back.
+
+    Employees are numbered depth first (a manager before its team members), starting at 1.
+
+    Args:
+    managers (iterable): The top-level managers, e.g. department.managers.
+    file (str or file object): The CSV file to write.
+    columns (dict, optional): Logical column -> header (see DEFAULT_COLUMNS).
+    """
+    if isinstance(file, str):
+        with open(file, 'w', newline='') as opened:
+            return export_csv(managers, opened, columns)
+
+    names = dict(DEFAULT_COLUMNS, **(columns or {}))
+    writer = csv.writer(file)
+    writer.writerow(names.values())
+    next_id = 1
+    stack = [(manager, '') for manager in reversed(list(managers))]
+    while stack:
+        employee, manager_id = stack.pop()
+        employee_id = str(next_id)
+        next_id += 1
+        fields = {'id': employee_id, 'first_name': employee.first_name, 'last_name': employee.last_name,
+                  'role': type(employee).__name__, 'base_salary': employee.base_salary,
+                  'experience': employee.experience, 'eff_coeff': getattr(employee, 'eff_coeff', ''),
+                  'manager_id': manager_id}
+        writer.writerow(fields[column] for column in names)
+        if isinstance(employee, Manager):
+            stack.extend((member, employee_id) for member in reversed(employee.team))
@@ -1,7 +1,18 @@
 import json
+import os
+from array import array
+from . import csv_import, instrumentation
 from .manager import Manager
-from .designer import Designer
-from .developer import Developer
+from .columnar import DepartmentColumns
+from .factory import BulkValidationError, build_from_columns, build_from_records
+from .index import DepartmentIndex
+from .lazy_json import LazyManagers, load_offsets, save_offsets
+from .org_tree import PayrollTree
+from .parallel import parallel_salaries
+from .pipeline import run_payroll_pipeline
+from .payroll import TextReportSink, manager_records
+from .snapshot import SnapshotFormatError, read_snapshot, write_snapshot
+from .serialization import DEFAULT_CHUNK_SIZE, atomic_write, iter_json_array, write_json_array
 
 
 class Department:
@@ -15,6 +26,44 @@ class Department:
         Initialize the Department with an empty list of managers.
         """
         self.managers = []  # List of managers in the department
+        self._index = None  # Built on the first lookup (see the index property)
+
+    def __getstate__(self):
+        # The index is keyed by object identity and registered with the original managers, so
+        # copies and unpickled departments rebuild it on their first lookup
+        state = dict(self.__dict__)
+        state['managers'] = list(self.managers)
+        state['_index'] = None
+        return state
+
+    @property
+    def index(self):
+        """
+        DepartmentIndex: Lookups by name, role, experience tier and manager.
+
+        The index is built on first access and then kept up to date incrementally, so
+        departments that are only loaded and paid never pay for it.
+        """
+        if self._index is None:
+            index = DepartmentIndex()
+            # Lazily loaded managers that are not built yet are indexed when they are built
+            managers = self.managers.loaded() if isinstance(self.managers, LazyManagers) else self.managers
+            for manager in managers:
+                index.add_manager(manager)
+            self._index = index
+        return self._index
+
+    def _index_manager(self, manager):
+        # Index a manager added to the department, if the index has been built
+        if self._index is not None:
+            self._index.add_manager(manager)
+
+    def reindex(self, employee):
+        """
+        Update the lookups after an employee's name or experience was changed in place.
+        """
+        if self._index is not None:
+            self._index.reindex(employee)
 
     def add_manager(self, manager: Manager):
         """
@@ -24,75 +73,339 @@ class Department:
         manager (Manager): A Manager object to be added to the department.
         """
         self.managers.append(manager)
+        self._index_manager(manager)
 
-    def give_salary(self):
+    def remove_manager(self, manager: Manager):
         """
-        Calculate and print the salary for each manager and their team members.
+        Remove a manager, together with its team, from the department.
 
-        The method iterates through all managers and their teams, calculates their salary,
-        and prints the salary information for each individual.
+        Args:
+        manager (Manager): A Manager object of the department.
+
+        Raises:
+        ValueError: If the manager is not part of the department.
+        """
+        self.managers.remove(manager)
+        if self._index is not None:
+            self._index.remove_manager(manager)
+
+    def find_employees(self, first_name, last_name):
+        """
+        Find the employees with the given name anywhere in the department.
+
+        Args:
+        first_name (str): The first name to look for.
+        last_name (str): The last name to look for.
+
+        Returns:
+        list: The matching employees.
+        """
+        return self.index.find(first_name, last_name)
+
+    def employees_by_role(self, role):
+        """
+        List the employees of a role anywhere in the department.
+
+        Args:
+        role (type or str): The class of the role (e.g. Designer) or its name.
+
+        Returns:
+        list: The employees of that role.
+        """
+        return self.index.by_role(role)
+
+    def employees_by_tier(self, tier):
+        """
+        List the employees of an experience tier ('senior', 'middle' or 'junior').
+
+        Returns:
+        list: The employees of that tier.
+        """
+        return self.index.by_tier(tier)
+
+    def manager_of(self, employee):
+        """
+        Return the Manager whose team the employee belongs to, or None for top-level managers.
+        """
+        return self.index.manager_of(employee)
+
+    def iter_payroll(self, rules=None):
+        """
+        Calculate the salary for each manager and their team members.
+
+        Args:
+        rules (SalaryRules, optional): The salary rules to apply; by default each employee's
+                                       calculate_salary method is used.
+
+        Yields:
+        PayrollRecord: One record per employee, each manager followed by its team members.
         """
+        calculate = rules.calculate if rules is not None else (lambda employee: employee.calculate_salary())
+        if instrumentation.enabled:
+            calculate = instrumentation.instrument_salary(calculate)
         for manager in self.managers:
-            # Calculate the salary of the manager
-            salary = manager.calculate_salary()
-            print(f"{manager.first_name} {manager.last_name} received {round(salary)} money.")
+            # The manager followed by each team member under the manager
+            yield from manager_records(manager, calculate)
+
+    def give_salary(self, sink=None, rules=None):
+        """
+        Calculate and report the salary for each manager and their team members.
+
+        Args:
+        sink (PayrollSink, optional): Where the records are written; by default the
+                                      "<name> received <salary> money." report is printed.
+        rules (SalaryRules, optional): The salary rules to apply instead of calculate_salary.
 
-            # Calculate and print the salary for each team member under the manager
-            for member in manager.team:
-                member_salary = member.calculate_salary()
-                print(f"{member.first_name} {member.last_name} received {round(member_salary)} money.")
+        The method iterates through all managers and their teams, calculates their salary,
+        and writes the salary information for each individual to the sink.
+        """
+        sink = sink or TextReportSink()
+        with instrumentation.timed('payroll.give_salary'):
+            sink.write_all(self.iter_payroll(rules))
+            sink.flush()
+
+    async def give_salary_async(self, sinks, rules=None):
+        """
+        Calculate the payroll and write it to several sinks concurrently.
+
+        The records are those of give_salary; each sink's blocking writes run in a worker thread
+        and overlap with the calculation (see pipeline.run_payroll_pipeline).
+
+        Args:
+        sinks (list): The PayrollSink objects to write to.
+        rules (SalaryRules, optional): The salary rules to apply instead of calculate_salary.
+
+        Returns:
+        dict: {'records': number of records written, 'salary': total salary}.
+        """
+        return await run_payroll_pipeline(self.managers, sinks, rules)
+
+    def to_columns(self):
+        """
+        Convert the department into its columnar representation.
+
+        Returns:
+        DepartmentColumns: Parallel arrays holding every employee of the department.
+        """
+        return DepartmentColumns.from_department(self)
 
-    def save_employees(self, filename):
+    def calculate_salaries(self, columns=None):
+        """
+        Calculate the salary of every employee in the department, nested teams included.
+
+        Converting the objects to columns costs more than the column-wise pass saves, so
+        without columns the objects are walked directly. Columns the caller already has (from
+        an earlier to_columns(), kept while the department is unchanged) are calculated in one
+        batched pass. The results are identical to calling calculate_salary on each object.
+
+        Args:
+        columns (DepartmentColumns, optional): The columns of this department from to_columns().
+                                               Columns read from a snapshot hold no objects;
+                                               use their calculate_salaries() directly.
+
+        Returns:
+        list: (employee, salary) pairs in depth-first order (manager first, then its team).
+        """
+        if columns is not None:
+            return list(zip(columns.employees, columns.calculate_salaries()))
+        pairs = []
+        stack = list(reversed(self.managers))
+        while stack:
+            employee = stack.pop()
+            pairs.append((employee, employee.calculate_salary()))
+            if isinstance(employee, Manager):
+                stack.extend(reversed(employee.team))
+        return pairs
+
+    def calculate_salaries_parallel(self, workers=None, chunk_size=None, use_processes=True):
+        """
+        Calculate the salaries reported by give_salary using a pool of workers.
+
+        Args:
+        workers (int, optional): The number of workers; defaults to the number of CPUs.
+        chunk_size (int, optional): The number of managers handed to a worker at a time.
+        use_processes (bool): If False, use a thread pool instead of a process pool.
+
+        Returns:
+        list: (employee, salary) pairs in the same order as give_salary prints them.
+        """
+        return parallel_salaries(self, workers, chunk_size, use_processes)
+
+    def payroll_tree(self):
+        """
+        Build the tree-aware payroll of the department.
+
+        Returns:
+        PayrollTree: Salaries of every employee, including nested teams, with memoized
+                     per-manager subtree totals and headcounts.
+        """
+        return PayrollTree(self)
+
+    def save_employees(self, filename, stream=False, compact=False, atomic=False, index=False):
         """
         Save the list of managers and their teams to a JSON file.
 
         Args:
         filename (str): The name of the file to which employee data will be saved.
+        stream (bool): If True, serialize and write one manager at a time instead of building
+                       the dictionaries of the whole department first.
+        compact (bool): If True, write the JSON without indentation or extra whitespace.
+        atomic (bool): If True, write to a temporary file and rename it over filename once
+                       complete, so a failed save never leaves a truncated file behind.
+        index (bool): If True, also save the byte offset of every manager next to the file
+                      (see lazy_json), so load_employees(lazy=True) does not have to scan it.
 
         This method serializes the department's managers and their teams into a JSON file,
         which can be reloaded later.
         """
         try:
-            with open(filename, 'w') as file:
-                # Serialize all managers and their teams into the file in JSON format
-                json.dump([manager.to_dict() for manager in self.managers], file, indent=4)
+            # Lazily loaded managers are built before their file may be overwritten
+            managers = list(self.managers)
+            opener = atomic_write(filename) if atomic else open(filename, 'w')
+            offsets = (array('q'), array('q')) if index else None
+            with instrumentation.timed('serialization.save'), opener as file:
+                if stream or index:
+                    write_json_array(file, (manager.to_dict() for manager in managers), compact, offsets=offsets)
+                elif compact:
+                    json.dump([manager.to_dict() for manager in managers], file, separators=(',', ':'))
+                else:
+                    # Serialize all managers and their teams into the file in JSON format
+                    json.dump([manager.to_dict() for manager in managers], file, indent=4)
+                if instrumentation.enabled:
+                    instrumentation.increment('serialization.bytes_written', file.tell())
+            if index:
+                save_offsets(filename, offsets)
         except Exception as e:
             print(f"Error saving employees: {e}")
 
-    def load_employees(self, filename):
+    def save_snapshot(self, filename):
+        """
+        Save the department to a compact binary snapshot file.
+
+        Args:
+        filename (str): The name of the file to which the snapshot will be saved.
+
+        The snapshot stores every name once in a string table and every employee as fixed-width
+        numeric columns; see models.snapshot for the layout.
+        """
+        try:
+            write_snapshot(self.to_columns(), filename)
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+
+    def load_snapshot(self, filename, use_mmap=True, trusted=True):
+        """
+        Load a binary snapshot file and populate the department with managers and their teams.
+
+        Args:
+        filename (str): The name of the snapshot file.
+        use_mmap (bool): If True, memory-map the file instead of reading it into memory.
+        trusted (bool): If True (snapshots are written by this package), skip re-validating
+                        every employee.
+        """
+        try:
+            for manager in build_from_columns(read_snapshot(filename, use_mmap), trusted):
+                self.add_manager(manager)
+        except FileNotFoundError:
+            print(f"Error loading snapshot: File '{filename}' not found.")
+        except (SnapshotFormatError, BulkValidationError) as e:
+            print(f"Error loading snapshot: {e}")
+
+    def load_csv(self, filename, chunk_size=csv_import.DEFAULT_CHUNK_SIZE, columns=None):
+        """
+        Import a flat CSV export (one row per employee with a manager id) into the department.
+
+        Invalid rows are skipped; see csv_import.import_csv.
+
+        Args:
+        filename (str): The name of the CSV file.
+        chunk_size (int): The number of rows validated and built at a time.
+        columns (dict, optional): Logical column -> header, for exports with other headers.
+
+        Returns:
+        list: (line, message) pairs for every rejected row.
+        """
+        try:
+            result = csv_import.import_csv(filename, chunk_size, columns)
+        except FileNotFoundError:
+            print(f"Error loading CSV: File '{filename}' not found.")
+            return []
+        for manager in result.managers:
+            self.add_manager(manager)
+        return result.errors
+
+    def iter_employees(self, filename, chunk_size=DEFAULT_CHUNK_SIZE, progress=None, trusted=False):
+        """
+        Stream the managers saved in a JSON file one at a time.
+
+        Only the manager currently being parsed is held in memory, so files of any size can be
+        processed. The department itself is not modified.
+
+        Args:
+        filename (str): The name of the file from which employee data will be loaded.
+        chunk_size (int): The number of bytes read from the file at a time.
+        progress (callable, optional): Called as progress(managers_loaded, bytes_read)
+                                       after every manager.
+        trusted (bool): If True, skip re-validating employees, e.g. for files written by
+                        save_employees.
+
+        Yields:
+        Manager: The re-created managers with their (possibly nested) teams.
+        """
+        with open(filename, 'rb') as file:
+            for manager_data in iter_json_array(file, chunk_size, progress):
+                yield build_from_records([manager_data], trusted)[0]
+
+    def load_employees(self, filename, stream=False, progress=None, trusted=False, lazy=False,
+                       use_index_file=True, save_index=False):
         """
         Load employee data from a JSON file and populate the department with managers and their teams.
 
         Args:
         filename (str): The name of the file from which employee data will be loaded.
+        stream (bool): If True, parse the managers one at a time instead of loading the whole
+                       JSON document at once.
+        progress (callable, optional): In streaming mode, called as
+                                       progress(managers_loaded, bytes_read) after every manager.
+        trusted (bool): If True, skip re-validating employees, e.g. for files written by
+                        save_employees.
+        lazy (bool): If True, only index the byte range of every manager (see lazy_json); each
+                     manager and its team are parsed and built when first accessed through
+                     self.managers. Lookups only find employees of managers built so far.
+        use_index_file (bool): In lazy mode, use the offset index saved next to the file (see
+                               save_employees) if it is current; otherwise the file is scanned.
+        save_index (bool): In lazy mode, save the offsets found by a scan as the file's index.
 
         This method deserializes employee data from the given JSON file and re-creates the Manager,
-        Designer, and Developer objects as per the saved data.
+        Designer, and Developer objects as per the saved data, including nested managers.
         """
         try:
-            with open(filename, 'r') as file:
-                # Load the JSON data from the file
-                data = json.load(file)
-
-                # Iterate through the data to create manager objects and their team members
-                for manager_data in data:
-                    team = []
-                    for member_data in manager_data['team']:
-                        # Check if the team member is a Designer (has 'eff_coeff')
-                        if 'eff_coeff' in member_data:
-                            team.append(Designer(**member_data))
-                        else:
-                            # Check if the team member is another Manager (has 'team')
-                            if 'team' in member_data:
-                                team.append(Manager(**member_data))
-                            else:
-                                # Otherwise, the team member is a Developer
-                                team.append(Developer(**member_data))
-
-                    # Create a Manager object and add to the department
-                    manager = Manager(**manager_data)
-                    self.add_manager(manager)
+            with instrumentation.timed('serialization.load'):
+                self._load_employees(filename, stream, progress, trusted, lazy, use_index_file, save_index)
+            if instrumentation.enabled:
+                instrumentation.increment('serialization.bytes_read', os.path.getsize(filename))
         except FileNotFoundError:
             print(f"Error loading employees: File '{filename}' not found.")
         except json.JSONDecodeError:
             print(f"Error loading employees: Invalid JSON.")
+
+    def _load_employees(self, filename, stream, progress, trusted, lazy, use_index_file, save_index):
+        if lazy:
+            offsets = load_offsets(filename, use_index_file, save_index)
+            if not isinstance(self.managers, LazyManagers):
+                self.managers = LazyManagers(self.managers, on_load=self._index_manager)
+            self.managers.add_file(filename, offsets, trusted)
+            return
+
+        if stream:
+            for manager in self.iter_employees(filename, progress=progress, trusted=trusted):
+                self.add_manager(manager)
+            return
+
+        with open(filename, 'r') as file:
+            # Load the JSON data from the file
+            data = json.load(file)
+
+        # Re-create each manager together with its team members
+        for manager in build_from_records(data, trusted):
+            self.add_manager(manager)
@@ -8,6 +8,8 @@ class Designer(Employee):
     coefficient, and overrides methods to serialize the designer's details into a dictionary.
     """
 
+    __slots__ = ('eff_coeff',)
+
     def __init__(self, first_name, last_name, base_salary, experience, eff_coeff):
         """
         Initialize a Designer instance with an efficiency coefficient and other employee details.
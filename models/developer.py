@@ -7,6 +7,8 @@ class Developer(Employee):
     overridden method to return the developer's attributes in dictionary format.
     """
 
+    __slots__ = ()
+
     def to_dict(self):
         """
         Override the to_dict method to return the Developer's attributes as a
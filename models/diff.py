@@ -0,0 +1,306 @@
+import hashlib
+import json
+
+from .columnar import ROLE_DESIGNER, ROLE_NAMES
+from .designer import Designer
+from .manager import Manager
+from .rules import DEFAULT_SALARY_RULES
+from .snapshot import read_snapshot
+
+ADDED = 'added'
+REMOVED = 'removed'
+MOVED = 'moved'
+CHANGED = 'changed'
+
+_FIELDS = ('base_salary', 'experience', 'eff_coeff')
+
+
+class _Node:
+    """
+    An employee in a diff tree, with the Merkle hash of its subtree.
+    """
+
+    __slots__ = ('first_name', 'last_name', 'role', 'values', 'parent', 'children', 'hash')
+
+    def __init__(self, first_name, last_name, role, values, parent):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.role = role
+        self.values = values  # base_salary, experience and eff_coeff (None unless a Designer), as floats
+        self.parent = parent
+        self.children = []
+        self.hash = None
+
+    @property
+    def key(self):
+        return self.first_name, self.last_name
+
+    @property
+    def name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    def salary(self, rules):
+        base_salary, experience, eff_coeff = self.values
+        if self.role == 'Manager':
+            developers = sum(1 for child in self.children if child.role == 'Developer')
+            return rules.manager_salary(base_salary, experience, len(self.children), developers)
+        if self.role == 'Designer':
+            return rules.designer_salary(base_salary, experience, eff_coeff)
+        return rules.employee_salary(base_salary, experience)
+
+
+def _values(base_salary, experience, eff_coeff):
+    # Numbers are compared as floats, so 1000 in a JSON file equals 1000.0 in a binary snapshot
+    return float(base_salary), float(experience), None if eff_coeff is None else float(eff_coeff)
+
+
+def _hash_tree(root):
+    # Post-order: a node's hash covers its own content and the hashes of its team, in order
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        stack.extend(node.children)
+    for node in reversed(order):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{node.first_name}\0{node.last_name}\0{node.role}\0{node.values!r}".encode('utf-8'))
+        for child in node.children:
+            digest.update(child.hash)
+        node.hash = digest.digest()
+    return root
+
+
+def _tree_from_department(department):
+    root = _Node(None, None, None, None, None)
+    stack = [(manager, root) for manager in reversed(department.managers)]
+    while stack:
+        employee, parent = stack.pop()
+        eff_coeff = employee.eff_coeff if isinstance(employee, Designer) else None
+        node = _Node(employee.first_name, employee.last_name, type(employee).__name__,
+                     _values(employee.base_salary, employee.experience, eff_coeff), parent)
+        parent.children.append(node)
+        if isinstance(employee, Manager):
+            stack.extend((member, node) for member in reversed(employee.team))
+    return _hash_tree(root)
+
+
+def _tree_from_dicts(elements):
+    # Roles are inferred like build_from_records does
+    root = _Node(None, None, None, None, None)
+    stack = [(data, root) for data in reversed(elements)]
+    while stack:
+        data, parent = stack.pop()
+        manager = 'team' in data or parent is root
+        role = 'Designer' if 'eff_coeff' in data else ('Manager' if manager else 'Developer')
+        node = _Node(data['first_name'], data['last_name'], role,
+                     _values(data['base_salary'], data['experience'], data.get('eff_coeff')), parent)
+        parent.children.append(node)
+        stack.extend((member, node) for member in reversed(data.get('team') or []))
+    return _hash_tree(root)
+
+
+def _tree_from_columns(columns):
+    root = _Node(None, None, None, None, None)
+    nodes = []
+    rows = zip(columns.first_names, columns.last_names, columns.role, columns.base_salary,
+               columns.experience, columns.eff_coeff, columns.manager_index)
+    for first_name, last_name, role, base_salary, experience, eff_coeff, parent in rows:
+        parent = nodes[parent] if parent >= 0 else root
+        node = _Node(first_name, last_name, ROLE_NAMES[role],
+                     _values(base_salary, experience, eff_coeff if role == ROLE_DESIGNER else None), parent)
+        parent.children.append(node)
+        nodes.append(node)
+    return _hash_tree(root)
+
+
+def _tree(source):
+    # A Department, a JSON file written by save_employees, or a binary snapshot file
+    if not isinstance(source, str):
+        return _tree_from_department(source)
+    if source.endswith('.json'):
+        with open(source, 'r') as file:
+            return _tree_from_dicts(json.load(file))
+    return _tree_from_columns(read_snapshot(source, use_mmap=False))
+
+
+class EmployeeChange:
+    """
+    One difference between two versions of a department.
+
+    Attributes:
+    kind (str): ADDED, REMOVED, MOVED (possibly with changed fields) or CHANGED (fields or,
+                for a manager whose team changed, only the salary).
+    first_name, last_name, role (str): The employee (role in the new version, if present).
+    old_manager, new_manager (str): The full names of the managers, None at the top level or
+                                    when the employee is absent from that version.
+    fields (dict): field -> (old value, new value) for every changed field.
+    old_salary, new_salary (float): The salaries, 0 when the employee is absent.
+    """
+
+    __slots__ = ('kind', 'first_name', 'last_name', 'role', 'old_manager', 'new_manager',
+                 'fields', 'old_salary', 'new_salary')
+
+    def __init__(self, kind, old, new, rules):
+        node = new if new is not None else old
+        self.kind = kind
+        self.first_name = node.first_name
+        self.last_name = node.last_name
+        self.role = node.role
+        self.old_manager = old.parent.name if old is not None and old.parent.key != (None, None) else None
+        self.new_manager = new.parent.name if new is not None and new.parent.key != (None, None) else None
+        self.fields = {}
+        if old is not None and new is not None:
+            if old.role != new.role:
+                self.fields['role'] = (old.role, new.role)
+            for field, before, after in zip(_FIELDS, old.values, new.values):
+                if before != after:
+                    self.fields[field] = (before, after)
+        self.old_salary = old.salary(rules) if old is not None else 0
+        self.new_salary = new.salary(rules) if new is not None else 0
+
+    @property
+    def name(self):
+        """
+        str: The full name of the employee.
+        """
+        return f"{self.first_name} {self.last_name}"
+
+    @property
+    def salary_delta(self):
+        """
+        float: The change of the employee's salary.
+        """
+        return self.new_salary - self.old_salary
+
+    def to_dict(self):
+        """
+        Convert the change into a dictionary representation.
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class DepartmentDiff:
+    """
+    The differences between two versions of a department.
+
+    Attributes:
+    changes (list): The EmployeeChange objects.
+    compared (int): The number of employees whose subtrees were compared; identical subtrees
+                    are skipped, so it grows with the size of the change. It does not count
+                    the hashing, which covers every employee of both versions.
+    """
+
+    def __init__(self, changes, compared):
+        self.changes = changes
+        self.compared = compared
+
+    def __bool__(self):
+        return bool(self.changes)
+
+    def _of_kind(self, kind):
+        return [change for change in self.changes if change.kind == kind]
+
+    @property
+    def added(self):
+        return self._of_kind(ADDED)
+
+    @property
+    def removed(self):
+        return self._of_kind(REMOVED)
+
+    @property
+    def moved(self):
+        return self._of_kind(MOVED)
+
+    @property
+    def changed(self):
+        return self._of_kind(CHANGED)
+
+    @property
+    def salary_delta(self):
+        """
+        float: The change of the total payroll (every employee whose salary changed is reported).
+        """
+        return sum(change.salary_delta for change in self.changes)
+
+
+def _subtree(nodes):
+    # Every node of the given subtrees, depth first
+    result = []
+    stack = list(reversed(nodes))
+    while stack:
+        node = stack.pop()
+        result.append(node)
+        stack.extend(reversed(node.children))
+    return result
+
+
+def diff_departments(old, new, rules=None):
+    """
+    Compare two versions of a department.
+
+    Each version is a Department, a JSON file written by save_employees or a binary snapshot
+    file. Every employee and every manager's subtree gets a content hash (Merkle style), and
+    only subtrees whose hashes differ are descended into. Employees are identified by name;
+    employees sharing a name are paired in order of appearance.
+
+    The diff is not incremental: both versions are fully loaded and hashed on every call, which
+    is O(n) in the size of the organization. Only the comparison walk and the EmployeeChange
+    objects are limited to the changed subtrees.
+
+    Args:
+    old: The earlier version.
+    new: The later version.
+    rules (SalaryRules, optional): The salary rules for the salary deltas; defaults to the
+                                   rules of calculate_salary.
+
+    Returns:
+    DepartmentDiff: The added, removed, moved and changed employees.
+    """
+    rules = rules or DEFAULT_SALARY_RULES
+    changes = []
+    unmatched_old, unmatched_new = [], []
+    compared = 0
+
+    # Walk both trees together, skipping identical subtrees
+    stack = [(_tree(old), _tree(new))]
+    while stack:
+        old_node, new_node = stack.pop()
+        if old_node.hash == new_node.hash:
+            continue
+        compared += 1
+        if old_node.parent is not None:
+            change = EmployeeChange(CHANGED, old_node, new_node, rules)
+            if change.fields or change.salary_delta:
+                changes.append(change)
+
+        candidates = {}
+        for child in new_node.children:
+            candidates.setdefault(child.key, []).append(child)
+        for child in old_node.children:
+            matches = candidates.get(child.key)
+            if matches:
+                stack.append((child, matches.pop(0)))
+            else:
+                unmatched_old.append(child)
+        unmatched_new.extend(child for matches in candidates.values() for child in matches)
+
+    # Employees that left their team: pair them by name across the whole organization
+    new_by_key = {}
+    for node in _subtree(unmatched_new):
+        new_by_key.setdefault(node.key, []).append(node)
+    for node in _subtree(unmatched_old):
+        compared += 1
+        matches = new_by_key.get(node.key)
+        if not matches:
+            changes.append(EmployeeChange(REMOVED, node, None, rules))
+            continue
+        other = matches.pop(0)
+        kind = MOVED if node.parent.key != other.parent.key else CHANGED
+        change = EmployeeChange(kind, node, other, rules)
+        if kind == MOVED or change.fields or change.salary_delta:
+            changes.append(change)
+    for matches in new_by_key.values():
+        changes.extend(EmployeeChange(ADDED, None, node, rules) for node in matches)
+    return DepartmentDiff(changes, compared)
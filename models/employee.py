@@ -1,9 +1,17 @@
+import sys
+
+
 class Employee:
     """
     A class representing an Employee with basic attributes and methods to
     calculate the salary based on years of experience.
+
+    The class hierarchy uses __slots__ instead of a per-instance __dict__, and names are
+    interned, so employees sharing a name also share a single string object.
     """
 
+    __slots__ = ('first_name', 'last_name', 'base_salary', 'experience')
+
     def __init__(self, first_name, last_name, base_salary, experience):
         """
         Initialize an Employee instance with the following attributes:
@@ -30,8 +38,8 @@ class Employee:
         if experience < 0:
             raise ValueError("Experience must be a non-negative number.")
 
-        self.first_name = first_name
-        self.last_name = last_name
+        self.first_name = sys.intern(first_name)
+        self.last_name = sys.intern(last_name)
         self.base_salary = base_salary
         self.experience = experience
 
@@ -0,0 +1,265 @@
+import gc
+import sys
+from collections import Counter
+from contextlib import contextmanager
+
+from . import instrumentation
+from .columnar import ROLE_DESIGNER, ROLE_DEVELOPER, ROLE_MANAGER
+from .designer import Designer
+from .developer import Developer
+from .employee import Employee
+from .manager import Manager
+from .team import Team
+
+ROLE_CLASSES = {
+    'Employee': Employee,
+    'Developer': Developer,
+    'Designer': Designer,
+    'Manager': Manager,
+}
+
+_CODE_CLASSES = {
+    ROLE_DEVELOPER: Developer,
+    ROLE_DESIGNER: Designer,
+    ROLE_MANAGER: Manager,
+}
+
+
+class BulkValidationError(ValueError):
+    """
+    Raised when rows of a bulk construction are invalid.
+
+    Attributes:
+    errors (list): (row, message) pairs for every failed check, in row order.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        details = "; ".join(f"row {row}: {message}" for row, message in errors[:10])
+        more = f" (and {len(errors) - 10} more)" if len(errors) > 10 else ""
+        super().__init__(f"{len(errors)} invalid value(s): {details}{more}")
+
+
+def _fail(errors):
+    if instrumentation.enabled:
+        instrumentation.increment('validation.failures', len(errors))
+    raise BulkValidationError(errors)
+
+
+@contextmanager
+def gc_paused():
+    """
+    Pause the garbage collector while many long-lived objects are created.
+
+    Every batch of new objects triggers a collection that rescans all objects alive so far;
+    objects that are built to be kept are never garbage, so these passes are wasted.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def validate_columns(first_names, last_names, base_salaries, experiences, eff_coeffs=None, designers=None):
+    """
+    Run the Employee and Designer constructor checks over whole columns at once.
+
+    Args:
+    first_names, last_names, base_salaries, experiences (sequence): The columns to check.
+    eff_coeffs (sequence, optional): The efficiency coefficients (ignored for non-designers).
+    designers (sequence, optional): Whether each row is a Designer.
+
+    Returns:
+    list: (row, message) pairs for every failed check, sorted by row. The messages are those
+          raised by the constructors.
+    """
+    errors = []
+    errors += [(row, "First name must be a non-empty string containing only alphabetic characters.")
+               for row, name in enumerate(first_names) if not isinstance(name, str) or not name.isalpha()]
+    errors += [(row, "Last name must be a non-empty string containing only alphabetic characters.")
+               for row, name in enumerate(last_names) if not isinstance(name, str) or not name.isalpha()]
+    errors += [(row, "Base salary must be a positive number.")
+               for row, salary in enumerate(base_salaries) if not _is_number(salary) or salary <= 0]
+    errors += [(row, "Experience must be a non-negative number.")
+               for row, experience in enumerate(experiences) if not _is_number(experience) or experience < 0]
+    if designers is not None:
+        for row, (designer, eff_coeff) in enumerate(zip(designers, eff_coeffs)):
+            if not designer:
+                continue
+            if eff_coeff is None:
+                errors.append((row, "Efficiency coefficient must be provided."))
+            elif not _is_number(eff_coeff) or not (0 <= eff_coeff <= 1):
+                errors.append((row, "Efficiency coefficient must be between 0 and 1."))
+    errors.sort(key=lambda error: error[0])
+    return errors
+
+
+def new_employee(cls, first_name, last_name, base_salary, experience, eff_coeff=None, team=None):
+    """
+    Create an employee object without running the constructor validation.
+
+    Only use this for values that are already known to be valid, e.g. checked with
+    validate_columns or read back from a file written by this package.
+
+    Args:
+    cls (type): Employee, Developer, Designer or Manager.
+    first_name, last_name, base_salary, experience: The employee's details.
+    eff_coeff (float, optional): The efficiency coefficient of a Designer.
+    team (list, optional): The team members of a Manager.
+
+    Returns:
+    Employee: The new object.
+    """
+    employee = cls.__new__(cls)
+    if issubclass(cls, Manager):
+        employee._listeners = []
+    employee.first_name = sys.intern(first_name)
+    employee.last_name = sys.intern(last_name)
+    employee.base_salary = base_salary
+    employee.experience = experience
+    if issubclass(cls, Designer):
+        employee.eff_coeff = eff_coeff
+    if issubclass(cls, Manager):
+        members = team or []
+        employee._team = Team.trusted(members, employee)
+        employee._developer_count = sum(1 for member in members if isinstance(member, Developer))
+        employee._salary = None
+    return employee
+
+
+def _record_class(record, top_level):
+    # The class named by a 'role' key (None if unknown), or inferred from the keys like
+    # employee_from_dict does; top-level records are managers even without a 'team'
+    role = record.get('role')
+    if role is not None:
+        return ROLE_CLASSES.get(role)
+    if 'eff_coeff' in record:
+        return Designer
+    if 'team' in record or top_level:
+        return Manager
+    return Developer
+
+
+def build_from_records(records, trusted=False):
+    """
+    Build many employees from records in the to_dict format.
+
+    Records may carry a 'role' key (a class name); otherwise the role is inferred from the
+    keys, and top-level records without an 'eff_coeff' are Managers. Manager records may nest their team as records under 'team'. Rows are numbered in
+    depth-first order (a manager before its team members), starting at 0.
+
+    Args:
+    records (iterable): The employee records.
+    trusted (bool): If True, skip validation, e.g. for data written by this package.
+
+    Returns:
+    list: The employees built from the top-level records.
+
+    Raises:
+    BulkValidationError: If any row is invalid; every failure is reported.
+    """
+    # Flatten the records depth-first: (record, class, row of the manager or -1)
+    rows = []
+    role_errors = []
+    stack = [(record, -1) for record in reversed(list(records))]
+    while stack:
+        record, parent = stack.pop()
+        cls = _record_class(record, parent < 0)
+        if cls is None:
+            role_errors.append((len(rows), f"Unknown role '{record['role']}'."))
+            cls = Manager if 'team' in record else Employee  # Keep numbering the rows below it
+        rows.append((record, cls, parent))
+        if cls is Manager:
+            row = len(rows) - 1
+            stack.extend((member, row) for member in reversed(record.get('team') or []))
+
+    if role_errors and trusted:
+        _fail(role_errors)
+    if not trusted:
+        errors = validate_columns(
+            [record.get('first_name') for record, _, _ in rows],
+            [record.get('last_name') for record, _, _ in rows],
+            [record.get('base_salary') for record, _, _ in rows],
+            [record.get('experience') for record, _, _ in rows],
+            [record.get('eff_coeff') for record, _, _ in rows],
+            [cls is Designer for _, cls, _ in rows])
+        if errors or role_errors:
+            _fail(sorted(role_errors + errors, key=lambda error: error[0]))
+
+    return _assemble([(cls, record['first_name'], record['last_name'], record['base_salary'],
+                       record['experience'], record.get('eff_coeff'), parent)
+                      for record, cls, parent in rows])
+
+
+def _restore_number(value):
+    # Columns store numbers as floats; whole numbers are given back as int, as they are usually written
+    return int(value) if value.is_integer() else value
+
+
+def build_from_columns(columns, trusted=False):
+    """
+    Build the employees of department columns (e.g. read from a binary snapshot).
+
+    Whole-number salaries and experience are restored as int.
+
+    Args:
+    columns (DepartmentColumns): The columns to build from.
+    trusted (bool): If True, skip validation, e.g. for a snapshot written by this package.
+
+    Returns:
+    list: The top-level Manager objects with their (possibly nested) teams.
+
+    Raises:
+    BulkValidationError: If any row is invalid; every failure is reported.
+    """
+    first_names = list(columns.first_names)
+    last_names = list(columns.last_names)
+    base_salaries = [_restore_number(value) for value in columns.base_salary]
+    experiences = [_restore_number(value) for value in columns.experience]
+    if not trusted:
+        errors = validate_columns(first_names, last_names, base_salaries, experiences,
+                                  columns.eff_coeff, [role == ROLE_DESIGNER for role in columns.role])
+        if errors:
+            _fail(errors)
+
+    return _assemble([(_CODE_CLASSES.get(role, Employee), first_name, last_name, base_salary, experience,
+                       eff_coeff, parent)
+                      for first_name, last_name, base_salary, experience, eff_coeff, role, parent
+                      in zip(first_names, last_names, base_salaries, experiences, columns.eff_coeff,
+                             columns.role, columns.manager_index)])
+
+
+def _assemble(rows):
+    """
+    Create the objects of depth-first rows and attach every row to its manager's team.
+
+    Args:
+    rows (list): (class, first_name, last_name, base_salary, experience, eff_coeff, parent row)
+                 tuples; a parent row of -1 marks a top-level employee.
+
+    Returns:
+    list: The top-level employees.
+    """
+    # Collect every manager's members first, so each team is created once
+    teams = {}
+    for row, (_, _, _, _, _, _, parent) in enumerate(rows):
+        if parent >= 0:
+            teams.setdefault(parent, []).append(row)
+
+    objects = [None] * len(rows)
+    # Team members come after their manager, so build from the last row backwards
+    for row in range(len(rows) - 1, -1, -1):
+        cls, first_name, last_name, base_salary, experience, eff_coeff, _ = rows[row]
+        team = [objects[member] for member in teams.get(row, ())]
+        objects[row] = new_employee(cls, first_name, last_name, base_salary, experience, eff_coeff, team)
+    if instrumentation.enabled:
+        for cls, count in Counter(row[0] for row in rows).items():
+            instrumentation.increment('objects.' + cls.__name__, count)
+    return [objects[row] for row, (*_, parent) in enumerate(rows) if parent < 0]
@@ -0,0 +1,169 @@
+from .manager import Manager
+
+# Experience tiers, matching the thresholds of Employee.calculate_salary
+SENIOR = 'senior'
+MIDDLE = 'middle'
+JUNIOR = 'junior'
+
+
+def experience_tier(experience):
+    """
+    Return the experience tier of a number of years of experience.
+
+    Args:
+    experience (int): The number of years of experience.
+
+    Returns:
+    str: SENIOR for more than 5 years, MIDDLE for more than 2 years, JUNIOR otherwise.
+    """
+    if experience > 5:
+        return SENIOR
+    if experience > 2:
+        return MIDDLE
+    return JUNIOR
+
+
+class DepartmentIndex:
+    """
+    Hash indexes over every employee of a Department, including nested teams.
+
+    Employees are indexed by (first_name, last_name), by role (class name) and by experience
+    tier, and every employee's manager is recorded. The index registers itself as a listener
+    of every indexed Manager, so team changes are reflected incrementally.
+    """
+
+    def __init__(self):
+        """
+        Initialize empty indexes.
+        """
+        self._employees = {}  # id -> employee
+        self._keys = {}       # id -> (name, role, tier) under which the employee is indexed
+        self._parent = {}     # id -> manager whose team the employee belongs to (None at top level)
+        self._by_name = {}
+        self._by_role = {}
+        self._by_tier = {}
+
+    def __len__(self):
+        return len(self._employees)
+
+    def __contains__(self, employee):
+        return id(employee) in self._employees
+
+    def _insert(self, employee):
+        key = id(employee)
+        keys = ((employee.first_name, employee.last_name), type(employee).__name__,
+                experience_tier(employee.experience))
+        for index, value in zip((self._by_name, self._by_role, self._by_tier), keys):
+            index.setdefault(value, {})[key] = employee
+        self._keys[key] = keys
+
+    def _discard(self, employee):
+        key = id(employee)
+        for index, value in zip((self._by_name, self._by_role, self._by_tier), self._keys.pop(key)):
+            bucket = index[value]
+            del bucket[key]
+            if not bucket:
+                del index[value]
+
+    def _add_subtree(self, root, parent):
+        stack = [(root, parent)]
+        while stack:
+            employee, manager = stack.pop()
+            key = id(employee)
+            self._parent[key] = manager
+            if key in self._employees:
+                # Already indexed (moved between teams); only its manager changes
+                continue
+            self._employees[key] = employee
+            self._insert(employee)
+            if isinstance(employee, Manager):
+                employee.add_listener(self)
+                # Lazily stored teams are indexed when they are loaded (through members_added)
+                stack.extend((member, employee) for member in employee.loaded_team)
+
+    def _remove_subtree(self, root):
+        stack = [root]
+        while stack:
+            employee = stack.pop()
+            key = id(employee)
+            if key not in self._employees:
+                continue
+            del self._employees[key]
+            del self._parent[key]
+            self._discard(employee)
+            if isinstance(employee, Manager):
+                employee.remove_listener(self)
+                stack.extend(employee.loaded_team)
+
+    def add_manager(self, manager):
+        """
+        Index a top-level manager and everyone in its team.
+
+        Args:
+        manager (Manager): The manager added to the department.
+        """
+        self._add_subtree(manager, None)
+
+    def remove_manager(self, manager):
+        """
+        Forget a top-level manager and everyone in its team.
+
+        Args:
+        manager (Manager): The manager removed from the department.
+        """
+        self._remove_subtree(manager)
+
+    def members_added(self, manager, members):
+        """
+        Index members added to the team of an indexed manager.
+        """
+        for member in members:
+            self._add_subtree(member, manager)
+
+    def members_removed(self, manager, members):
+        """
+        Forget members removed from the team of an indexed manager.
+
+        Members that have meanwhile been added to another indexed team are kept.
+        """
+        for member in members:
+            if self._parent.get(id(member)) is manager:
+                self._remove_subtree(member)
+
+    def reindex(self, employee):
+        """
+        Update the indexes after an employee's name or experience changed.
+
+        Args:
+        employee (Employee): The indexed employee that changed.
+        """
+        self._discard(employee)
+        self._insert(employee)
+
+    def find(self, first_name, last_name):
+        """
+        Return the employees with the given name.
+        """
+        return list(self._by_name.get((first_name, last_name), {}).values())
+
+    def by_role(self, role):
+        """
+        Return the employees of a role, given as a class (e.g. Designer) or a class name.
+        """
+        name = role if isinstance(role, str) else role.__name__
+        return list(self._by_role.get(name, {}).values())
+
+    def by_tier(self, tier):
+        """
+        Return the employees of an experience tier (SENIOR, MIDDLE or JUNIOR).
+        """
+        return list(self._by_tier.get(tier, {}).values())
+
+    def manager_of(self, employee):
+        """
+        Return the Manager whose team the employee belongs to, or None for top-level managers.
+
+        Raises:
+        KeyError: If the employee is not indexed.
+        """
+        return self._parent[id(employee)]
@@ -0,0 +1,237 @@
+"""
+Counters and timing histograms for the payroll and persistence hot paths.
+
+Instrumentation is off by default. The hooks in Department and the bulk factory only check the
+module-level enabled flag (once per operation, not per employee), so the cost when disabled is
+a single attribute lookup.
+
+    from models import instrumentation
+
+    instrumentation.enable()
+    department.give_salary()
+    print(instrumentation.stats())
+
+Names used by the hooks:
+
+- salary.<Role>: salary computations per role (counter and timing)
+- payroll.give_salary, payroll.pipeline, serialization.save, serialization.load: operation timings
+- serialization.bytes_written, serialization.bytes_read: bytes written and read as JSON
+- objects.<Role>: employee objects constructed by the loaders
+- validation.failures: invalid values found while loading
+"""
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+# Read by the hooks; change it with enable() and disable()
+enabled = False
+
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+_NULL_CONTEXT = nullcontext()
+
+
+class Histogram:
+    """
+    A timing histogram with power-of-two microsecond buckets.
+
+    Bucket b counts the durations below 2**b microseconds that did not fit in bucket b - 1;
+    bucket 0 holds everything below one microsecond.
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.buckets = {}
+
+    def add(self, seconds):
+        """
+        Record one duration, in seconds.
+        """
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def to_dict(self):
+        """
+        Return the histogram as a dictionary; bucket keys are their upper bounds in microseconds.
+        """
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'min': self.min,
+            'max': self.max,
+            'buckets': {2 ** bucket: count for bucket, count in sorted(self.buckets.items())},
+        }
+
+
+def enable():
+    """
+    Start collecting counters and timings.
+    """
+    global enabled
+    enabled = True
+
+
+def disable():
+    """
+    Stop collecting; the values collected so far are kept until reset().
+    """
+    global enabled
+    enabled = False
+
+
+def reset():
+    """
+    Forget all collected counters and timings.
+    """
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+
+
+def increment(name, amount=1):
+    """
+    Add amount to a counter.
+    """
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def observe(name, seconds):
+    """
+    Record a duration, in seconds, in a timing histogram.
+    """
+    with _lock:
+        histogram = _timings.get(name)
+        if histogram is None:
+            histogram = _timings[name] = Histogram()
+        histogram.add(seconds)
+
+
+@contextmanager
+def _timer(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """
+    Return a context manager that records the duration of its block under name.
+
+    When instrumentation is disabled, a shared no-op context manager is returned.
+    """
+    return _timer(name) if enabled else _NULL_CONTEXT
+
+
+def instrument_salary(calculate):
+    """
+    Wrap a salary function (employee -> salary) so that every call is counted and timed per role.
+    """
+    clock = time.perf_counter
+
+    def instrumented(employee):
+        start = clock()
+        salary = calculate(employee)
+        name = 'salary.' + type(employee).__name__
+        increment(name)
+        observe(name, clock() - start)
+        return salary
+
+    return instrumented
+
+
+def stats():
+    """
+    Return a copy of the collected values.
+
+    Returns:
+    dict: {'counters': {name: value}, 'timings': {name: histogram dictionary}}.
+    """
+    with _lock:
+        return {
+            'counters': dict(_counters),
+            'timings': {name: histogram.to_dict() for name, histogram in _timings.items()},
+        }
+
+
+class Capture:
+    """
+    The results of a capture() block.
+
+    Attributes:
+    profile (pstats.Stats): The cProfile statistics, or None if profiling was not requested.
+    peak_memory (int): The peak number of bytes allocated, or None if memory was not traced.
+    memory_snapshot (tracemalloc.Snapshot): The allocations alive at the end of the block.
+    """
+
+    def __init__(self):
+        self.profile = None
+        self.peak_memory = None
+        self.memory_snapshot = None
+
+    def report(self, limit=20):
+        """
+        Return the slowest functions (by cumulative time) and the largest allocation sites as text.
+        """
+        output = io.StringIO()
+        if self.profile is not None:
+            self.profile.stream = output
+            self.profile.sort_stats('cumulative').print_stats(limit)
+        if self.memory_snapshot is not None:
+            output.write(f"Peak memory: {self.peak_memory} bytes\n")
+            for statistic in self.memory_snapshot.statistics('lineno')[:limit]:
+                output.write(f"{statistic}\n")
+        return output.getvalue()
+
+
+@contextmanager
+def capture(profile=True, memory=False):
+    """
+    Profile a block with cProfile and/or trace its allocations with tracemalloc.
+
+    Counters and timings are collected during the block as well.
+
+    Args:
+    profile (bool): If True, run the block under cProfile.
+    memory (bool): If True, trace the memory allocated by the block.
+
+    Yields:
+    Capture: Filled in when the block exits.
+    """
+    result = Capture()
+    was_enabled = enabled
+    enable()
+    profiler = cProfile.Profile() if profile else None
+    if memory:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield result
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            result.profile = pstats.Stats(profiler)
+        if memory:
+            result.peak_memory = tracemalloc.get_traced_memory()[1]
+            result.memory_snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+        if not was_enabled:
+            disable()
@@ -0,0 +1,227 @@
+import json
+import mmap
+import os
+import re
+from array import array
+from collections.abc import MutableSequence
+
+from .factory import build_from_records
+from .serialization import atomic_write
+
+# Suffix of the offset index saved next to a JSON file
+INDEX_SUFFIX = '.idx'
+
+# A whole JSON string (brackets inside strings are skipped with it) or a single bracket
+_TOKENS = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]', re.S)
+
+_QUOTE, _OPEN_ARRAY, _OPEN_OBJECT, _CLOSE_OBJECT = b'"[{}'
+
+
+def _stamp(filename):
+    # Identifies the version of a file without reading it
+    status = os.stat(filename)
+    return status.st_size, status.st_mtime_ns
+
+
+def scan_offsets(filename):
+    """
+    Find the byte range of every element of the top-level JSON array of a file.
+
+    The file is memory-mapped and scanned for brackets outside of strings; no element is parsed.
+
+    Args:
+    filename (str): A JSON file written by Department.save_employees.
+
+    Returns:
+    tuple: Two arrays (starts, ends); element i is data[starts[i]:ends[i]].
+
+    Raises:
+    json.JSONDecodeError: If the file is not a JSON array of objects, or is truncated.
+    """
+    starts, ends = array('q'), array('q')
+    with open(filename, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            raise json.JSONDecodeError("Expecting '['", "", 0)
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            first = re.compile(rb'\s*').match(data).end()
+            if data[first:first + 1] != b'[':
+                raise json.JSONDecodeError("Expecting '['", "", first)
+            depth = 0
+            for match in _TOKENS.finditer(data, first):
+                position = match.start()
+                char = data[position]
+                if char == _QUOTE:
+                    continue
+                if char == _OPEN_ARRAY or char == _OPEN_OBJECT:
+                    depth += 1
+                    if depth == 2 and char == _OPEN_OBJECT:
+                        starts.append(position)
+                else:
+                    if depth == 2 and char == _CLOSE_OBJECT:
+                        ends.append(position + 1)
+                    depth -= 1
+                    if depth == 0:
+                        break
+            if depth != 0 or len(starts) != len(ends):
+                raise json.JSONDecodeError("Unterminated array", "", len(data))
+    return starts, ends
+
+
+def save_offsets(filename, offsets):
+    """
+    Save the element offsets of a JSON file next to it (filename + INDEX_SUFFIX).
+
+    The index records the file's size and modification time, so it is ignored once the file
+    changes. Call it after the file has been written and closed.
+
+    Args:
+    filename (str): The JSON file.
+    offsets (tuple): Two arrays (starts, ends), e.g. collected by write_json_array.
+    """
+    starts, ends = offsets
+    with atomic_write(filename + INDEX_SUFFIX) as file:
+        json.dump({'stamp': list(_stamp(filename)), 'starts': starts.tolist(), 'ends': ends.tolist()}, file)
+
+
+def load_offsets(filename, use_index_file=True, save_index=False):
+    """
+    Return the element offsets of a JSON file, using a saved offset index when it is current.
+
+    Without a current index, the whole file is scanned, which costs about as much as parsing
+    it; save the file with Department.save_employees(index=True) to write the index instead.
+
+    Args:
+    filename (str): A JSON file written by Department.save_employees.
+    use_index_file (bool): If False, ignore any saved index and always scan the file.
+    save_index (bool): If True, save the offsets found by a scan as the file's index.
+
+    Returns:
+    tuple: Two arrays (starts, ends), as returned by scan_offsets.
+    """
+    index_filename = filename + INDEX_SUFFIX
+    stamp = list(_stamp(filename))
+    if use_index_file and os.path.exists(index_filename):
+        try:
+            with open(index_filename, 'r') as file:
+                index = json.load(file)
+            if index.get('stamp') == stamp:
+                return array('q', index['starts']), array('q', index['ends'])
+        except (ValueError, KeyError, TypeError):
+            pass  # A damaged index is scanned again
+
+    offsets = scan_offsets(filename)
+    if save_index:
+        try:
+            save_offsets(filename, offsets)
+        except OSError:
+            pass  # The index is only a cache; e.g. the directory may be read-only
+    return offsets
+
+
+class _Pending:
+    """
+    A manager that is still in its JSON file.
+    """
+
+    __slots__ = ('filename', 'stamp', 'start', 'end', 'trusted')
+
+    def __init__(self, filename, stamp, start, end, trusted):
+        self.filename = filename
+        self.stamp = stamp
+        self.start = start
+        self.end = end
+        self.trusted = trusted
+
+
+class LazyManagers(MutableSequence):
+    """
+    The managers of a Department, where managers loaded lazily from a JSON file are only
+    parsed and built (with their teams) when they are first accessed.
+
+    It behaves like a list of managers. Iterating over it builds every manager; loaded()
+    returns only the managers that exist as objects.
+    """
+
+    def __init__(self, managers=(), on_load=None):
+        """
+        Initialize the sequence.
+
+        Args:
+        managers (iterable): Managers that already exist as objects.
+        on_load (callable, optional): Called with every manager built from the file,
+                                      e.g. to index it.
+        """
+        self._items = list(managers)
+        self._on_load = on_load
+
+    def add_file(self, filename, offsets, trusted=False):
+        """
+        Append the managers of a JSON file without reading them.
+
+        Args:
+        filename (str): The JSON file.
+        offsets (tuple): (starts, ends) of its managers, from load_offsets.
+        trusted (bool): If True, skip re-validating the managers when they are built.
+        """
+        stamp = _stamp(filename)
+        self._items.extend(_Pending(filename, stamp, start, end, trusted) for start, end in zip(*offsets))
+
+    def _build(self, index):
+        pending = self._items[index]
+        if _stamp(pending.filename) != pending.stamp:
+            raise ValueError(f"'{pending.filename}' has changed since it was loaded lazily.")
+        with open(pending.filename, 'rb') as file:
+            file.seek(pending.start)
+            data = json.loads(file.read(pending.end - pending.start))
+        manager = build_from_records([data], pending.trusted)[0]
+        self._items[index] = manager
+        if self._on_load is not None:
+            self._on_load(manager)
+        return manager
+
+    def __len__(self):
+        return len(self._items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[position] for position in range(*index.indices(len(self._items)))]
+        item = self._items[index]
+        if isinstance(item, _Pending):
+            item = self._build(index)
+        return item
+
+    def __setitem__(self, index, manager):
+        self._items[index] = manager
+
+    def __delitem__(self, index):
+        del self._items[index]
+
+    def insert(self, index, manager):
+        self._items.insert(index, manager)
+
+    def __iter__(self):
+        for position in range(len(self._items)):
+            yield self[position]
+
+    def __repr__(self):
+        return f"<LazyManagers {len(self.loaded())} of {len(self._items)} loaded>"
+
+    def remove(self, manager):
+        # Only a built manager can be the given object, so pending entries are not built
+        for position, item in enumerate(self._items):
+            if item is manager:
+                del self._items[position]
+                return
+        raise ValueError("Manager is not part of the department.")
+
+    def loaded(self):
+        """
+        Return the managers that have been built, without building any others.
+        """
+        return [item for item in self._items if not isinstance(item, _Pending)]
+
+    def pending_count(self):
+        """
+        Return the number of managers that have not been built yet.
+        """
+        return sum(1 for item in self._items if isinstance(item, _Pending))
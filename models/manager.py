@@ -1,5 +1,6 @@
 from .developer import Developer
 from .employee import Employee
+from .team import Team
 
 
 class Manager(Employee):
@@ -7,8 +8,17 @@ class Manager(Employee):
     A class representing a Manager, inheriting from the Employee class.
     This class includes logic for calculating a manager's salary based on their team's size,
     the number of developers in the team, and applies a salary increase based on these factors.
+
+    The number of developers in the team is kept as a running counter that the Team updates
+    on every change, and the calculated salary is cached until the team, base_salary or
+    experience changes.
     """
 
+    __slots__ = ('_team', '_developer_count', '_salary', '_listeners')
+
+    # Attributes whose change invalidates the cached salary
+    _SALARY_FIELDS = frozenset(('base_salary', 'experience'))
+
     def __init__(self, first_name, last_name, base_salary, experience, team=None):
         """
         Initialize a Manager instance with a team and additional employee details.
@@ -22,17 +32,119 @@ class Manager(Employee):
 
         """
 
+        # Objects notified about team changes (see add_listener)
+        self._listeners = []
+
         # Initialize the parent Employee class with the basic details
         super().__init__(first_name, last_name, base_salary, experience)
 
-        # Validating Team Members in Manager
-        if team is not None:
-            if not all(isinstance(member, Employee) for member in team):
-                raise ValueError("All team members must be instances of Employee (or subclass).")
-
-        # Set the manager's team (defaults to an empty list if no team is provided)
+        # Set the manager's team (defaults to an empty list if no team is provided);
+        # the Team validates that every member is an Employee
         self.team = team or []
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self._SALARY_FIELDS:
+            super().__setattr__('_salary', None)
+
+    def __reduce__(self):
+        # Re-create the manager through the constructor so the team is re-attached
+        return type(self), (self.first_name, self.last_name, self.base_salary, self.experience, list(self.team))
+
+    @property
+    def team(self):
+        """
+        Team: The members of the manager's team.
+        """
+        return self._team
+
+    @team.setter
+    def team(self, members):
+        previous = getattr(self, '_team', None)
+        if members is previous:
+            # manager.team += [...] assigns the Team back after it has already notified the listeners
+            return
+        self._team = Team(members, owner=self)
+        self._developer_count = sum(1 for member in self._team if isinstance(member, Developer))
+        self._salary = None
+        for listener in getattr(self, '_listeners', ()):
+            if previous:
+                listener.members_removed(self, list(previous))
+            if self._team:
+                listener.members_added(self, list(self._team))
+
+    @property
+    def loaded_team(self):
+        """
+        list: The team members currently in memory, without loading a lazily stored team.
+
+        For a regular Manager this is the team itself.
+        """
+        return self._team
+
+    @property
+    def developer_count(self):
+        """
+        int: The number of Developers in the manager's team.
+        """
+        return self._developer_count
+
+    def add_team_member(self, member):
+        """
+        Add a member to the manager's team.
+
+        Args:
+        member (Employee): The employee to add.
+
+        Raises:
+        ValueError: If the member is not an instance of Employee (or subclass).
+        """
+        self._team.append(member)
+
+    def remove_team_member(self, member):
+        """
+        Remove a member from the manager's team.
+
+        Args:
+        member (Employee): The employee to remove.
+
+        Raises:
+        ValueError: If the member is not in the team.
+        """
+        self._team.remove(member)
+
+    def add_listener(self, listener):
+        """
+        Register an object to be notified about changes to the manager's team.
+
+        The listener's members_added(manager, members) and members_removed(manager, members)
+        methods are called after members are added to or removed from the team.
+
+        Args:
+        listener: The object to notify.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Stop notifying a listener registered with add_listener.
+        """
+        self._listeners.remove(listener)
+
+    def _members_added(self, members):
+        # Called by the Team after members were added
+        self._developer_count += sum(1 for member in members if isinstance(member, Developer))
+        self._salary = None
+        for listener in self._listeners:
+            listener.members_added(self, members)
+
+    def _members_removed(self, members):
+        # Called by the Team after members were removed
+        self._developer_count -= sum(1 for member in members if isinstance(member, Developer))
+        self._salary = None
+        for listener in self._listeners:
+            listener.members_removed(self, members)
+
     def calculate_salary(self):
         """
         Calculate the manager's salary based on various factors:
@@ -40,27 +152,31 @@ class Manager(Employee):
         - An increase if the team size is greater than 5 or 10.
         - A bonus if more than half of the team are developers.
 
+        The result is cached until the team, base_salary or experience changes.
+
         Returns:
         float: The final salary of the manager, after all bonuses and adjustments.
         """
+        if self._salary is not None:
+            return self._salary
+
         # Start with the base salary calculated by the Employee class
         salary = super().calculate_salary()
 
         # Adjust salary based on team size
-        if len(self.team) > 10:
+        team_size = len(self.team)
+        if team_size > 10:
             salary += 300  # Add 300 if team size is greater than 10
-        elif len(self.team) > 5:
+        elif team_size > 5:
             salary += 200  # Add 200 if team size is between 6 and 10
 
-        # Count the number of Developers in the team
-        num_developers = sum(1 for member in self.team if isinstance(member, Developer))
-
         # If more than half of the team are Developers, increase the salary by 10%
-        if len(self.team) > 1 and num_developers > len(self.team) / 2:
+        if team_size > 1 and self._developer_count > team_size / 2:
             salary *= 1.1  # Apply 10% bonus for a majority of Developers in the team
 
-        # Return the final rounded salary
-        return round(salary)
+        # Cache and return the final rounded salary
+        self._salary = round(salary)
+        return self._salary
 
     def to_dict(self):
         """
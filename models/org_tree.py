@@ -0,0 +1,171 @@
+from .manager import Manager
+
+
+class PayrollTree:
+    """
+    A tree-aware payroll of a Department.
+
+    The tree follows Manager.team through any number of nested managers and stores, for every
+    employee, its salary and, for every subtree, the total salary and headcount. The tree is
+    walked iteratively, so deep manager chains do not hit the recursion limit.
+
+    Aggregates are memoized: after an employee changes, update(employee) recomputes only that
+    employee and the managers on the path up to the department.
+    """
+
+    def __init__(self, department):
+        """
+        Build the payroll tree of a department.
+
+        Args:
+        department (Department): The department whose managers are the roots of the tree.
+
+        Raises:
+        ValueError: If an employee appears more than once in the organization.
+        """
+        self.department = department
+        self._employees = {}   # id -> employee
+        self._parent = {}      # id -> manager whose team the employee belongs to (None for roots)
+        self._children = {}    # id -> ids of the team members (managers only)
+        self._salary = {}      # id -> salary of the employee
+        self._total = {}       # id -> total salary of the subtree rooted at the employee
+        self._headcount = {}   # id -> number of employees in the subtree, including its root
+        self._roots = []
+        for manager in department.managers:
+            self._build(manager, None)
+            self._roots.append(id(manager))
+
+    def _build(self, root, parent):
+        # Register the subtree rooted at root; children are aggregated before their managers
+        order = []
+        stack = [(root, parent)]
+        while stack:
+            employee, manager = stack.pop()
+            key = id(employee)
+            if key in self._employees:
+                raise ValueError(f"{employee.first_name} {employee.last_name} appears more than once in the organization.")
+            self._employees[key] = employee
+            self._parent[key] = manager
+            order.append(employee)
+            if isinstance(employee, Manager):
+                self._children[key] = [id(member) for member in employee.team]
+                stack.extend((member, employee) for member in employee.team)
+
+        for employee in reversed(order):
+            self._aggregate(employee)
+
+    def _aggregate(self, employee):
+        # Recompute the salary and the subtree aggregates of a single employee
+        key = id(employee)
+        salary = employee.calculate_salary()
+        children = self._children.get(key, ())
+        self._salary[key] = salary
+        self._total[key] = salary + sum(self._total[child] for child in children)
+        self._headcount[key] = 1 + sum(self._headcount[child] for child in children)
+
+    def _remove(self, root):
+        # Forget the subtree rooted at root
+        stack = [id(root)]
+        while stack:
+            key = stack.pop()
+            stack.extend(self._children.pop(key, ()))
+            for mapping in (self._employees, self._parent, self._salary, self._total, self._headcount):
+                del mapping[key]
+
+    def _key(self, employee):
+        key = id(employee)
+        if key not in self._employees:
+            raise ValueError(f"{employee.first_name} {employee.last_name} is not part of the payroll tree.")
+        return key
+
+    def update(self, employee):
+        """
+        Recompute the payroll after an employee has changed.
+
+        Only the employee and its managers up to the department are recomputed. If the employee
+        is a Manager, members added to or removed from its team are picked up as well; members
+        moved from another team are detached from their previous manager.
+
+        Args:
+        employee (Employee): The employee that changed.
+
+        Raises:
+        ValueError: If the employee is not part of the tree.
+        """
+        key = self._key(employee)
+        changed = [employee]
+        if isinstance(employee, Manager):
+            current = {id(member): member for member in employee.team}
+            recorded = set(self._children[key])
+            for child in recorded - current.keys():
+                self._remove(self._employees[child])
+            for child, member in current.items():
+                if child in recorded:
+                    continue
+                if child in self._employees:
+                    # The member moved here from another team; detach it from its old manager
+                    previous = self._parent[child]
+                    if previous is None:
+                        self._roots.remove(child)
+                    else:
+                        self._children[id(previous)].remove(child)
+                        changed.append(previous)
+                    self._parent[child] = employee
+                else:
+                    self._build(member, employee)
+            self._children[key] = list(current)
+
+        # Recompute the changed employees and every manager on their paths to the root
+        for employee in changed:
+            while employee is not None:
+                self._aggregate(employee)
+                employee = self._parent[id(employee)]
+
+    def salary(self, employee):
+        """
+        Return the salary of an employee.
+        """
+        return self._salary[self._key(employee)]
+
+    def subtree_total(self, employee):
+        """
+        Return the total salary of an employee and everyone below them.
+        """
+        return self._total[self._key(employee)]
+
+    def subtree_headcount(self, employee):
+        """
+        Return the number of employees in the subtree of an employee, including the employee.
+        """
+        return self._headcount[self._key(employee)]
+
+    def manager_of(self, employee):
+        """
+        Return the Manager whose team the employee belongs to, or None for top-level managers.
+        """
+        return self._parent[self._key(employee)]
+
+    def total(self):
+        """
+        Return the total salary of the department.
+        """
+        return sum(self._total[root] for root in self._roots)
+
+    def headcount(self):
+        """
+        Return the number of employees in the department.
+        """
+        return sum(self._headcount[root] for root in self._roots)
+
+    def salaries(self):
+        """
+        Iterate over every employee and their salary, depth-first (manager before its team).
+
+        Yields:
+        tuple: (employee, salary) pairs.
+        """
+        stack = list(reversed(self._roots))
+        while stack:
+            key = stack.pop()
+            yield self._employees[key], self._salary[key]
+            stack.extend(reversed(self._children.get(key, ())))
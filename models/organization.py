@@ -0,0 +1,233 @@
+import os
+
+from .columnar import ROLE_NAMES
+from .department import Department
+from .parallel import map_in_workers
+from .serialization import atomic_write, iter_json_array, write_json_array
+from .snapshot import _columns_from_dicts, read_snapshot, write_snapshot
+
+# Shard file formats and their file name suffixes
+SHARD_FORMATS = {'snapshot': '.snap', 'json': '.json'}
+
+
+class PayrollStats:
+    """
+    Headcount and salary statistics, in total and per role, that can be merged.
+
+    Attributes:
+    headcount (int): The number of employees.
+    total (float): The sum of their salaries.
+    roles (dict): Role name -> {'headcount', 'total', 'min', 'max'}.
+    """
+
+    def __init__(self):
+        self.headcount = 0
+        self.total = 0
+        self.roles = {}
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        Calculate the statistics of every row of department columns, nested teams included.
+        """
+        stats = cls()
+        for role, salary in zip(columns.role, columns.calculate_salaries()):
+            stats.add(ROLE_NAMES[role], salary)
+        return stats
+
+    def add(self, role, salary):
+        """
+        Count one employee of a role with the given salary.
+        """
+        self.headcount += 1
+        self.total += salary
+        entry = self.roles.get(role)
+        if entry is None:
+            self.roles[role] = {'headcount': 1, 'total': salary, 'min': salary, 'max': salary}
+        else:
+            entry['headcount'] += 1
+            entry['total'] += salary
+            entry['min'] = min(entry['min'], salary)
+            entry['max'] = max(entry['max'], salary)
+
+    def merge(self, other):
+        """
+        Add the statistics of another PayrollStats to this one.
+
+        Returns:
+        PayrollStats: This object.
+        """
+        self.headcount += other.headcount
+        self.total += other.total
+        for role, theirs in other.roles.items():
+            entry = self.roles.get(role)
+            if entry is None:
+                self.roles[role] = dict(theirs)
+            else:
+                entry['headcount'] += theirs['headcount']
+                entry['total'] += theirs['total']
+                entry['min'] = min(entry['min'], theirs['min'])
+                entry['max'] = max(entry['max'], theirs['max'])
+        return self
+
+    def mean(self, role=None):
+        """
+        Return the mean salary of all employees or of one role (0 if there are none).
+        """
+        headcount, total = (self.headcount, self.total) if role is None else (
+            self.roles.get(role, {}).get('headcount', 0), self.roles.get(role, {}).get('total', 0))
+        return total / headcount if headcount else 0
+
+    def to_dict(self):
+        """
+        Convert the statistics into a dictionary representation.
+        """
+        return {'headcount': self.headcount, 'total': self.total,
+                'roles': {role: dict(entry) for role, entry in self.roles.items()}}
+
+
+def _shard_stats(filename):
+    """
+    Load one shard file and calculate its payroll statistics in a worker.
+
+    Only columns are built; no employee objects are created.
+    """
+    if filename.endswith(SHARD_FORMATS['json']):
+        with open(filename, 'rb') as file:
+            columns = _columns_from_dicts(iter_json_array(file))
+    else:
+        columns = read_snapshot(filename, use_mmap=False)
+    return PayrollStats.from_columns(columns)
+
+
+class Organization:
+    """
+    Many named Departments, each persisted as its own shard file in a directory.
+
+    Departments are loaded only when they are accessed. Payroll statistics are computed per
+    shard in parallel worker processes and then merged, so adding departments adds shards to
+    spread over the cores instead of growing a single file.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialize an organization stored in a directory.
+
+        Args:
+        directory (str): The directory holding the shard files; it is created on save.
+        """
+        self.directory = directory
+        self.departments = {}  # The departments loaded or added in memory
+
+    @staticmethod
+    def _check_name(name):
+        if not name or name.startswith('.') or os.sep in name or (os.altsep and os.altsep in name):
+            raise ValueError(f"Invalid department name '{name}'.")
+
+    def shard_filename(self, name, format='snapshot'):
+        """
+        Return the shard file of a department in the given format ('snapshot' or 'json').
+        """
+        self._check_name(name)
+        return os.path.join(self.directory, name + SHARD_FORMATS[format])
+
+    def _existing_shard(self, name):
+        # A snapshot shard takes precedence over a JSON shard of the same department
+        for format in SHARD_FORMATS:
+            filename = self.shard_filename(name, format)
+            if os.path.exists(filename):
+                return filename
+        return None
+
+    def names(self):
+        """
+        Return the names of all departments, in memory or stored, sorted.
+        """
+        names = set(self.departments)
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                name, suffix = os.path.splitext(filename)
+                if suffix in SHARD_FORMATS.values() and not name.startswith('.'):
+                    names.add(name)
+        return sorted(names)
+
+    def add_department(self, name, department):
+        """
+        Add (or replace) a department; it is written to its shard file by save().
+        """
+        self._check_name(name)
+        self.departments[name] = department
+
+    def department(self, name):
+        """
+        Return a department, loading it from its shard file on first access.
+
+        Raises:
+        KeyError: If there is no department with that name.
+        """
+        if name not in self.departments:
+            filename = self._existing_shard(name)
+            if filename is None:
+                raise KeyError(name)
+            department = Department()
+            if filename.endswith(SHARD_FORMATS['json']):
+                department.load_employees(filename, trusted=True)
+            else:
+                department.load_snapshot(filename)
+            self.departments[name] = department
+        return self.departments[name]
+
+    def save(self, format='snapshot'):
+        """
+        Write every department held in memory to its shard file.
+
+        Departments that were never loaded keep their existing shard files. Every shard is
+        replaced atomically, and a shard in the other format is only removed once the new one
+        is in place, so a failed save leaves the previous shard untouched.
+
+        Args:
+        format (str): 'snapshot' (binary, the default) or 'json'.
+
+        Raises:
+        OverflowError, ValueError, OSError: If a department cannot be written; the departments
+                                            after it are not saved.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        for name, department in self.departments.items():
+            filename = self.shard_filename(name, format)
+            # Written directly rather than through save_employees/save_snapshot, which only print errors
+            if format == 'json':
+                managers = list(department.managers)
+                with atomic_write(filename) as file:
+                    write_json_array(file, (manager.to_dict() for manager in managers), compact=True)
+            else:
+                write_snapshot(department.to_columns(), filename)
+            # Remove a shard of the same department in the other format, which would now be stale
+            for other in SHARD_FORMATS:
+                stale = self.shard_filename(name, other)
+                if other != format and os.path.exists(stale):
+                    os.remove(stale)
+
+    def payroll(self, workers=None, use_processes=True):
+        """
+        Calculate the payroll statistics of every stored department in parallel.
+
+        Every shard is loaded and calculated in a worker process; only the statistics are
+        sent back and merged. Departments changed in memory must be saved first.
+        Unlike give_salary, the statistics include every employee of nested teams.
+
+        Args:
+        workers (int, optional): The number of worker processes; defaults to the number of CPUs.
+        use_processes (bool): If False, use a thread pool.
+
+        Returns:
+        tuple: (total, by_department) where total is the merged PayrollStats and
+               by_department maps each department name to its PayrollStats.
+        """
+        names = [name for name in self.names() if self._existing_shard(name) is not None]
+        results = map_in_workers(_shard_stats, [self._existing_shard(name) for name in names],
+                                 workers, use_processes)
+        total = PayrollStats()
+        for stats in results:
+            total.merge(stats)
+        return total, dict(zip(names, results))
@@ -0,0 +1,177 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .columnar import DepartmentColumns
+from .snapshot import read_snapshot
+
+# Number of chunks handed to each worker when no chunk size is given
+CHUNKS_PER_WORKER = 4
+
+
+def _chunk_salaries(columns):
+    """
+    Calculate the salaries of one chunk of managers in a worker.
+
+    Only the rows reported by Department.give_salary are returned: the managers and the direct
+    members of their teams. Deeper rows are still part of the calculation, because a nested
+    manager's salary depends on its own team.
+
+    Args:
+    columns (DepartmentColumns): The columns of the chunk's managers.
+
+    Returns:
+    list: The salaries in give_salary order.
+    """
+    salaries = columns.calculate_salaries()
+    parents = columns.manager_index
+    return [salary for salary, parent in zip(salaries, parents)
+            if parent < 0 or parents[parent] < 0]
+
+
+def _chunks(managers, chunk_size):
+    # Split the managers into consecutive chunks of chunk_size
+    return [managers[start:start + chunk_size] for start in range(0, len(managers), chunk_size)]
+
+
+def _columns(chunk):
+    # Columns of a chunk without the object references, which do not need to reach the workers
+    columns = DepartmentColumns.from_managers(chunk)
+    columns.employees = []
+    return columns
+
+
+def map_in_workers(function, items, workers=None, use_processes=True):
+    """
+    Apply a function to every item in a process pool, falling back to a thread pool.
+
+    Args:
+    function (callable): A module-level function, so it can be sent to worker processes.
+    items (iterable): The arguments; they and the results must be picklable.
+    workers (int, optional): The number of workers; defaults to the number of CPUs.
+    use_processes (bool): If False, use a thread pool directly.
+
+    Returns:
+    list: The results, in the order of the items.
+    """
+    items = list(items)
+    workers = workers or os.cpu_count() or 1
+    if use_processes and workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(function, items))
+        except (OSError, NotImplementedError, BrokenProcessPool):
+            # Process pools are unavailable on some platforms; fall back to threads
+            pass
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(function, items))
+
+
+def _range_salaries(task):
+    """
+    Calculate the salaries of a range of rows of a snapshot file in a worker.
+
+    The range starts at a top-level manager and ends before another one (or at the end), so
+    every team in it is complete. The worker maps the file itself; only the file name and the
+    row numbers are sent to it, and only the salaries come back.
+
+    Args:
+    task (tuple): (filename, first row, end row).
+
+    Returns:
+    array: The salaries of the rows, in row order.
+    """
+    filename, start, end = task
+    snapshot = read_snapshot(filename)
+    columns = DepartmentColumns()
+    columns.base_salary = snapshot.base_salary[start:end]
+    columns.experience = snapshot.experience[start:end]
+    columns.eff_coeff = snapshot.eff_coeff[start:end]
+    columns.role = snapshot.role[start:end]
+    columns.manager_index = snapshot.manager_index[start:end]
+    if start:
+        # Manager rows are relative to the range
+        columns.manager_index = array('q', [parent - start if parent >= 0 else -1
+                                            for parent in columns.manager_index])
+    return columns.calculate_salaries()
+
+
+def _row_ranges(manager_index, parts):
+    # Split the rows into about parts ranges, each starting at a top-level manager
+    count = len(manager_index)
+    bounds = [0]
+    for part in range(1, parts):
+        row = max(bounds[-1] + 1, count * part // parts)
+        while row < count and manager_index[row] >= 0:
+            row += 1
+        if row >= count:
+            break
+        bounds.append(row)
+    bounds.append(count)
+    return list(zip(bounds, bounds[1:]))
+
+
+def snapshot_salaries(filename, workers=None, use_processes=True):
+    """
+    Calculate the salary of every row of a snapshot file in parallel.
+
+    The rows are split into ranges of whole top-level teams; each worker memory-maps the file
+    and calculates its range, so nothing but row numbers and salaries crosses the process
+    boundary and the parent does no per-employee work.
+
+    Args:
+    filename (str): A snapshot written by Department.save_snapshot.
+    workers (int, optional): The number of workers; defaults to the number of CPUs.
+    use_processes (bool): If False, use a thread pool directly.
+
+    Returns:
+    array: The salaries of every row, nested teams included, as DepartmentColumns.calculate_salaries
+           returns them for the whole snapshot.
+    """
+    workers = workers or os.cpu_count() or 1
+    manager_index = read_snapshot(filename).manager_index
+    ranges = _row_ranges(manager_index, workers * CHUNKS_PER_WORKER if workers > 1 else 1)
+    salaries = array('d')
+    for chunk in map_in_workers(_range_salaries, [(filename, start, end) for start, end in ranges],
+                                workers, use_processes):
+        salaries.extend(chunk)
+    return salaries
+
+
+def parallel_salaries(department, workers=None, chunk_size=None, use_processes=True):
+    """
+    Calculate the salaries of a department in parallel, chunk by chunk of managers.
+
+    The managers are split into chunks that are converted to columns and calculated in a
+    process pool. If a process pool cannot be used on the platform, a thread pool is used
+    instead. Results are merged in chunk order, so the output is identical to the serial one.
+
+    The objects have to be converted to columns in the parent first, which costs more than
+    calculating them serially, so this cannot beat Department.calculate_salaries. For large
+    departments, save a snapshot and use snapshot_salaries, whose workers read it themselves.
+
+    Args:
+    department (Department): The department whose salaries are calculated.
+    workers (int, optional): The number of workers; defaults to the number of CPUs.
+    chunk_size (int, optional): The number of managers per chunk; defaults to splitting the
+                                managers into CHUNKS_PER_WORKER chunks per worker.
+    use_processes (bool): If False, use a thread pool directly.
+
+    Returns:
+    list: (employee, salary) pairs in give_salary order: each manager followed by its team.
+    """
+    managers = list(department.managers)
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        chunk_size = max(1, -(-len(managers) // (workers * CHUNKS_PER_WORKER)))
+    chunks = _chunks(managers, chunk_size)
+
+    results = map_in_workers(_chunk_salaries, map(_columns, chunks), workers, use_processes)
+
+    # Pair the salaries with the employees in the same order as give_salary
+    pairs = []
+    for chunk, salaries in zip(chunks, results):
+        employees = [employee for manager in chunk for employee in (manager, *manager.team)]
+        pairs.extend(zip(employees, salaries))
+    return pairs
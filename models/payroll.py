@@ -0,0 +1,183 @@
+import csv
+import io
+import json
+import sys
+
+# Number of records buffered by a sink before they are written out
+DEFAULT_BATCH_SIZE = 1000
+
+
+class PayrollRecord:
+    """
+    The result of a payroll calculation for a single employee.
+    """
+
+    __slots__ = ('first_name', 'last_name', 'role', 'salary', 'rounded_salary', 'manager')
+
+    FIELDS = __slots__
+
+    def __init__(self, first_name, last_name, role, salary, manager=None):
+        """
+        Initialize a PayrollRecord.
+
+        Args:
+        first_name (str): The first name of the employee.
+        last_name (str): The last name of the employee.
+        role (str): The class name of the employee (e.g. 'Developer').
+        salary (float): The calculated salary.
+        manager (str, optional): The full name of the employee's manager, None for top-level managers.
+        """
+        self.first_name = first_name
+        self.last_name = last_name
+        self.role = role
+        self.salary = salary
+        self.rounded_salary = round(salary)
+        self.manager = manager
+
+    @classmethod
+    def from_employee(cls, employee, salary, manager=None):
+        """
+        Create a record for an employee object.
+
+        Args:
+        employee (Employee): The employee who is paid.
+        salary (float): The calculated salary of the employee.
+        manager (Manager, optional): The manager whose team the employee belongs to.
+        """
+        manager_name = f"{manager.first_name} {manager.last_name}" if manager is not None else None
+        return cls(employee.first_name, employee.last_name, type(employee).__name__, salary, manager_name)
+
+    @property
+    def name(self):
+        """
+        str: The full name of the employee.
+        """
+        return f"{self.first_name} {self.last_name}"
+
+    def to_dict(self):
+        """
+        Convert the record into a dictionary representation.
+
+        Returns:
+        dict: The fields of the record.
+        """
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __eq__(self, other):
+        if not isinstance(other, PayrollRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return f"PayrollRecord({self.name!r}, {self.role}, {self.salary!r}, manager={self.manager!r})"
+
+
+def manager_records(manager, calculate):
+    """
+    Calculate the salary of a manager and of each member of their team.
+
+    Args:
+    manager (Manager): The manager.
+    calculate (callable): Returns the salary of an employee.
+
+    Yields:
+    PayrollRecord: The manager's record followed by one record per team member.
+    """
+    yield PayrollRecord.from_employee(manager, calculate(manager))
+    for member in manager.team:
+        yield PayrollRecord.from_employee(member, calculate(member), manager)
+
+
+class PayrollSink:
+    """
+    Base class of the payroll outputs.
+
+    Records are formatted as they arrive and written to the file in batches, so the cost of
+    the underlying I/O is paid once per batch instead of once per employee. Subclasses
+    implement format_batch.
+    """
+
+    def __init__(self, file=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Initialize the sink.
+
+        Args:
+        file: A text file object; None writes to the current sys.stdout.
+        batch_size (int): The number of records buffered before they are written.
+        """
+        self.file = file
+        self.batch_size = batch_size
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def format_batch(self, records):
+        """
+        Return the text written for a batch of records.
+        """
+        raise NotImplementedError
+
+    def write(self, record):
+        """
+        Add a record to the sink, writing the batch out once it is full.
+        """
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def write_all(self, records):
+        """
+        Add every record of an iterable to the sink.
+        """
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        """
+        Write out the buffered records.
+        """
+        if self._pending:
+            file = self.file if self.file is not None else sys.stdout
+            file.write(self.format_batch(self._pending))
+            self._pending = []
+
+
+class TextReportSink(PayrollSink):
+    """
+    The human-readable report printed by Department.give_salary, one line per employee.
+    """
+
+    def format_batch(self, records):
+        return ''.join(f"{record.name} received {record.rounded_salary} money.\n" for record in records)
+
+
+class JsonLinesSink(PayrollSink):
+    """
+    Writes one JSON object per record and per line.
+    """
+
+    def format_batch(self, records):
+        return ''.join(json.dumps(record.to_dict()) + '\n' for record in records)
+
+
+class CsvSink(PayrollSink):
+    """
+    Writes the records as CSV, preceded by a header row.
+    """
+
+    def __init__(self, file=None, batch_size=DEFAULT_BATCH_SIZE):
+        super().__init__(file, batch_size)
+        self._header_written = False
+
+    def format_batch(self, records):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if not self._header_written:
+            writer.writerow(PayrollRecord.FIELDS)
+            self._header_written = True
+        writer.writerows([getattr(record, field) for field in PayrollRecord.FIELDS] for record in records)
+        return buffer.getvalue()
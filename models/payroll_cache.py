@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from types import CodeType
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; the cache is then safe only within one process
+    fcntl = None
+
+from . import instrumentation
+from .designer import Designer
+from .employee import Employee
+from .factory import build_from_columns, build_from_records, gc_paused
+from .manager import Manager
+from .payroll import PayrollRecord, TextReportSink, manager_records
+from .serialization import atomic_write, file_digest
+from .snapshot import read_snapshot
+
+# Suffix of the cache entry files
+ENTRY_SUFFIX = '.payroll'
+
+DEFAULT_MAX_BYTES = 256 * 2 ** 20
+
+
+def _hash_code(code, digest):
+    # The instructions, constants and names of a function, nested functions included
+    digest.update(code.co_code)
+    digest.update(repr(code.co_names).encode('utf-8'))
+    for constant in code.co_consts:
+        if isinstance(constant, CodeType):
+            _hash_code(constant, digest)
+        elif isinstance(constant, frozenset):
+            # Set constants are printed in hash order, which changes from one process to the next
+            digest.update(repr(sorted(constant, key=repr)).encode('utf-8'))
+        else:
+            digest.update(repr(constant).encode('utf-8'))
+
+
+def _methods_version():
+    # Derived from the code of the salary methods, so editing them invalidates the cached payroll
+    digest = hashlib.sha256()
+    for function in (Employee.calculate_salary, Designer.calculate_salary, Manager.calculate_salary):
+        _hash_code(function.__code__, digest)
+    return digest.hexdigest()
+
+
+# The version of the calculate_salary methods, used when no SalaryRules are given
+METHODS_VERSION = _methods_version()
+
+
+def _stamp(filename):
+    status = os.stat(filename)
+    return status.st_size, status.st_mtime_ns
+
+
+def _calculate_records(filename, rules):
+    # The records of give_salary for the department saved in a snapshot (or a '.json' file)
+    if filename.endswith('.json'):
+        with open(filename, 'r') as file:
+            managers = build_from_records(json.load(file), trusted=True)
+    else:
+        managers = build_from_columns(read_snapshot(filename, use_mmap=False), trusted=True)
+    calculate = rules.calculate if rules is not None else (lambda employee: employee.calculate_salary())
+    return [record for manager in managers for record in manager_records(manager, calculate)]
+
+
+class PayrollCache:
+    """
+    A persistent, size-bounded cache of payroll results on disk.
+
+    Results are keyed by the SHA-256 digest of the department file's content and the version
+    of the salary rules (or of the calculate_salary code, when no rules are given), so an
+    unchanged file is never recalculated, whatever its name or modification time. Each result is one file in the cache directory; when the directory
+    grows beyond max_bytes, the least recently used entries are removed.
+
+    Several processes can share a directory: entries are written atomically, and writes and
+    evictions are serialized with a lock file.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Initialize a cache stored in a directory.
+
+        Args:
+        directory (str): The cache directory; it is created if needed.
+        max_bytes (int): The largest total size of the cache entries.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._digests = {}  # Absolute file name -> (size and mtime, digest), to hash unchanged files once
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, filename, rules=None):
+        """
+        Return the cache key of a department file under a rule set.
+
+        Args:
+        filename (str): The snapshot (or '.json') file of the department.
+        rules (SalaryRules, optional): The salary rules; None for the calculate_salary methods.
+
+        Returns:
+        str: The hexadecimal key.
+        """
+        path = os.path.abspath(filename)
+        stamp = _stamp(path)
+        known = self._digests.get(path)
+        if known is None or known[0] != stamp:
+            known = self._digests[path] = (stamp, file_digest(path))
+        version = rules.version if rules is not None else METHODS_VERSION
+        return hashlib.sha256(f"{known[1]}:{version}".encode('utf-8')).hexdigest()
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key + ENTRY_SUFFIX)
+
+    @contextmanager
+    def _locked(self):
+        # An exclusive lock on a file in the cache directory, shared by every process
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def get(self, key):
+        """
+        Return the cached records of a key, or None if there are none.
+
+        A hit marks the entry as recently used.
+        """
+        entry = self._entry(key)
+        with gc_paused():
+            try:
+                # Entries are replaced atomically, and an entry removed while it is open stays readable
+                with open(entry, 'r') as file:
+                    rows = json.load(file)
+                os.utime(entry)
+            except (OSError, ValueError):
+                return None
+            return [PayrollRecord(*row) for row in rows]
+
+    def put(self, key, records):
+        """
+        Store the records of a key, then evict the least recently used entries beyond max_bytes.
+        """
+        rows = [[record.first_name, record.last_name, record.role, record.salary, record.manager]
+                for record in records]
+        with self._locked():
+            with atomic_write(self._entry(key)) as file:
+                json.dump(rows, file, separators=(',', ':'))
+            self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(ENTRY_SUFFIX) and not name.startswith('.'):
+                try:
+                    status = os.stat(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    continue
+                entries.append((status.st_mtime_ns, status.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def payroll(self, filename, rules=None):
+        """
+        Return the records of give_salary for a department file, from the cache if possible.
+
+        On a miss, the department is loaded and calculated, and the result is stored.
+
+        Args:
+        filename (str): The snapshot (or '.json') file of the department.
+        rules (SalaryRules, optional): The salary rules to apply instead of calculate_salary.
+
+        Returns:
+        list: The PayrollRecord objects.
+        """
+        key = self.key(filename, rules)
+        records = self.get(key)
+        if records is not None:
+            if instrumentation.enabled:
+                instrumentation.increment('payroll_cache.hits')
+            return records
+        if instrumentation.enabled:
+            instrumentation.increment('payroll_cache.misses')
+        with gc_paused():
+            records = _calculate_records(filename, rules)
+        self.put(key, records)
+        return records
+
+    def give_salary(self, filename, sink=None, rules=None):
+        """
+        Report the salaries of a department file like Department.give_salary, using the cache.
+        """
+        sink = sink or TextReportSink()
+        sink.write_all(self.payroll(filename, rules))
+        sink.flush()
+
+    def clear(self):
+        """
+        Remove every cache entry.
+        """
+        with self._locked():
+            for name in os.listdir(self.directory):
+                if name.endswith(ENTRY_SUFFIX):
+                    os.remove(os.path.join(self.directory, name))
@@ -0,0 +1,171 @@
+"""
+An asyncio payroll pipeline: load -> compute -> fan out to several sinks.
+
+    results = asyncio.run(run_payroll_pipeline("employees.json", [CsvSink(csv_file), JsonLinesSink(log)]))
+
+Each stage runs as its own task, connected by bounded queues. A slow sink fills its queue and
+then holds back the computation (and the computation holds back the loader), so memory stays
+bounded. Parsing, salary calculation and the sinks' writes run in worker threads, a batch of
+managers per thread hop, so the event loop only moves batches between the queues.
+"""
+import asyncio
+from itertools import islice
+
+from . import instrumentation
+from .factory import build_from_records
+from .payroll import DEFAULT_BATCH_SIZE, manager_records
+from .serialization import DEFAULT_CHUNK_SIZE, iter_json_array
+
+# Default number of batches a queue holds before its producer waits
+DEFAULT_QUEUE_SIZE = 8
+
+# Default number of managers loaded and calculated per worker thread hop
+DEFAULT_MANAGER_BATCH_SIZE = 256
+
+# Marks the end of a queue
+_DONE = object()
+
+
+class AsyncSink:
+    """
+    Adapts a PayrollSink to the pipeline by running its blocking writes in a worker thread.
+
+    Any object with the coroutine methods write_batch(records) and flush() can be used as a
+    pipeline sink; PayrollSink objects are wrapped in an AsyncSink automatically.
+    """
+
+    def __init__(self, sink):
+        """
+        Args:
+        sink (PayrollSink): The synchronous sink to write to.
+        """
+        self.sink = sink
+
+    async def write_batch(self, records):
+        """
+        Write a batch of records.
+        """
+        await asyncio.to_thread(self.sink.write_all, records)
+
+    async def flush(self):
+        """
+        Write out anything the sink still buffers.
+        """
+        await asyncio.to_thread(self.sink.flush)
+
+
+def _as_async_sink(sink):
+    return sink if hasattr(sink, 'write_batch') else AsyncSink(sink)
+
+
+def _manager_source(source, trusted, chunk_size):
+    # A filename is streamed with the incremental JSON parser; anything else is an iterable of managers
+    if not isinstance(source, str):
+        return iter(source)
+
+    def managers():
+        with open(source, 'rb') as file:
+            for manager_data in iter_json_array(file, chunk_size):
+                yield build_from_records([manager_data], trusted)[0]
+
+    return managers()
+
+
+async def _load(managers, queue, department, manager_batch_size):
+    # Reading and parsing the file runs in a worker thread, one batch of managers per hop
+    while True:
+        batch = await asyncio.to_thread(list, islice(managers, manager_batch_size))
+        if not batch:
+            break
+        if department is not None:
+            for manager in batch:
+                department.add_manager(manager)
+        await queue.put(batch)
+    await queue.put(_DONE)
+
+
+def _batch_records(managers, calculate):
+    # The records of a batch of managers with their salary total, calculated in a worker thread
+    records = [record for manager in managers for record in manager_records(manager, calculate)]
+    return records, sum(record.salary for record in records)
+
+
+async def _compute(queue, sink_queues, calculate, batch_size, totals):
+    async def publish(batch):
+        # Every sink receives every batch; a full sink queue holds back the computation
+        for sink_queue in sink_queues:
+            await sink_queue.put(batch)
+
+    pending = []
+    while True:
+        managers = await queue.get()
+        if managers is _DONE:
+            break
+        records, salary = await asyncio.to_thread(_batch_records, managers, calculate)
+        totals['records'] += len(records)
+        totals['salary'] += salary
+        pending.extend(records)
+        while len(pending) >= batch_size:
+            await publish(pending[:batch_size])
+            del pending[:batch_size]
+    if pending:
+        await publish(pending)
+    await publish(_DONE)
+
+
+async def _drain(queue, sink):
+    while True:
+        batch = await queue.get()
+        if batch is _DONE:
+            break
+        await sink.write_batch(batch)
+    await sink.flush()
+
+
+async def run_payroll_pipeline(source, sinks, rules=None, department=None, trusted=False,
+                               queue_size=DEFAULT_QUEUE_SIZE, batch_size=DEFAULT_BATCH_SIZE,
+                               chunk_size=DEFAULT_CHUNK_SIZE, manager_batch_size=DEFAULT_MANAGER_BATCH_SIZE):
+    """
+    Stream managers from a source, calculate their payroll and write it to several sinks concurrently.
+
+    Records are produced in the order of Department.iter_payroll: each manager followed by
+    their team members.
+
+    Args:
+    source (str or iterable): A JSON file written by Department.save_employees, or an iterable
+                              of Manager objects (e.g. department.managers).
+    sinks (list): PayrollSink objects, or async sinks with write_batch and flush coroutines.
+    rules (SalaryRules, optional): The salary rules to apply instead of calculate_salary.
+    department (Department, optional): Loaded managers are also added to this department.
+    trusted (bool): If True, skip re-validating employees loaded from a file.
+    queue_size (int): The capacity of every queue between the stages.
+    batch_size (int): The number of records handed to the sinks at a time.
+    chunk_size (int): The number of bytes read from a source file at a time.
+    manager_batch_size (int): The number of managers loaded and calculated per worker thread hop.
+
+    Returns:
+    dict: {'records': number of records written, 'salary': total salary}.
+
+    Raises:
+    Exception: The first error of any stage; the other stages are cancelled.
+    """
+    calculate = rules.calculate if rules is not None else (lambda employee: employee.calculate_salary())
+    if instrumentation.enabled:
+        calculate = instrumentation.instrument_salary(calculate)
+
+    managers = _manager_source(source, trusted, chunk_size)
+    manager_queue = asyncio.Queue(queue_size)
+    sink_queues = [asyncio.Queue(queue_size) for _ in sinks]
+    totals = {'records': 0, 'salary': 0}
+
+    tasks = [asyncio.create_task(_load(managers, manager_queue, department, manager_batch_size)),
+             asyncio.create_task(_compute(manager_queue, sink_queues, calculate, batch_size, totals))]
+    tasks += [asyncio.create_task(_drain(queue, _as_async_sink(sink))) for queue, sink in zip(sink_queues, sinks)]
+    try:
+        with instrumentation.timed('payroll.pipeline'):
+            await asyncio.gather(*tasks)
+    finally:
+        # After a failure the remaining stages would wait on their queues forever
+        for task in tasks:
+            task.cancel()
+    return totals
@@ -0,0 +1,335 @@
+from .columnar import ROLE_DESIGNER, ROLE_DEVELOPER, ROLE_MANAGER, ROLE_NAMES, DepartmentColumns
+from .factory import BulkValidationError, validate_columns
+from .rules import DEFAULT_SALARY_RULES
+
+_ROLE_CODES = {name: code for code, name in ROLE_NAMES.items()}
+
+# Fields a scenario can change; names do not affect salaries
+SIMULATED_FIELDS = ('base_salary', 'experience', 'eff_coeff')
+
+
+class Simulation:
+    """
+    The baseline payroll of a Department, shared by any number of what-if scenarios.
+
+    The department is converted into columns and its salaries are calculated once. Scenarios
+    only store their own overrides on top of this baseline and recompute the salaries those
+    overrides affect, so evaluating many scenarios never copies the organization.
+
+    The baseline reflects the department when the Simulation was created; create a new one
+    after changing the department.
+    """
+
+    def __init__(self, department, rules=None):
+        """
+        Capture the baseline of a department.
+
+        Args:
+        department (Department): The department to simulate.
+        rules (SalaryRules, optional): The salary rules; defaults to the rules of calculate_salary.
+        """
+        self.rules = rules or DEFAULT_SALARY_RULES
+        self.columns = DepartmentColumns.from_department(department)
+        self.salaries = self.rules.calculate_columns(self.columns)
+        self.team_size, self.developer_count = self.columns.team_counts()
+        self.total = sum(self.salaries)
+        self._rows = {id(employee): row for row, employee in enumerate(self.columns.employees)}
+        self._role_rows = {}
+        self._children = {}
+        for row, (role, parent) in enumerate(zip(self.columns.role, self.columns.manager_index)):
+            self._role_rows.setdefault(role, []).append(row)
+            self._children.setdefault(parent, []).append(row)
+
+    def row(self, employee):
+        """
+        Return the row of an employee of the department.
+
+        Raises:
+        ValueError: If the employee was not part of the department.
+        """
+        try:
+            return self._rows[id(employee)]
+        except KeyError:
+            raise ValueError(f"{employee.first_name} {employee.last_name} is not part of the department.")
+
+    def role_rows(self, role):
+        """
+        Return the rows of a role, given as a class (e.g. Designer) or a class name.
+        """
+        name = role if isinstance(role, str) else role.__name__
+        return self._role_rows.get(_ROLE_CODES[name], [])
+
+    def children(self, row):
+        """
+        Return the rows of the baseline team of the manager at row.
+        """
+        return self._children.get(row, [])
+
+    def scenario(self, name=None):
+        """
+        Start a new scenario without any overrides.
+        """
+        return Scenario(self, name)
+
+    def evaluate_many(self, scenarios):
+        """
+        Evaluate scenarios of this simulation.
+
+        Returns:
+        list: A ScenarioResult per scenario, in order.
+        """
+        return [scenario.evaluate() for scenario in scenarios]
+
+
+class Scenario:
+    """
+    A set of what-if overrides layered copy-on-write on a Simulation's baseline.
+
+    Field changes and team moves are recorded per row; the baseline columns and the
+    department objects are never modified.
+    """
+
+    def __init__(self, simulation, name=None):
+        """
+        Initialize an empty scenario.
+
+        Args:
+        simulation (Simulation): The baseline.
+        name (str, optional): A label for the scenario, copied to its result.
+        """
+        self.simulation = simulation
+        self.name = name
+        self._fields = {}      # row -> {field: value}
+        self._parents = {}     # row -> manager row, for moved employees
+        self._team_delta = {}  # manager row -> [team size change, developer count change]
+
+    def value(self, row, field):
+        """
+        Return the value of a field of a row in this scenario.
+        """
+        overrides = self._fields.get(row)
+        if overrides is not None and field in overrides:
+            return overrides[field]
+        return getattr(self.simulation.columns, field)[row]
+
+    def parent(self, row):
+        """
+        Return the row of the manager of a row in this scenario, or -1 at the top level.
+        """
+        return self._parents.get(row, self.simulation.columns.manager_index[row])
+
+    def _set_values(self, values):
+        # values: {row: {field: value}}; validated together so every invalid row is reported
+        columns = self.simulation.columns
+        for fields in values.values():
+            unknown = set(fields) - set(SIMULATED_FIELDS)
+            if unknown:
+                raise ValueError(f"Cannot simulate fields: {', '.join(sorted(unknown))}.")
+        rows = list(values)
+
+        def column(field):
+            return [values[row].get(field, self.value(row, field)) for row in rows]
+
+        errors = validate_columns([columns.first_names[row] for row in rows],
+                                  [columns.last_names[row] for row in rows],
+                                  column('base_salary'), column('experience'), column('eff_coeff'),
+                                  [columns.role[row] == ROLE_DESIGNER for row in rows])
+        errors = [(rows[index], message) for index, message in errors]
+        errors += [(row, "Only designers have an efficiency coefficient.") for row in rows
+                   if 'eff_coeff' in values[row] and columns.role[row] != ROLE_DESIGNER]
+        if errors:
+            raise BulkValidationError(sorted(errors))
+        for row, fields in values.items():
+            self._fields.setdefault(row, {}).update(fields)
+
+    def set(self, employee, **fields):
+        """
+        Override fields of one employee.
+
+        Args:
+        employee (Employee): An employee of the department.
+        **fields: New values for base_salary, experience or eff_coeff.
+
+        Returns:
+        Scenario: The scenario itself, so overrides can be chained.
+
+        Raises:
+        ValueError: If a field cannot be simulated or a value is invalid.
+        """
+        self._set_values({self.simulation.row(employee): fields})
+        return self
+
+    def adjust(self, role, field, add=0, multiply=1):
+        """
+        Change a field of every employee of a role: value * multiply + add.
+
+        For example, adjust(Designer, 'eff_coeff', add=0.1) raises every designer's efficiency
+        coefficient by 0.1.
+
+        Args:
+        role (type or str): The role, as a class or a class name.
+        field (str): base_salary, experience or eff_coeff.
+        add (float): Added to the (multiplied) value.
+        multiply (float): The factor applied to the value.
+
+        Returns:
+        Scenario: The scenario itself, so overrides can be chained.
+
+        Raises:
+        BulkValidationError: If any adjusted value is invalid; every invalid row is reported.
+        """
+        if field not in SIMULATED_FIELDS:
+            raise ValueError(f"Cannot simulate fields: {field}.")
+        self._set_values({row: {field: self.value(row, field) * multiply + add}
+                          for row in self.simulation.role_rows(role)})
+        return self
+
+    def members(self, manager_row):
+        """
+        Return the rows of the team of the manager at manager_row in this scenario.
+        """
+        members = [row for row in self.simulation.children(manager_row) if row not in self._parents]
+        members += [row for row, parent in self._parents.items() if parent == manager_row]
+        return members
+
+    def _move(self, row, manager_row):
+        old_parent = self.parent(row)
+        if old_parent == manager_row:
+            return
+        # A manager cannot be moved into its own team (or a team below it)
+        ancestor = manager_row
+        while ancestor >= 0:
+            if ancestor == row:
+                raise ValueError("An employee cannot be moved into a team they manage.")
+            ancestor = self.parent(ancestor)
+
+        developer = self.simulation.columns.role[row] == ROLE_DEVELOPER
+        for parent, step in ((old_parent, -1), (manager_row, 1)):
+            if parent >= 0:
+                delta = self._team_delta.setdefault(parent, [0, 0])
+                delta[0] += step
+                delta[1] += step if developer else 0
+        if manager_row == self.simulation.columns.manager_index[row]:
+            del self._parents[row]
+        else:
+            self._parents[row] = manager_row
+
+    def _manager_row(self, manager):
+        row = self.simulation.row(manager)
+        if self.simulation.columns.role[row] != ROLE_MANAGER:
+            raise ValueError(f"{manager.first_name} {manager.last_name} is not a manager.")
+        return row
+
+    def move(self, employee, manager):
+        """
+        Move an employee (with their team, for a manager) into the team of another manager.
+
+        Returns:
+        Scenario: The scenario itself, so overrides can be chained.
+
+        Raises:
+        ValueError: If manager is not a manager of the department, or is managed by employee.
+        """
+        self._move(self.simulation.row(employee), self._manager_row(manager))
+        return self
+
+    def merge(self, managers, into):
+        """
+        Move the team members of several managers into the team of one manager.
+
+        The managers themselves stay where they are, with empty teams.
+
+        Args:
+        managers (iterable): The managers whose teams are merged.
+        into (Manager): The manager receiving the team members.
+
+        Returns:
+        Scenario: The scenario itself, so overrides can be chained.
+        """
+        target = self._manager_row(into)
+        for manager in managers:
+            row = self._manager_row(manager)
+            if row != target:
+                for member in self.members(row):
+                    self._move(member, target)
+        return self
+
+    def _salary(self, row):
+        simulation = self.simulation
+        rules = simulation.rules
+        role = simulation.columns.role[row]
+        base_salary = self.value(row, 'base_salary')
+        experience = self.value(row, 'experience')
+        if role == ROLE_MANAGER:
+            size_change, developer_change = self._team_delta.get(row, (0, 0))
+            return rules.manager_salary(base_salary, experience, simulation.team_size[row] + size_change,
+                                        simulation.developer_count[row] + developer_change)
+        if role == ROLE_DESIGNER:
+            return rules.designer_salary(base_salary, experience, self.value(row, 'eff_coeff'))
+        return rules.employee_salary(base_salary, experience)
+
+    def evaluate(self):
+        """
+        Recompute the salaries affected by the overrides.
+
+        Only employees whose fields changed and managers whose team changed are recalculated.
+
+        Returns:
+        ScenarioResult: The new total and every changed salary.
+        """
+        simulation = self.simulation
+        changes = {}
+        for row in sorted(set(self._fields) | set(self._team_delta)):
+            salary = self._salary(row)
+            if salary != simulation.salaries[row]:
+                changes[row] = salary
+        return ScenarioResult(self.name, simulation, changes)
+
+
+class ScenarioResult:
+    """
+    The payroll of a scenario, relative to its simulation's baseline.
+
+    Attributes:
+    name (str): The scenario's name.
+    base_total (float): The total payroll of the baseline.
+    total (float): The total payroll in the scenario.
+    """
+
+    def __init__(self, name, simulation, changes):
+        """
+        Initialize a result from the changed salaries.
+
+        Args:
+        name (str): The scenario's name.
+        simulation (Simulation): The baseline.
+        changes (dict): row -> new salary, for every salary that changed.
+        """
+        self.name = name
+        self._simulation = simulation
+        self._changes = changes
+        self.base_total = simulation.total
+        self.total = simulation.total + sum(salary - simulation.salaries[row] for row, salary in changes.items())
+
+    @property
+    def delta(self):
+        """
+        float: The change of the total payroll.
+        """
+        return self.total - self.base_total
+
+    @property
+    def changes(self):
+        """
+        list: (employee, baseline salary, scenario salary) for every changed salary, in row order.
+        """
+        employees = self._simulation.columns.employees
+        salaries = self._simulation.salaries
+        return [(employees[row], salaries[row], salary) for row, salary in self._changes.items()]
+
+    def salary(self, employee):
+        """
+        Return the salary of an employee of the department in the scenario.
+        """
+        row = self._simulation.row(employee)
+        return self._changes.get(row, self._simulation.salaries[row])
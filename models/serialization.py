@@ -0,0 +1,271 @@
+import codecs
+import hashlib
+import json
+import os
+import secrets
+import stat
+from contextlib import contextmanager
+
+from .designer import Designer
+from .developer import Developer
+from .factory import build_from_records
+from .manager import Manager
+
+# Default number of bytes read from the file at a time by the streaming loader
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+
+# Indentation used by the pretty-printed JSON format
+INDENT = 4
+
+
+def employee_from_dict(data, trusted=False):
+    """
+    Re-create an employee object from its to_dict representation.
+
+    - A dictionary with an 'eff_coeff' key becomes a Designer.
+    - A dictionary with a 'team' key becomes a Manager whose team members are re-created
+      recursively, so nested managers are rebuilt with their own teams.
+    - Any other dictionary becomes a Developer.
+
+    Args:
+    data (dict): The serialized employee.
+    trusted (bool): If True, skip the constructor validation, e.g. for files written by this
+                    package (see factory.build_from_records).
+
+    Returns:
+    Employee: The re-created Designer, Manager or Developer.
+    """
+    if trusted:
+        return build_from_records([data], trusted=True)[0]
+
+    if 'eff_coeff' in data:
+        return Designer(**data)
+
+    if 'team' in data:
+        fields = dict(data)
+        fields['team'] = [employee_from_dict(member) for member in data['team']]
+        return Manager(**fields)
+
+    return Developer(**data)
+
+
+def iter_json_array(file, chunk_size=DEFAULT_CHUNK_SIZE, progress=None):
+    """
+    Parse the elements of a top-level JSON array one at a time.
+
+    The file is read in chunks and only the element being parsed is kept in memory, so the
+    memory used does not depend on the size of the file.
+
+    Args:
+    file: A file object opened in binary mode and containing UTF-8 encoded JSON.
+    chunk_size (int): The number of bytes to read at a time.
+    progress (callable, optional): Called as progress(elements_parsed, bytes_read) after
+                                   every element.
+
+    Yields:
+    The decoded elements of the array, in order.
+
+    Raises:
+    json.JSONDecodeError: If the file does not contain a valid JSON array.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    position = 0
+    bytes_read = 0
+    eof = False
+    count = 0
+
+    def fill(size=chunk_size):
+        # Read the next chunk and append it to the buffer; returns False at the end of the file
+        nonlocal buffer, position, bytes_read, eof
+        chunk = file.read(size)
+        bytes_read += len(chunk)
+        if not chunk:
+            eof = True
+            buffer = buffer[position:] + text_decoder.decode(b'', final=True)
+            position = 0
+            return False
+        buffer = buffer[position:] + text_decoder.decode(chunk)
+        position = 0
+        return True
+
+    def next_token():
+        # Skip whitespace and return the next character, or '' at the end of the file
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not fill():
+                return ''
+
+    def check_end():
+        # Only whitespace may follow the closing bracket, as with json.load
+        nonlocal position
+        position += 1
+        if next_token() != '':
+            raise json.JSONDecodeError("Extra data", buffer, position)
+
+    if next_token() != '[':
+        raise json.JSONDecodeError("Expecting '['", buffer, position)
+    position += 1
+
+    if next_token() == ']':
+        check_end()
+        return
+
+    while True:
+        if next_token() == '':
+            raise json.JSONDecodeError("Unterminated array", buffer, position)
+
+        # Decode the next element, reading more data until it is complete. The read size doubles
+        # on every retry so that large elements are not re-parsed once per chunk.
+        read_size = chunk_size
+        while True:
+            try:
+                element, end = decoder.raw_decode(buffer, position)
+                # A value ending exactly at the end of the buffer may be truncated (e.g. a number)
+                if end < len(buffer) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill(read_size)
+            read_size *= 2
+
+        position = end
+        count += 1
+        if progress is not None:
+            progress(count, bytes_read)
+        yield element
+
+        token = next_token()
+        if token == ']':
+            check_end()
+            return
+        position += 1
+        if token != ',':
+            raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position - 1)
+
+
+def write_json_array(file, elements, compact=False, chunk_size=DEFAULT_CHUNK_SIZE, offsets=None):
+    """
+    Write the elements of a JSON array to a file one at a time.
+
+    Each element is encoded separately and the encoded text is written in chunks, so the whole
+    array never has to exist in memory. The pretty-printed output is identical to
+    json.dump(list(elements), file, indent=4).
+
+    Args:
+    file: A file object opened in text mode.
+    elements (iterable): The JSON-serializable elements of the array.
+    compact (bool): If True, write the array without indentation or extra whitespace.
+    chunk_size (int): The approximate number of characters buffered before each write.
+    offsets (tuple, optional): Two arrays (starts, ends) to which the position of every
+                               element, counted from the start of the array, is appended.
+                               The output is ASCII, so these are also byte offsets.
+
+    Returns:
+    int: The number of characters written.
+    """
+    if compact:
+        opening, separator, closing = '[', ',', ']'
+        encode = json.JSONEncoder(separators=(',', ':')).encode
+    else:
+        prefix = ' ' * INDENT
+        opening, separator, closing = '[\n' + prefix, ',\n' + prefix, '\n]'
+        encoder = json.JSONEncoder(indent=INDENT)
+
+        def encode(element):
+            # Nested levels are indented once more than in a standalone document
+            return encoder.encode(element).replace('\n', '\n' + prefix)
+
+    pending = []
+    pending_size = 0
+    written = 0
+    for index, element in enumerate(elements):
+        text = (separator if index else opening) + encode(element)
+        if offsets is not None:
+            end = written + pending_size + len(text)
+            offsets[0].append(end - len(text) + len(separator if index else opening))
+            offsets[1].append(end)
+        pending.append(text)
+        pending_size += len(text)
+        if pending_size >= chunk_size:
+            file.write(''.join(pending))
+            written += pending_size
+            pending = []
+            pending_size = 0
+
+    # An empty array is written as '[]' in both formats
+    text = ''.join(pending) + closing if written or pending else '[]'
+    file.write(text)
+    return written + len(text)
+
+
+def _create_temporary(filename):
+    # A new file next to filename, created like open() does (0666 minus the umask), unlike
+    # tempfile.mkstemp, which always uses 0600
+    directory = os.path.dirname(os.path.abspath(filename))
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0)
+    while True:
+        temporary = os.path.join(directory, f".{os.path.basename(filename)}.{secrets.token_hex(4)}.tmp")
+        try:
+            return os.open(temporary, flags, 0o666), temporary
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_write(filename, mode='w'):
+    """
+    Open a temporary file next to filename and move it into place when the block succeeds.
+
+    Readers never see a partially written file: the target is either left untouched (if an
+    exception is raised) or replaced in a single rename. The new file keeps the permissions
+    of the file it replaces, or gets those of a newly created file (0666 minus the umask).
+
+    Args:
+    filename (str): The file to (re)write.
+    mode (str): The mode in which the temporary file is opened ('w' or 'wb').
+
+    Yields:
+    The open temporary file.
+    """
+    descriptor, temporary = _create_temporary(filename)
+    try:
+        with os.fdopen(descriptor, mode) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.chmod(temporary, stat.S_IMODE(os.stat(filename).st_mode))
+        except FileNotFoundError:
+            pass  # A new file keeps the mode it was created with
+        os.replace(temporary, filename)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+def file_digest(filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Compute the SHA-256 digest of a file's content, reading it in chunks.
+
+    Args:
+    filename (str): The name of the file.
+    chunk_size (int): The number of bytes read at a time.
+
+    Returns:
+    str: The hexadecimal digest.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,283 @@
+"""
+A resident payroll service: the department is loaded once and queried over a Unix socket.
+
+    python -m models.service data/employees.snap /tmp/payroll.sock
+
+Requests and responses are JSON objects, one per line:
+
+    {"op": "salary", "first_name": "John", "last_name": "Doe"}
+    {"op": "team_payroll", "first_name": "Bob", "last_name": "Brown"}
+    {"op": "report"}
+    {"op": "update", "first_name": "John", "last_name": "Doe", "fields": {"base_salary": 1100}}
+
+Every response is {"ok": true, "result": ...} or {"ok": false, "error": "..."}. Clients are
+served concurrently, one thread each. The service reloads the department when the snapshot
+file is changed by someone else, and writes updates back to it atomically.
+"""
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+
+from .changelog import apply_change, employee_path
+from .department import Department
+from .factory import build_from_columns, build_from_records
+from .payroll import PayrollRecord
+from .serialization import atomic_write, write_json_array
+from .snapshot import read_snapshot, write_snapshot
+
+
+def _stamp(filename):
+    status = os.stat(filename)
+    return status.st_size, status.st_mtime_ns
+
+
+def _is_json(filename):
+    return filename.endswith('.json')
+
+
+class PayrollService:
+    """
+    Answers payroll queries from a Department kept in memory.
+
+    The department is loaded from a binary snapshot (or a JSON file written by
+    save_employees) and reloaded whenever that file changes. All requests are serialized
+    with a lock, so the service can be used from many threads.
+    """
+
+    def __init__(self, filename, rules=None):
+        """
+        Load the department.
+
+        Args:
+        filename (str): The snapshot file (or a '.json' file).
+        rules (SalaryRules, optional): The salary rules to apply instead of calculate_salary.
+        """
+        self.filename = filename
+        self.rules = rules
+        self.lock = threading.RLock()
+        self.reloads = 0
+        self.department = None
+        self._stamp = None
+        self.reload()
+
+    def reload(self):
+        """
+        Load the department from the file, replacing the one in memory.
+        """
+        with self.lock:
+            stamp = _stamp(self.filename)
+            department = Department()
+            if _is_json(self.filename):
+                with open(self.filename, 'r') as file:
+                    managers = build_from_records(json.load(file), trusted=True)
+            else:
+                managers = build_from_columns(read_snapshot(self.filename, use_mmap=False), trusted=True)
+            for manager in managers:
+                department.add_manager(manager)
+            self.department, self._stamp = department, stamp
+            self.reloads += 1
+
+    def reload_if_changed(self):
+        """
+        Reload the department if the file has changed since it was loaded.
+
+        A file that cannot be read (e.g. while it is being replaced) keeps the current department.
+        """
+        with self.lock:
+            try:
+                if _stamp(self.filename) != self._stamp:
+                    self.reload()
+            except (OSError, ValueError):
+                pass
+
+    def _save(self):
+        if _is_json(self.filename):
+            with atomic_write(self.filename) as file:
+                write_json_array(file, (manager.to_dict() for manager in self.department.managers))
+        else:
+            write_snapshot(self.department.to_columns(), self.filename)
+        self._stamp = _stamp(self.filename)
+
+    def _calculate(self, employee):
+        return self.rules.calculate(employee) if self.rules is not None else employee.calculate_salary()
+
+    def _record(self, employee):
+        return PayrollRecord.from_employee(employee, self._calculate(employee),
+                                           self.department.manager_of(employee)).to_dict()
+
+    def _find(self, first_name, last_name):
+        employees = self.department.find_employees(first_name, last_name)
+        if not employees:
+            raise KeyError(f"No employee named {first_name} {last_name}.")
+        return employees
+
+    def _find_one(self, first_name, last_name):
+        employees = self._find(first_name, last_name)
+        if len(employees) > 1:
+            raise ValueError(f"{len(employees)} employees are named {first_name} {last_name}.")
+        return employees[0]
+
+    def salary(self, first_name, last_name):
+        """
+        Return the payroll records of the employees with a given name.
+        """
+        with self.lock:
+            return [self._record(employee) for employee in self._find(first_name, last_name)]
+
+    def team_payroll(self, first_name, last_name):
+        """
+        Return the records of a manager and their team members, and the team's total salary.
+        """
+        with self.lock:
+            manager = self._find_one(first_name, last_name)
+            records = [self._record(manager)] + [self._record(member) for member in getattr(manager, 'team', [])]
+            return {'records': records, 'total': sum(record['salary'] for record in records)}
+
+    def report(self):
+        """
+        Return the records of give_salary and their total salary.
+        """
+        with self.lock:
+            records = [record.to_dict() for record in self.department.iter_payroll(self.rules)]
+            return {'records': records, 'total': sum(record['salary'] for record in records)}
+
+    def update(self, first_name, last_name, fields):
+        """
+        Change fields of an employee and write the department back to the file.
+
+        If the file cannot be written, the employee's previous values are restored, so the
+        service never answers with values that are not in the file.
+
+        Returns:
+        dict: The employee's new payroll record.
+        """
+        with self.lock:
+            employee = self._find_one(first_name, last_name)
+            path = employee_path(self.department, employee)
+            previous = {field: getattr(employee, field) for field in fields if hasattr(employee, field)}
+            apply_change(self.department, {'op': 'update', 'path': path, 'fields': fields})
+            try:
+                self._save()
+            except BaseException:
+                apply_change(self.department, {'op': 'update', 'path': path, 'fields': previous})
+                raise
+            return self._record(employee)
+
+    def handle(self, request):
+        """
+        Answer one request object.
+
+        Returns:
+        dict: The response object.
+        """
+        handlers = {'salary': self.salary, 'team_payroll': self.team_payroll,
+                    'report': self.report, 'update': self.update}
+        try:
+            arguments = dict(request)
+            handler = handlers.get(arguments.pop('op', None))
+            if handler is None:
+                raise ValueError(f"Unknown operation {request.get('op')!r}.")
+            self.reload_if_changed()
+            return {'ok': True, 'result': handler(**arguments)}
+        except Exception as e:
+            # Any failure is reported to the client; the connection stays open for the next request
+            message = e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+            return {'ok': False, 'error': message}
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.service.handle(request) if isinstance(request, dict) else {
+                    'ok': False, 'error': "A request must be a JSON object."}
+            except ValueError:
+                response = {'ok': False, 'error': "Invalid JSON."}
+            self.wfile.write(json.dumps(response).encode('utf-8') + b'\n')
+
+
+def _remove_socket(path):
+    # Remove a socket file; anything else at the path (e.g. a mistyped data file) is left alone
+    try:
+        if stat.S_ISSOCK(os.lstat(path).st_mode):
+            os.remove(path)
+            return True
+    except FileNotFoundError:
+        pass
+    return False
+
+
+class PayrollServer(socketserver.ThreadingUnixStreamServer):
+    """
+    Serves a PayrollService on a Unix socket, one thread per client connection.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, service):
+        """
+        Bind the socket; call serve_forever() to start serving.
+
+        Args:
+        socket_path (str): The path of the Unix socket; a stale socket file is replaced.
+        service (PayrollService): The service answering the requests.
+
+        Raises:
+        FileExistsError: If something other than a socket exists at socket_path.
+        """
+        if not _remove_socket(socket_path) and os.path.lexists(socket_path):
+            raise FileExistsError(f"'{socket_path}' exists and is not a socket.")
+        self.service = service
+        super().__init__(socket_path, _RequestHandler)
+
+    def server_close(self):
+        super().server_close()
+        _remove_socket(self.server_address)
+
+
+class PayrollClient:
+    """
+    A client of a PayrollServer, keeping one connection open for many requests.
+    """
+
+    def __init__(self, socket_path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(socket_path)
+        self.file = self.socket.makefile('rwb')
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def request(self, op, **arguments):
+        """
+        Send a request and return the response object.
+        """
+        self.file.write(json.dumps({'op': op, **arguments}).encode('utf-8') + b'\n')
+        self.file.flush()
+        return json.loads(self.file.readline())
+
+
+def main(arguments):
+    filename, socket_path = arguments
+    with PayrollServer(socket_path, PayrollService(filename)) as server:
+        print(f"Serving {filename} on {socket_path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,250 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from .columnar import ROLE_DESIGNER, ROLE_DEVELOPER, ROLE_MANAGER, DepartmentColumns
+from .serialization import atomic_write, iter_json_array
+
+# File signature and current version of the binary snapshot format
+MAGIC = b'ORGSNAP\0'
+VERSION = 1
+
+# Header: magic, version, employee count, string count, string data size (little-endian)
+_HEADER = struct.Struct('<8sIQIQ')
+_HEADER_SIZE = 32
+_ALIGNMENT = 8
+
+
+class SnapshotFormatError(ValueError):
+    """
+    Raised when a file is not a valid organization snapshot.
+    """
+
+
+def _padding(size):
+    # Number of zero bytes needed to keep the next column aligned
+    return -size % _ALIGNMENT
+
+
+class _StringTable:
+    """
+    The interned strings of a snapshot, decoded from the file only when they are needed.
+
+    Single lookups decode one string at a time; the first full pass decodes the whole table.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self._decoded = {}
+        self._strings = None
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if self._strings is not None:
+            return self._strings[index]
+        string = self._decoded.get(index)
+        if string is None:
+            string = self._decoded[index] = str(self.data[self.offsets[index]:self.offsets[index + 1]], 'utf-8')
+        return string
+
+    def decode_all(self):
+        """
+        Return every string of the table as a list, decoding them on the first call.
+        """
+        if self._strings is None:
+            data = bytes(self.data)
+            offsets = self.offsets
+            self._strings = [data[offsets[index]:offsets[index + 1]].decode('utf-8')
+                             for index in range(len(offsets) - 1)]
+            self._decoded = None
+        return self._strings
+
+
+class _NameColumn:
+    """
+    A read-only sequence of names resolved lazily through the interned string table.
+    """
+
+    def __init__(self, strings, indexes):
+        self.strings = strings
+        self.indexes = indexes
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __getitem__(self, row):
+        return self.strings[self.indexes[row]]
+
+    def __iter__(self):
+        strings = self.strings.decode_all()
+        return (strings[index] for index in self.indexes)
+
+
+def _columns_from_dicts(elements):
+    """
+    Build columns from serialized managers without creating any employee objects.
+
+    Args:
+    elements (iterable): Manager dictionaries in the to_dict format.
+
+    Returns:
+    DepartmentColumns: The columnar representation of the managers.
+    """
+    columns = DepartmentColumns()
+    for element in elements:
+        stack = [(element, -1)]
+        while stack:
+            data, parent = stack.pop()
+            if 'eff_coeff' in data:
+                role, eff_coeff = ROLE_DESIGNER, data['eff_coeff']
+            elif 'team' in data or parent < 0:
+                role, eff_coeff = ROLE_MANAGER, 0.0
+            else:
+                role, eff_coeff = ROLE_DEVELOPER, 0.0
+            row = columns.append(data['first_name'], data['last_name'], data['base_salary'],
+                                 data['experience'], eff_coeff, role, parent)
+            if role == ROLE_MANAGER:
+                stack.extend((member, row) for member in reversed(data.get('team') or []))
+    return columns
+
+
+def write_snapshot(columns, filename):
+    """
+    Write department columns to a binary snapshot file.
+
+    Layout (little-endian, every column aligned to 8 bytes):
+    - header: magic, version, employee count n, string count m, string data size
+    - base_salary, experience, eff_coeff: float64[n]
+    - manager_index: int64[n] (-1 for top-level managers)
+    - first_name, last_name: uint32[n] indexes into the string table
+    - role: int8[n]
+    - string table: uint64[m + 1] offsets followed by the UTF-8 encoded strings
+
+    Every distinct name is stored once, however many employees share it.
+
+    Args:
+    columns (DepartmentColumns): The columns to write.
+    filename (str): The name of the snapshot file.
+    """
+    strings = {}
+    first_names = array('I', [strings.setdefault(name, len(strings)) for name in columns.first_names])
+    last_names = array('I', [strings.setdefault(name, len(strings)) for name in columns.last_names])
+
+    encoded = [name.encode('utf-8') for name in strings]
+    offsets = array('Q', [0])
+    for name in encoded:
+        offsets.append(offsets[-1] + len(name))
+    string_data = b''.join(encoded)
+
+    sections = [
+        array('d', columns.base_salary),
+        array('d', columns.experience),
+        array('d', columns.eff_coeff),
+        array('q', columns.manager_index),
+        first_names,
+        last_names,
+        array('b', columns.role),
+        offsets,
+    ]
+
+    with atomic_write(filename, 'wb') as file:
+        header = _HEADER.pack(MAGIC, VERSION, len(columns), len(strings), len(string_data))
+        file.write(header + bytes(_HEADER_SIZE - len(header)))
+        for section in sections:
+            if sys.byteorder != 'little':
+                section = array(section.typecode, section)
+                section.byteswap()
+            data = section.tobytes()
+            file.write(data + bytes(_padding(len(data))))
+        file.write(string_data)
+
+
+def read_snapshot(filename, use_mmap=True):
+    """
+    Read a binary snapshot file into department columns.
+
+    With use_mmap the numeric columns are zero-copy views of the memory-mapped file and each
+    string of the table is decoded only when a name using it is first accessed, so opening a
+    snapshot costs almost nothing regardless of its size. Reading every name still decodes the
+    whole table once.
+
+    Args:
+    filename (str): The name of the snapshot file.
+    use_mmap (bool): If True, memory-map the file instead of reading it into memory.
+
+    Returns:
+    DepartmentColumns: The columns stored in the snapshot.
+
+    Raises:
+    SnapshotFormatError: If the file is not a snapshot or has an unsupported version.
+    """
+    with open(filename, 'rb') as file:
+        if use_mmap:
+            try:
+                data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be memory-mapped
+                data = b''
+        else:
+            data = file.read()
+
+    if len(data) < _HEADER_SIZE:
+        raise SnapshotFormatError("File is too short to be an organization snapshot.")
+    magic, version, count, string_count, string_size = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotFormatError("File is not an organization snapshot.")
+    if version != VERSION:
+        raise SnapshotFormatError(f"Unsupported snapshot version {version}.")
+
+    view = memoryview(data)
+    position = _HEADER_SIZE
+
+    def column(typecode, length):
+        # Return the next column as a view (or a byte-swapped copy on big-endian machines)
+        nonlocal position
+        size = length * array(typecode).itemsize
+        if position + size > len(data):
+            raise SnapshotFormatError("Snapshot file is truncated.")
+        values = view[position:position + size].cast(typecode)
+        position += size + _padding(size)
+        if sys.byteorder != 'little':
+            values = array(typecode, values)
+            values.byteswap()
+        return values
+
+    columns = DepartmentColumns()
+    columns.base_salary = column('d', count)
+    columns.experience = column('d', count)
+    columns.eff_coeff = column('d', count)
+    columns.manager_index = column('q', count)
+    first_names = column('I', count)
+    last_names = column('I', count)
+    columns.role = column('b', count)
+    offsets = column('Q', string_count + 1)
+
+    if position + string_size > len(data):
+        raise SnapshotFormatError("Snapshot file is truncated.")
+    strings = _StringTable(view[position:position + string_size], offsets)
+
+    columns.first_names = _NameColumn(strings, first_names)
+    columns.last_names = _NameColumn(strings, last_names)
+    return columns
+
+
+def convert_json_to_snapshot(json_filename, snapshot_filename):
+    """
+    Convert a JSON file written by Department.save_employees into a binary snapshot.
+
+    The JSON file is streamed and no employee objects are created.
+
+    Args:
+    json_filename (str): The name of the JSON file to convert.
+    snapshot_filename (str): The name of the snapshot file to write.
+    """
+    with open(json_filename, 'rb') as file:
+        columns = _columns_from_dicts(iter_json_array(file))
+    write_snapshot(columns, snapshot_filename)
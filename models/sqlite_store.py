@@ -0,0 +1,253 @@
+import sqlite3
+
+from .columnar import ROLE_DESIGNER, ROLE_NAMES, DepartmentColumns
+from .designer import Designer
+from .developer import Developer
+from .employee import Employee
+from .manager import Manager
+
+# Numeric columns are declared without a type so that int and float values are kept as given
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS employees (
+    id INTEGER PRIMARY KEY,
+    manager_id INTEGER REFERENCES employees (id),
+    position INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    first_name TEXT NOT NULL,
+    last_name TEXT NOT NULL,
+    base_salary NOT NULL,
+    experience NOT NULL,
+    eff_coeff
+);
+CREATE INDEX IF NOT EXISTS idx_employees_manager ON employees (manager_id, position);
+CREATE INDEX IF NOT EXISTS idx_employees_role ON employees (role);
+CREATE INDEX IF NOT EXISTS idx_employees_name ON employees (last_name, first_name);
+"""
+
+_COLUMNS = "id, role, first_name, last_name, base_salary, experience, eff_coeff"
+
+# Salaries computed in SQL, following Employee, Designer and Manager calculate_salary.
+# py_round is Python's round (half to even), registered on the connection.
+_PAYROLL_BY_ROLE = """
+WITH teams AS (
+    SELECT manager_id, COUNT(*) AS team_size, SUM(role = 'Developer') AS developers
+    FROM employees WHERE manager_id IS NOT NULL GROUP BY manager_id
+), salaries AS (
+    SELECT e.role, e.eff_coeff,
+           CASE WHEN e.experience > 5 THEN e.base_salary * 1.2 + 500
+                WHEN e.experience > 2 THEN e.base_salary + 200
+                ELSE e.base_salary END AS salary,
+           COALESCE(t.team_size, 0) AS team_size,
+           COALESCE(t.developers, 0) AS developers
+    FROM employees e LEFT JOIN teams t ON t.manager_id = e.id
+), bonuses AS (
+    SELECT role, eff_coeff, team_size, developers,
+           CASE WHEN role = 'Manager' THEN
+                    salary + CASE WHEN team_size > 10 THEN 300 WHEN team_size > 5 THEN 200 ELSE 0 END
+                ELSE salary END AS salary
+    FROM salaries
+)
+SELECT role, COUNT(*),
+       SUM(CASE role
+               WHEN 'Designer' THEN salary + salary * eff_coeff
+               WHEN 'Manager' THEN py_round(CASE WHEN team_size > 1 AND developers > team_size / 2.0
+                                                 THEN salary * 1.1 ELSE salary END)
+               ELSE salary END)
+FROM bonuses GROUP BY role ORDER BY role
+"""
+
+
+class LazyManager(Manager):
+    """
+    A Manager read from a SQLiteStore whose team is loaded from the database the first time
+    it is accessed.
+    """
+
+    __slots__ = ('_store', '_row_id', '_loaded')
+
+    def __init__(self, first_name, last_name, base_salary, experience, store, row_id):
+        """
+        Initialize a Manager whose team is still in the database.
+
+        Args:
+        first_name (str): The first name of the manager.
+        last_name (str): The last name of the manager.
+        base_salary (float): The base salary of the manager.
+        experience (int): The number of years of experience the manager has.
+        store (SQLiteStore): The store holding the team.
+        row_id (int): The id of the manager's row.
+        """
+        super().__init__(first_name, last_name, base_salary, experience)
+        self._store = store
+        self._row_id = row_id
+        self._loaded = False
+
+    def __reduce__(self):
+        # Pickle as a regular Manager with its team loaded
+        return Manager, (self.first_name, self.last_name, self.base_salary, self.experience, list(self.team))
+
+    @property
+    def team(self):
+        """
+        Team: The members of the manager's team, loaded from the store on first access.
+        """
+        if not self._loaded:
+            self.team = self._store.load_team(self._row_id)
+        return self._team
+
+    @team.setter
+    def team(self, members):
+        self._loaded = True
+        Manager.team.fset(self, members)
+
+    @property
+    def loaded_team(self):
+        return self._team if self._loaded else []
+
+    @property
+    def developer_count(self):
+        # The counter is set when the team is loaded
+        self.team
+        return self._developer_count
+
+    def add_team_member(self, member):
+        # Load the stored team first, or loading it later would replace the new member
+        self.team.append(member)
+
+    def remove_team_member(self, member):
+        self.team.remove(member)
+
+
+class SQLiteStore:
+    """
+    Department storage in a SQLite database.
+
+    Employees are stored in one indexed table, with each team member pointing to its manager.
+    Departments are written with bulk inserts in a single transaction, can be read back with
+    lazily loaded teams, and payroll aggregates can be computed in SQL without creating any
+    employee objects.
+    """
+
+    def __init__(self, filename):
+        """
+        Open (or create) a store.
+
+        Args:
+        filename (str): The database file, or ':memory:'.
+        """
+        self.connection = sqlite3.connect(filename)
+        self.connection.create_function('py_round', 1, round, deterministic=True)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def save(self, department):
+        """
+        Replace the stored employees with those of a department.
+
+        Args:
+        department (Department): The department to store.
+        """
+        columns = DepartmentColumns.from_department(department)
+        positions = {}
+
+        def rows():
+            for row, parent in enumerate(columns.manager_index):
+                position = positions.get(parent, 0)
+                positions[parent] = position + 1
+                role = columns.role[row]
+                employee = columns.employees[row]
+                yield (row + 1, parent + 1 if parent >= 0 else None, position, ROLE_NAMES[role],
+                       employee.first_name, employee.last_name, employee.base_salary, employee.experience,
+                       employee.eff_coeff if role == ROLE_DESIGNER else None)
+
+        with self.connection:
+            self.connection.execute("DELETE FROM employees")
+            self.connection.executemany(
+                "INSERT INTO employees (id, manager_id, position, role, first_name, last_name,"
+                " base_salary, experience, eff_coeff) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+
+    def _employee(self, row, lazy):
+        # Create an employee object from a row of _COLUMNS
+        row_id, role, first_name, last_name, base_salary, experience, eff_coeff = row
+        if role == 'Manager':
+            if lazy:
+                return LazyManager(first_name, last_name, base_salary, experience, self, row_id)
+            return Manager(first_name, last_name, base_salary, experience)
+        if role == 'Designer':
+            return Designer(first_name, last_name, base_salary, experience, eff_coeff)
+        if role == 'Developer':
+            return Developer(first_name, last_name, base_salary, experience)
+        return Employee(first_name, last_name, base_salary, experience)
+
+    def load_team(self, manager_id, lazy=True):
+        """
+        Load the team of a stored manager.
+
+        Args:
+        manager_id (int): The id of the manager's row.
+        lazy (bool): If True, nested managers load their own teams on first access.
+
+        Returns:
+        list: The team members, in their original order.
+        """
+        cursor = self.connection.execute(
+            f"SELECT {_COLUMNS} FROM employees WHERE manager_id = ? ORDER BY position", (manager_id,))
+        return [self._employee(row, lazy) for row in cursor]
+
+    def load(self, department, lazy=True):
+        """
+        Add the stored managers to a department.
+
+        Args:
+        department (Department): The department to populate.
+        lazy (bool): If True, each manager's team is read from the database only when it is
+                     first accessed; otherwise the whole organization is read at once.
+        """
+        if lazy:
+            cursor = self.connection.execute(
+                f"SELECT {_COLUMNS} FROM employees WHERE manager_id IS NULL ORDER BY position")
+            for row in cursor.fetchall():
+                department.add_manager(self._employee(row, lazy=True))
+            return
+
+        # A manager's id is smaller than its team members' ids, so ordering by manager_id
+        # creates every manager before its team
+        objects = {}
+        top_level = []
+        cursor = self.connection.execute(
+            f"SELECT {_COLUMNS}, manager_id FROM employees ORDER BY manager_id IS NOT NULL, manager_id, position")
+        for row in cursor:
+            employee = self._employee(row[:-1], lazy=False)
+            objects[row[0]] = employee
+            if row[-1] is None:
+                top_level.append(employee)
+            else:
+                objects[row[-1]].team.append(employee)
+        for manager in top_level:
+            department.add_manager(manager)
+
+    def payroll_by_role(self):
+        """
+        Compute the headcount and total salary per role in SQL.
+
+        Returns:
+        dict: role name -> (headcount, total salary).
+        """
+        return {role: (headcount, total) for role, headcount, total in self.connection.execute(_PAYROLL_BY_ROLE)}
+
+    def total_payroll(self):
+        """
+        Compute the total salary of all stored employees in SQL.
+        """
+        return sum(total for _, total in self.payroll_by_role().values())
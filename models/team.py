@@ -0,0 +1,115 @@
+from .employee import Employee
+
+
+def _validate(members):
+    # Every team member must be an Employee (or subclass)
+    if not all(isinstance(member, Employee) for member in members):
+        raise ValueError("All team members must be instances of Employee (or subclass).")
+    return members
+
+
+class Team(list):
+    """
+    A list of team members that notifies its Manager whenever members are added or removed.
+
+    It behaves like a regular list, so existing code that iterates, indexes or appends to
+    manager.team keeps working, while the Manager can keep running counters and a cached
+    salary up to date.
+    """
+
+    __slots__ = ('_owner',)
+
+    def __init__(self, members=(), owner=None):
+        """
+        Initialize the team with its members and the Manager that owns it.
+
+        Args:
+        members (iterable): The initial team members.
+        owner (Manager, optional): The Manager to notify about changes.
+
+        Raises:
+        ValueError: If a member is not an instance of Employee (or subclass).
+        """
+        super().__init__(_validate(list(members)))
+        self._owner = owner
+
+    @classmethod
+    def trusted(cls, members, owner=None):
+        """
+        Create a team from members that are known to be Employee objects, skipping validation.
+
+        Args:
+        members (list): The team members.
+        owner (Manager, optional): The Manager to notify about changes.
+
+        Returns:
+        Team: The new team.
+        """
+        team = cls.__new__(cls)
+        list.extend(team, members)
+        team._owner = owner
+        return team
+
+    def __reduce__(self):
+        # Pickle as a detached team; Manager re-attaches its team when it is unpickled
+        return Team, (list(self),)
+
+    def _added(self, members):
+        if self._owner is not None and members:
+            self._owner._members_added(members)
+
+    def _removed(self, members):
+        if self._owner is not None and members:
+            self._owner._members_removed(members)
+
+    def append(self, member):
+        _validate([member])
+        super().append(member)
+        self._added([member])
+
+    def extend(self, members):
+        members = _validate(list(members))
+        super().extend(members)
+        self._added(members)
+
+    def __iadd__(self, members):
+        self.extend(members)
+        return self
+
+    def insert(self, index, member):
+        _validate([member])
+        super().insert(index, member)
+        self._added([member])
+
+    def remove(self, member):
+        super().remove(member)
+        self._removed([member])
+
+    def pop(self, index=-1):
+        member = super().pop(index)
+        self._removed([member])
+        return member
+
+    def clear(self):
+        members = list(self)
+        super().clear()
+        self._removed(members)
+
+    def __setitem__(self, index, value):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        added = _validate(list(value)) if isinstance(index, slice) else _validate([value])
+        super().__setitem__(index, added if isinstance(index, slice) else value)
+        self._removed(removed)
+        self._added(added)
+
+    def __delitem__(self, index):
+        removed = self[index] if isinstance(index, slice) else [self[index]]
+        super().__delitem__(index)
+        self._removed(removed)
+
+    def __imul__(self, count):
+        removed = list(self)
+        super().__imul__(count)
+        self._removed(removed)
+        self._added(list(self))
+        return self
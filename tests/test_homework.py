@@ -1,3 +1,11 @@
+import asyncio
+import copy
+import json
+import os
+import pickle
+import sys
+import tempfile
+import threading
 import unittest
 from io import StringIO
 from unittest.mock import patch
@@ -5,7 +13,25 @@ from models.employee import Employee
 from models.developer import Developer
 from models.designer import Designer
 from models.manager import Manager
+from models.changelog import ChangeLog
+from models.csv_import import export_csv, import_csv
+from models import instrumentation
+from models.analytics import PayrollAnalytics, QuantileSketch
 from models.department import Department
+from models.diff import diff_departments
+from models.factory import BulkValidationError, build_from_columns, build_from_records
+from models.lazy_json import LazyManagers, scan_offsets
+from models.organization import Organization
+from models.parallel import snapshot_salaries
+from models.pipeline import run_payroll_pipeline
+from models import payroll_cache
+from models.payroll_cache import PayrollCache
+from models.payroll import CsvSink, JsonLinesSink, PayrollRecord, TextReportSink
+from models.scenario import Simulation
+from models.rules import DEFAULT_RULES, DEFAULT_SALARY_RULES, SalaryRules
+from models.service import PayrollClient, PayrollServer, PayrollService
+from models.sqlite_store import LazyManager, SQLiteStore
+from models.snapshot import convert_json_to_snapshot, read_snapshot
 
 class TestEmployee(unittest.TestCase):
     """
@@ -348,4 +374,1509 @@ class TestDepartment(unittest.TestCase):
                                       "\nCharlie Wilson received 1700 money.\n")
 
     if __name__ == "__main__":
-        unittest.main()
\ No newline at end of file
+        unittest.main()
+
+class TestDepartmentColumns(unittest.TestCase):
+    """
+    Unit tests for the columnar payroll engine to ensure it matches the per-object salary calculation.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("John", "Doe", 2000, 6, [
+            Developer("John", "Doe", 1000, 3),
+            Designer("Jane", "Smith", 1200, 4, 0.9),
+            Developer("Charlie", "Wilson", 1500, 5)]))
+        self.department.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9) for _ in range(12)]),
+        ] + [Developer("Eve", "White", 1100, 2) for _ in range(6)]))
+
+    def test_columns_layout(self):
+        """
+        Test that every employee, including nested teams, becomes one row with its manager row.
+        """
+        columns = self.department.to_columns()
+        self.assertEqual(25, len(columns))
+        self.assertEqual([-1, 0, 0, 0, -1, 4, 4, 6], list(columns.manager_index[:8]))
+
+    def test_salaries_match_calculate_salary(self):
+        """
+        Test that the batched salaries equal calculate_salary for every employee.
+        """
+        pairs = self.department.calculate_salaries()
+        for employee, salary in pairs:
+            self.assertEqual(employee.calculate_salary(), salary)
+        self.assertEqual(pairs, self.department.calculate_salaries(self.department.to_columns()))
+
+
+class TestDepartmentLoading(unittest.TestCase):
+    """
+    Unit tests for loading a Department from JSON, both at once and in streaming mode.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9)]),
+            Developer("Eve", "White", 1100, 2)]))
+        self.department.add_manager(Manager("John", "Doe", 2000, 6))
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "employees.json")
+        self.department.save_employees(self.filename)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def assertSameDepartment(self, loaded):
+        self.assertEqual([manager.to_dict() for manager in self.department.managers],
+                         [manager.to_dict() for manager in loaded.managers])
+
+    def test_load_rebuilds_nested_managers(self):
+        """
+        Test that loading re-creates team members and nested managers as objects.
+        """
+        loaded = Department()
+        loaded.load_employees(self.filename)
+        self.assertSameDepartment(loaded)
+        nested = loaded.managers[0].team[1]
+        self.assertIsInstance(nested, Manager)
+        self.assertIsInstance(nested.team[0], Developer)
+
+    def test_streaming_load(self):
+        """
+        Test that the streaming loader produces the same department and reports progress.
+        """
+        calls = []
+        loaded = Department()
+        loaded.load_employees(self.filename, stream=True,
+                              progress=lambda count, read: calls.append(count))
+        self.assertSameDepartment(loaded)
+        self.assertEqual([1, 2], calls)
+
+        managers = list(loaded.iter_employees(self.filename, chunk_size=7))
+        self.assertEqual([m.to_dict() for m in loaded.managers], [m.to_dict() for m in managers])
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_streaming_load_invalid_json(self, mock_stdout):
+        """
+        Test that a truncated file is reported as invalid JSON in streaming mode.
+        """
+        with open(self.filename, 'r+') as file:
+            file.truncate(40)
+        Department().load_employees(self.filename, stream=True)
+        self.assertEqual("Error loading employees: Invalid JSON.\n", mock_stdout.getvalue())
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_trailing_data_is_invalid(self, mock_stdout):
+        """
+        Test that data after the closing bracket is rejected in both modes, like json.load does.
+        """
+        with open(self.filename, 'a') as file:
+            file.write(' \n[]')
+        for stream in (False, True):
+            Department().load_employees(self.filename, stream=stream)
+        self.assertEqual("Error loading employees: Invalid JSON.\n" * 2, mock_stdout.getvalue())
+
+    def test_top_level_records_are_managers(self):
+        """
+        Test that a top-level record without a team or a role is loaded as a Manager.
+        """
+        with open(self.filename, 'w') as file:
+            json.dump([{"first_name": "John", "last_name": "Doe", "base_salary": 2000, "experience": 6}], file)
+        for stream in (False, True):
+            loaded = Department()
+            loaded.load_employees(self.filename, stream=stream)
+            self.assertIsInstance(loaded.managers[0], Manager)
+            self.assertEqual([], loaded.managers[0].team)
+
+        snapshot = os.path.join(self.directory.name, "employees.snap")
+        convert_json_to_snapshot(self.filename, snapshot)
+        loaded = Department()
+        loaded.load_snapshot(snapshot)
+        self.assertIsInstance(loaded.managers[0], Manager)
+        self.assertFalse(diff_departments(self.filename, snapshot))
+
+
+class TestDepartmentSaving(unittest.TestCase):
+    """
+    Unit tests for saving a Department to JSON in streaming, compact and atomic modes.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9)])]))
+        self.department.add_manager(Manager("John", "Doe", 2000, 6))
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "employees.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self):
+        with open(self.filename) as file:
+            return file.read()
+
+    def test_streaming_save_matches_default_format(self):
+        """
+        Test that the streaming writer produces exactly the same file as the default save.
+        """
+        self.department.save_employees(self.filename)
+        expected = self.read()
+        self.department.save_employees(self.filename, stream=True)
+        self.assertEqual(expected, self.read())
+
+        Department().save_employees(self.filename, stream=True)
+        self.assertEqual("[]", self.read())
+
+    def test_compact_atomic_save(self):
+        """
+        Test that a compact, atomic save has no whitespace, leaves no temporary file and can be reloaded.
+        """
+        self.department.save_employees(self.filename, stream=True, compact=True, atomic=True)
+        self.assertNotIn(" ", self.read())
+        self.assertEqual(["employees.json"], os.listdir(self.directory.name))
+
+        loaded = Department()
+        loaded.load_employees(self.filename)
+        self.assertEqual([manager.to_dict() for manager in self.department.managers],
+                         [manager.to_dict() for manager in loaded.managers])
+
+    @unittest.skipIf(os.name != 'posix', "Permission bits are POSIX only.")
+    def test_atomic_save_keeps_permissions(self):
+        """
+        Test that an atomic save keeps the mode of the file it replaces and uses the umask default for a new file,
+        without changing the process-wide umask.
+        """
+        umask = os.umask(0o022)
+        try:
+            with patch('os.umask', side_effect=AssertionError("The umask is shared by every thread.")):
+                self.department.save_employees(self.filename, atomic=True)
+            self.assertEqual(0o644, os.stat(self.filename).st_mode & 0o777)
+            os.chmod(self.filename, 0o640)
+            self.department.save_employees(self.filename, atomic=True)
+            self.assertEqual(0o640, os.stat(self.filename).st_mode & 0o777)
+        finally:
+            os.umask(umask)
+
+
+class TestDepartmentSnapshot(unittest.TestCase):
+    """
+    Unit tests for the binary snapshot format of a Department.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("Alice", "Johnson", 2100.5, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9)]),
+            Developer("Lisa", "Black", 1100, 2)]))
+        self.department.add_manager(Manager("John", "Doe", 2000, 6))
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "employees.snap")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_snapshot_round_trip(self):
+        """
+        Test that saving and loading a snapshot (with and without mmap) re-creates the department.
+        """
+        self.department.save_snapshot(self.filename)
+        for use_mmap in (True, False):
+            loaded = Department()
+            loaded.load_snapshot(self.filename, use_mmap=use_mmap)
+            self.assertEqual([manager.to_dict() for manager in self.department.managers],
+                             [manager.to_dict() for manager in loaded.managers])
+
+    def test_convert_json_to_snapshot(self):
+        """
+        Test that a converted JSON file gives the same salaries as the department it was saved from.
+        """
+        json_filename = os.path.join(self.directory.name, "employees.json")
+        self.department.save_employees(json_filename)
+        convert_json_to_snapshot(json_filename, self.filename)
+
+        columns = read_snapshot(self.filename)
+        self.assertEqual(["Alice", "Lisa", "Bob", "Max", "Lisa", "John"], list(columns.first_names))
+        self.assertEqual([salary for _, salary in self.department.calculate_salaries()],
+                         list(columns.calculate_salaries()))
+
+    def test_names_decoded_on_access(self):
+        """
+        Test that opening a snapshot does not decode its string table, only the names that are read.
+        """
+        self.department.save_snapshot(self.filename)
+        with open(self.filename, 'r+b') as file:
+            file.seek(-3, os.SEEK_END)
+            file.write(b'\xff' * 3)  # The last string, "Doe", is no longer valid UTF-8
+
+        columns = read_snapshot(self.filename)
+        self.assertEqual([salary for _, salary in self.department.calculate_salaries()],
+                         list(columns.calculate_salaries()))
+        self.assertEqual(("Alice", "Johnson"), (columns.first_names[0], columns.last_names[0]))
+        with self.assertRaises(UnicodeDecodeError):
+            columns.last_names[5]
+        with self.assertRaises(UnicodeDecodeError):
+            list(columns.last_names)
+
+    @patch('sys.stdout', new_callable=StringIO)
+    def test_invalid_snapshot(self, mock_stdout):
+        """
+        Test that loading a file that is not a snapshot prints an error.
+        """
+        with open(self.filename, 'wb') as file:
+            file.write(b'[]' * 20)
+        Department().load_snapshot(self.filename)
+        self.assertEqual("Error loading snapshot: File is not an organization snapshot.\n",
+                         mock_stdout.getvalue())
+
+
+class TestCompactLayout(unittest.TestCase):
+    """
+    Unit tests for the __slots__-based layout of the employee classes.
+    """
+
+    def test_no_instance_dict(self):
+        """
+        Test that employees do not carry a per-instance __dict__ and reject unknown attributes.
+        """
+        for employee in (Employee("John", "Doe", 1000, 3), Developer("John", "Doe", 1000, 3),
+                         Designer("Jane", "Smith", 1200, 4, 0.9), Manager("Bob", "Brown", 2000, 6)):
+            self.assertFalse(hasattr(employee, '__dict__'))
+            with self.assertRaises(AttributeError):
+                employee.nickname = "JD"
+
+    def test_names_are_interned(self):
+        """
+        Test that equal names built separately share a single string object.
+        """
+        first = Developer("".join(["Jo", "hn"]), "Doe", 1000, 3)
+        second = Designer("".join(["J", "ohn"]), "Doe", 1200, 4, 0.9)
+        self.assertIs(first.first_name, second.first_name)
+        self.assertEqual({'first_name': 'John', 'last_name': 'Doe', 'base_salary': 1000, 'experience': 3},
+                         first.to_dict())
+
+
+class TestManagerSalaryCache(unittest.TestCase):
+    """
+    Unit tests for the running team counters and the cached salary of the Manager class.
+    """
+
+    def setUp(self):
+        self.manager = Manager("Bob", "Brown", 2000, 6, [
+            Developer("John", "Doe", 1000, 3),
+            Designer("Charlie", "Wilson", 1400, 5, 0.85)])
+
+    def test_team_changes_update_salary(self):
+        """
+        Test that adding and removing team members updates the developer count and the salary.
+        """
+        self.assertEqual(2900, self.manager.calculate_salary())
+        developer = Developer("Jane", "Smith", 1200, 4)
+        self.manager.add_team_member(developer)
+        self.assertEqual(2, self.manager.developer_count)
+        self.assertEqual(3190, self.manager.calculate_salary())
+
+        self.manager.remove_team_member(developer)
+        self.assertEqual(2900, self.manager.calculate_salary())
+
+        self.manager.team[1:] = [Developer("Eve", "White", 1100, 2) for _ in range(6)]
+        self.assertEqual(7, self.manager.developer_count)
+        self.assertEqual(3410, self.manager.calculate_salary())
+
+        del self.manager.team[:]
+        self.assertEqual(0, self.manager.developer_count)
+        self.assertEqual(2900, self.manager.calculate_salary())
+
+    def test_salary_fields_invalidate_cache(self):
+        """
+        Test that changing base_salary or experience invalidates the cached salary.
+        """
+        self.assertEqual(2900, self.manager.calculate_salary())
+        self.manager.base_salary = 3000
+        self.assertEqual(4100, self.manager.calculate_salary())
+        self.manager.experience = 1
+        self.assertEqual(3000, self.manager.calculate_salary())
+
+    def test_invalid_team_member_added(self):
+        """
+        Test that adding a non-Employee to an existing team raises an exception.
+        """
+        with self.assertRaises(ValueError) as context:
+            self.manager.team.append("invalid_member")
+        self.assertEqual(str(context.exception), "All team members must be instances of Employee (or subclass).")
+        self.assertEqual(2, len(self.manager.team))
+
+    def test_pickle_keeps_counters(self):
+        """
+        Test that a pickled manager is restored with a team that still updates its counters.
+        """
+        restored = pickle.loads(pickle.dumps(self.manager))
+        self.assertEqual(self.manager.to_dict(), restored.to_dict())
+        restored.add_team_member(Developer("Jane", "Smith", 1200, 4))
+        self.assertEqual(3190, restored.calculate_salary())
+
+
+class TestPayrollTree(unittest.TestCase):
+    """
+    Unit tests for the tree-aware payroll with subtree totals and headcounts.
+    """
+
+    def setUp(self):
+        self.developer = Developer("Max", "Black", 1200, 9)
+        self.nested = Manager("Bob", "Brown", 1800, 1, [self.developer])
+        self.root = Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8), self.nested])
+        self.other = Manager("John", "Doe", 2000, 6)
+        self.department = Department()
+        self.department.add_manager(self.root)
+        self.department.add_manager(self.other)
+        self.tree = self.department.payroll_tree()
+
+    def test_subtree_totals(self):
+        """
+        Test per-employee salaries, subtree totals and headcounts of nested managers.
+        """
+        self.assertEqual(1940, self.tree.salary(self.developer))
+        self.assertEqual(1800 + 1940, self.tree.subtree_total(self.nested))
+        self.assertEqual(2, self.tree.subtree_headcount(self.nested))
+        self.assertEqual(4, self.tree.subtree_headcount(self.root))
+        self.assertEqual(sum(e.calculate_salary() for e, _ in self.tree.salaries()), self.tree.total())
+        self.assertIs(self.nested, self.tree.manager_of(self.developer))
+
+    def test_update_recomputes_path(self):
+        """
+        Test that changing an employee and moving a member between teams updates the aggregates.
+        """
+        self.developer.base_salary = 1300
+        self.tree.update(self.developer)
+        self.assertEqual(1800 + 2060, self.tree.subtree_total(self.nested))
+
+        self.nested.remove_team_member(self.developer)
+        self.other.add_team_member(self.developer)
+        self.tree.update(self.other)
+        self.tree.update(self.nested)
+        self.assertEqual(1, self.tree.subtree_headcount(self.nested))
+        self.assertEqual(2, self.tree.subtree_headcount(self.other))
+        self.assertIs(self.other, self.tree.manager_of(self.developer))
+        self.assertEqual(5, self.tree.headcount())
+
+    def test_deep_chain(self):
+        """
+        Test that a manager chain deeper than the recursion limit is supported.
+        """
+        manager = Manager("Deep", "Manager", 1000, 0)
+        for _ in range(sys.getrecursionlimit() + 100):
+            manager = Manager("Deep", "Manager", 1000, 0, [manager])
+        department = Department()
+        department.add_manager(manager)
+        self.assertEqual(sys.getrecursionlimit() + 101, department.payroll_tree().headcount())
+
+
+class TestParallelPayroll(unittest.TestCase):
+    """
+    Unit tests for the parallel payroll to ensure it matches the serial order and salaries.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        for index in range(7):
+            self.department.add_manager(Manager("Bob", "Brown", 2000 + index, index, [
+                Developer("John", "Doe", 1000, index),
+                Designer("Jane", "Smith", 1200, 4, 0.9),
+                Manager("Eve", "White", 1500, 3, [Developer("Max", "Black", 1100, 2)] * 2)]))
+
+    def serial(self):
+        return [(employee, employee.calculate_salary())
+                for manager in self.department.managers
+                for employee in (manager, *manager.team)]
+
+    def test_parallel_matches_serial(self):
+        """
+        Test that process and thread pools give the serial results in the serial order.
+        """
+        expected = self.serial()
+        for use_processes in (True, False):
+            result = self.department.calculate_salaries_parallel(workers=3, chunk_size=2,
+                                                                 use_processes=use_processes)
+            self.assertEqual(len(expected), len(result))
+            for (employee, salary), (result_employee, result_salary) in zip(expected, result):
+                self.assertIs(employee, result_employee)
+                self.assertEqual(salary, result_salary)
+
+    def test_snapshot_ranges_match_serial(self):
+        """
+        Test that workers reading ranges of a snapshot give the salaries of every row in order, without
+        decoding any name.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "employees.snap")
+            self.department.save_snapshot(filename)
+            expected = [salary for _, salary in self.department.calculate_salaries()]
+            with open(filename, 'r+b') as file:
+                file.seek(-1, os.SEEK_END)
+                file.write(b'\xff')  # Decoding the string table would now fail
+            for use_processes in (True, False):
+                self.assertEqual(expected, list(snapshot_salaries(filename, workers=3,
+                                                                  use_processes=use_processes)))
+            self.assertEqual(expected, list(snapshot_salaries(filename, workers=1)))
+
+
+class TestPayrollRecords(unittest.TestCase):
+    """
+    Unit tests for the structured payroll records and the payroll sinks.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("John", "Doe", 2000, 6, [
+            Developer("John", "Doe", 1000, 3),
+            Designer("Jane", "Smith", 1200, 4, 0.9)]))
+
+    def test_iter_payroll(self):
+        """
+        Test that the payroll yields one record per employee with role and manager.
+        """
+        records = list(self.department.iter_payroll())
+        self.assertEqual(PayrollRecord("John", "Doe", "Manager", 2900), records[0])
+        self.assertEqual(PayrollRecord("Jane", "Smith", "Designer", 2660.0, "John Doe"), records[2])
+        self.assertEqual(2660, records[2].rounded_salary)
+
+    def test_sinks(self):
+        """
+        Test the text, CSV and JSON Lines sinks, with batches smaller than the payroll.
+        """
+        text, rows, lines = StringIO(), StringIO(), StringIO()
+        self.department.give_salary(TextReportSink(text, batch_size=2))
+        self.department.give_salary(CsvSink(rows, batch_size=2))
+        self.department.give_salary(JsonLinesSink(lines))
+
+        self.assertEqual("John Doe received 2900 money.\nJohn Doe received 1200 money.\n"
+                         "Jane Smith received 2660 money.\n", text.getvalue())
+        self.assertEqual(["first_name,last_name,role,salary,rounded_salary,manager",
+                          "John,Doe,Manager,2900,2900,",
+                          "John,Doe,Developer,1200,1200,John Doe",
+                          "Jane,Smith,Designer,2660.0,2660,John Doe"], rows.getvalue().splitlines())
+        self.assertEqual({"first_name": "John", "last_name": "Doe", "role": "Developer", "salary": 1200,
+                          "rounded_salary": 1200, "manager": "John Doe"},
+                         json.loads(lines.getvalue().splitlines()[1]))
+
+
+class TestDepartmentIndex(unittest.TestCase):
+    """
+    Unit tests for the lookups by name, role, experience tier and manager of a Department.
+    """
+
+    def setUp(self):
+        self.developer = Developer("Max", "Black", 1200, 9)
+        self.designer = Designer("Lisa", "Green", 1300, 4, 0.8)
+        self.nested = Manager("Bob", "Brown", 1800, 1, [self.developer])
+        self.manager = Manager("Alice", "Johnson", 2100, 7, [self.designer, self.nested])
+        self.department = Department()
+        self.department.add_manager(self.manager)
+
+    def test_lookups(self):
+        """
+        Test lookups by name, role and tier, and the manager of nested team members.
+        """
+        self.assertEqual([self.developer], self.department.find_employees("Max", "Black"))
+        self.assertEqual([], self.department.find_employees("Max", "White"))
+        self.assertEqual([self.designer], self.department.employees_by_role(Designer))
+        self.assertEqual([self.manager, self.nested], self.department.employees_by_role("Manager"))
+        self.assertEqual([self.designer], self.department.employees_by_tier("middle"))
+        self.assertIs(self.nested, self.department.manager_of(self.developer))
+        self.assertIsNone(self.department.manager_of(self.manager))
+
+    def test_team_changes_update_index(self):
+        """
+        Test that adding, moving and removing team members keeps the index up to date.
+        """
+        newcomer = Developer("Eve", "White", 1100, 2)
+        self.nested.add_team_member(newcomer)
+        self.assertIs(self.nested, self.department.manager_of(newcomer))
+
+        self.manager.add_team_member(self.developer)
+        self.nested.remove_team_member(self.developer)
+        self.assertIs(self.manager, self.department.manager_of(self.developer))
+
+        self.manager.remove_team_member(self.nested)
+        self.assertEqual([], self.department.find_employees("Eve", "White"))
+        self.assertEqual([self.manager], self.department.employees_by_role(Manager))
+        self.assertEqual([self.developer], self.department.employees_by_role(Developer))
+
+    def test_in_place_team_changes_notify_once(self):
+        """
+        Test that manager.team += [...] reports only the new members instead of rebuilding the team.
+        """
+        calls = []
+
+        class Listener:
+            def members_added(self, manager, members):
+                calls.append(("added", list(members)))
+
+            def members_removed(self, manager, members):
+                calls.append(("removed", list(members)))
+
+        newcomer = Developer("Eve", "White", 1100, 2)
+        self.nested.add_listener(Listener())
+        self.nested.team += [newcomer]
+        self.assertEqual([("added", [newcomer])], calls)
+        self.assertEqual(2, self.nested.developer_count)
+        self.assertIs(self.nested, self.department.manager_of(newcomer))
+
+    def test_copies_rebuild_index(self):
+        """
+        Test that the index is built on the first lookup and rebuilt for deep copies and pickles.
+        """
+        self.assertIsNone(self.department._index)
+        self.assertIs(self.nested, self.department.manager_of(self.developer))
+        for copied in (copy.deepcopy(self.department), pickle.loads(pickle.dumps(self.department))):
+            developer = copied.find_employees("Max", "Black")[0]
+            self.assertIsNot(self.developer, developer)
+            nested = copied.manager_of(developer)
+            self.assertEqual("Bob", nested.first_name)
+            newcomer = Developer("Eve", "White", 1100, 2)
+            nested.add_team_member(newcomer)
+            self.assertIs(nested, copied.manager_of(newcomer))
+        self.assertEqual([], self.department.find_employees("Eve", "White"))
+
+
+class TestSalaryRules(unittest.TestCase):
+    """
+    Unit tests for the declarative salary rule engine.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("Alice", "Johnson", 2000, 7, [
+            Developer("John", "Doe", 1000, 3),
+            Designer("Jane", "Smith", 1200, 4, 0.9),
+            Developer("Charlie", "Wilson", 1500, 5),
+            Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9)] * 12),
+            Developer("Eve", "White", 1100, 2),
+            Developer("Max", "Black", 1200, 3),
+            Employee("Anna", "Grey", 1250, 0)]))
+
+    def test_default_rules_match_methods(self):
+        """
+        Test that the default rules reproduce calculate_salary for objects and columns.
+        """
+        employees = [employee for employee, _ in self.department.calculate_salaries()]
+        expected = [employee.calculate_salary() for employee in employees]
+        self.assertEqual(expected, DEFAULT_SALARY_RULES.calculate_many(employees))
+        self.assertEqual(expected, list(DEFAULT_SALARY_RULES.calculate_columns(self.department.to_columns())))
+
+    def test_rules_from_file(self):
+        """
+        Test that a rule set loaded from a file changes the payroll and its version.
+        """
+        rules = copy.deepcopy(DEFAULT_RULES)
+        rules["experience_tiers"][1]["bonus"] = 250
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "rules.json")
+            with open(filename, "w") as file:
+                json.dump(rules, file)
+            loaded = SalaryRules.from_file(filename)
+
+        self.assertNotEqual(DEFAULT_SALARY_RULES.version, loaded.version)
+        records = list(self.department.iter_payroll(loaded))
+        self.assertEqual(1250, records[1].salary)
+
+    def test_invalid_rules(self):
+        """
+        Test that malformed rules are rejected.
+        """
+        rules = copy.deepcopy(DEFAULT_RULES)
+        rules["manager"]["team_size_bonuses"][0]["bonus"] = "300; import os"
+        with self.assertRaises(ValueError):
+            SalaryRules(rules)
+        with self.assertRaises(ValueError):
+            SalaryRules({"experience_tiers": []})
+        for value in ("NaN", "Infinity", "-Infinity"):
+            with self.assertRaises(ValueError):
+                SalaryRules(json.loads(json.dumps(DEFAULT_RULES).replace("500", value)))
+
+
+class TestChangeLog(unittest.TestCase):
+    """
+    Unit tests for the append-only change log of a Department.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.directory.name, "employees.json")
+        self.log = os.path.join(self.directory.name, "employees.log")
+        department = Department()
+        department.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9)])]))
+        department.save_employees(self.snapshot)
+
+        self.department = Department()
+        self.change_log = ChangeLog.load(self.department, self.snapshot, self.log)
+        nested = self.department.managers[0].team[1]
+        self.change_log.add_member(nested, Developer("Eve", "White", 1100, 2))
+        self.change_log.update(self.department.find_employees("Max", "Black")[0], experience=10)
+        self.change_log.remove(self.department.find_employees("Lisa", "Green")[0])
+        self.change_log.add_manager(Manager("John", "Doe", 2000, 6))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def dicts(self, department):
+        return [manager.to_dict() for manager in department.managers]
+
+    def test_replay(self):
+        """
+        Test that loading the snapshot and replaying the log gives the changed department.
+        """
+        loaded = Department()
+        ChangeLog.load(loaded, self.snapshot, self.log)
+        self.assertEqual(self.dicts(self.department), self.dicts(loaded))
+        self.assertEqual(10, loaded.find_employees("Max", "Black")[0].experience)
+        self.assertEqual(4, len(list(self.change_log.changes())))
+
+    def test_invalid_update(self):
+        """
+        Test that an invalid update is rejected and not recorded.
+        """
+        manager = self.department.managers[0]
+        with self.assertRaises(ValueError):
+            self.change_log.update(manager, base_salary=-1)
+        with self.assertRaises(ValueError):
+            self.change_log.update(manager, eff_coeff=0.5)
+        self.assertEqual(2100, manager.base_salary)
+        self.assertEqual(4, len(list(self.change_log.changes())))
+
+    def test_compact(self):
+        """
+        Test that compaction folds the log into the snapshot and a stale log is ignored.
+        """
+        with open(self.log) as file:
+            stale_log = file.read()
+        self.change_log.compact()
+        self.assertFalse(os.path.exists(self.log))
+
+        # A log left over from before the compaction must not be applied again
+        with open(self.log, "w") as file:
+            file.write(stale_log)
+        loaded = Department()
+        ChangeLog.load(loaded, self.snapshot, self.log)
+        self.assertEqual(self.dicts(self.department), self.dicts(loaded))
+
+    def test_append_after_interrupted_write(self):
+        """
+        Test that a line cut short by a crash is dropped before the next change is appended.
+        """
+        with open(self.log, "a") as file:
+            file.write('{"op": "upd')
+        department = Department()
+        change_log = ChangeLog.load(department, self.snapshot, self.log)
+        change_log.update(department.find_employees("Max", "Black")[0], experience=12)
+
+        loaded = Department()
+        ChangeLog.load(loaded, self.snapshot, self.log)
+        self.assertEqual(self.dicts(department), self.dicts(loaded))
+        self.assertEqual(12, loaded.find_employees("Max", "Black")[0].experience)
+        self.assertEqual(5, len(list(change_log.changes())))
+
+
+class TestSQLiteStore(unittest.TestCase):
+    """
+    Unit tests for the SQLite storage backend with lazily loaded teams.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Manager("Bob", "Brown", 1800.5, 1, [Developer("Max", "Black", 1200, 9)] * 7),
+            Developer("Eve", "White", 1100, 2),
+            Employee("Anna", "Grey", 1250, 4)]))
+        self.department.add_manager(Manager("John", "Doe", 2000, 6))
+        self.store = SQLiteStore(":memory:")
+        self.store.save(self.department)
+
+    def tearDown(self):
+        self.store.close()
+
+    def dicts(self, department):
+        return [manager.to_dict() for manager in department.managers]
+
+    def test_lazy_load(self):
+        """
+        Test that teams are read from the database only when they are accessed.
+        """
+        loaded = Department()
+        self.store.load(loaded)
+        self.assertEqual([], loaded.find_employees("Lisa", "Green"))
+
+        alice = loaded.managers[0]
+        self.assertIsInstance(alice.team[1], LazyManager)
+        self.assertEqual(1, len(loaded.find_employees("Lisa", "Green")))
+        self.assertIs(alice, loaded.manager_of(loaded.find_employees("Lisa", "Green")[0]))
+        self.assertEqual(self.dicts(self.department), self.dicts(loaded))
+
+    def test_eager_load(self):
+        """
+        Test that the whole organization can be read at once.
+        """
+        loaded = Department()
+        self.store.load(loaded, lazy=False)
+        self.assertEqual(self.dicts(self.department), self.dicts(loaded))
+        self.assertEqual(7, len(loaded.find_employees("Max", "Black")))
+
+    def test_team_changes_before_first_access(self):
+        """
+        Test that a lazy team is loaded before it is changed or counted.
+        """
+        loaded = Department()
+        self.store.load(loaded)
+        alice = loaded.managers[0]
+        self.assertEqual(1, alice.developer_count)
+        bob = alice.team[1]
+        bob.add_team_member(Developer("Tom", "Green", 1000, 1))
+        self.assertEqual(8, len(bob.team))
+        self.assertEqual(8, bob.developer_count)
+
+    def test_payroll_by_role(self):
+        """
+        Test that the payroll aggregated in SQL matches the per-object salaries.
+        """
+        expected = {}
+        for employee, salary in self.department.calculate_salaries():
+            headcount, total = expected.get(type(employee).__name__, (0, 0))
+            expected[type(employee).__name__] = (headcount + 1, total + salary)
+
+        result = self.store.payroll_by_role()
+        self.assertEqual(sorted(expected), sorted(result))
+        for role, (headcount, total) in expected.items():
+            self.assertEqual(headcount, result[role][0])
+            self.assertAlmostEqual(total, result[role][1])
+
+
+class TestBulkFactory(unittest.TestCase):
+    """
+    Unit tests for the bulk construction of employee objects.
+    """
+
+    def setUp(self):
+        self.records = [
+            {"first_name": "Alice", "last_name": "Johnson", "base_salary": 2100.5, "experience": 7, "team": [
+                {"first_name": "Lisa", "last_name": "Green", "base_salary": 1300, "experience": 6, "eff_coeff": 0.8},
+                {"first_name": "Bob", "last_name": "Brown", "base_salary": 1800, "experience": 1, "team": [
+                    {"first_name": "Max", "last_name": "Black", "base_salary": 1200, "experience": 9}]},
+                {"first_name": "Lisa", "last_name": "Black", "base_salary": 1100, "experience": 2}]},
+            {"first_name": "John", "last_name": "Doe", "base_salary": 2000, "experience": 6, "team": []}]
+
+    def test_all_errors_reported(self):
+        """
+        Test that every invalid value is reported with its row number in a single error.
+        """
+        self.records[0]["team"][0]["eff_coeff"] = 1.5
+        self.records[0]["team"][1]["team"][0]["first_name"] = "M4x"
+        self.records[1]["base_salary"] = -1
+        with self.assertRaises(BulkValidationError) as context:
+            build_from_records(self.records)
+        self.assertEqual([(1, "Efficiency coefficient must be between 0 and 1."),
+                          (3, "First name must be a non-empty string containing only alphabetic characters."),
+                          (5, "Base salary must be a positive number.")], context.exception.errors)
+        self.assertIsInstance(context.exception, ValueError)
+
+        self.records[0]["team"][1]["role"] = "Intern"
+        with self.assertRaises(BulkValidationError) as context:
+            build_from_records(self.records)
+        self.assertEqual([1, 2, 3, 5], [row for row, _ in context.exception.errors])
+        self.assertEqual("Unknown role 'Intern'.", context.exception.errors[1][1])
+
+    def test_trusted_build_matches_validated_build(self):
+        """
+        Test that trusted and validated construction give the same objects as the constructors.
+        """
+        for trusted in (False, True):
+            managers = build_from_records(self.records, trusted=trusted)
+            self.assertEqual(self.records, [manager.to_dict() for manager in managers])
+            self.assertIsInstance(managers[0].team[0], Designer)
+            self.assertIsInstance(managers[0].team[1].team[0], Developer)
+            self.assertEqual(3021, managers[0].calculate_salary())
+
+    def test_trusted_objects_track_team_changes(self):
+        """
+        Test that managers built from snapshot columns in trusted mode keep their salary cache up to date.
+        """
+        department = Department()
+        for manager in build_from_records(self.records):
+            department.add_manager(manager)
+        bob = build_from_columns(department.to_columns(), trusted=True)[0].team[1]
+        self.assertEqual(1800, bob.calculate_salary())
+        bob.add_team_member(Developer("Tom", "White", 1000, 1))
+        self.assertEqual(1980, bob.calculate_salary())
+
+
+class TestInstrumentation(unittest.TestCase):
+    """
+    Unit tests for the payroll and persistence instrumentation.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Developer("Max", "Black", 1200, 9)]))
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "employees.json")
+        instrumentation.reset()
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+        self.directory.cleanup()
+
+    def test_disabled_by_default(self):
+        """
+        Test that nothing is collected unless instrumentation is enabled.
+        """
+        self.department.give_salary(TextReportSink(StringIO()))
+        self.assertEqual({'counters': {}, 'timings': {}}, instrumentation.stats())
+
+    def test_payroll_and_persistence_stats(self):
+        """
+        Test that salary computations, serialized bytes, constructed objects and timings are recorded.
+        """
+        instrumentation.enable()
+        self.department.give_salary(TextReportSink(StringIO()))
+        self.department.save_employees(self.filename)
+        Department().load_employees(self.filename)
+
+        stats = instrumentation.stats()
+        counters = stats['counters']
+        self.assertEqual(1, counters['salary.Manager'])
+        self.assertEqual(1, counters['salary.Designer'])
+        self.assertEqual(os.path.getsize(self.filename), counters['serialization.bytes_written'])
+        self.assertEqual(os.path.getsize(self.filename), counters['serialization.bytes_read'])
+        self.assertEqual(1, counters['objects.Manager'])
+        self.assertEqual(1, counters['objects.Developer'])
+        for name in ('payroll.give_salary', 'serialization.save', 'serialization.load', 'salary.Developer'):
+            self.assertEqual(1, stats['timings'][name]['count'])
+            self.assertEqual(1, sum(stats['timings'][name]['buckets'].values()))
+
+    def test_validation_failures_and_capture(self):
+        """
+        Test that invalid loaded values are counted and that capture() profiles a block.
+        """
+        with open(self.filename, 'w') as file:
+            json.dump([{"first_name": "Al1ce", "last_name": "Johnson", "base_salary": -1, "experience": 7,
+                        "team": []}], file)
+        with instrumentation.capture(memory=True) as capture:
+            with self.assertRaises(ValueError):
+                Department().load_employees(self.filename)
+        self.assertEqual(2, instrumentation.stats()['counters']['validation.failures'])
+        self.assertFalse(instrumentation.enabled)
+        self.assertIsNotNone(capture.peak_memory)
+        self.assertIn("load_employees", capture.report())
+
+
+class TestScenario(unittest.TestCase):
+    """
+    Unit tests for what-if payroll scenarios.
+    """
+
+    def setUp(self):
+        self.lisa = Designer("Lisa", "Green", 1300, 6, 0.8)
+        self.max = Developer("Max", "Black", 1200, 9)
+        self.bob = Manager("Bob", "Brown", 1800, 1, [self.max])
+        self.alice = Manager("Alice", "Johnson", 2100, 7, [self.lisa, self.bob, Developer("Tom", "Black", 1100, 2)])
+        self.john = Manager("John", "Doe", 2000, 6, [Developer("Eve", "White", 1000, 1),
+                                                     Developer("Ann", "White", 1000, 1)])
+        self.department = Department()
+        self.department.add_manager(self.alice)
+        self.department.add_manager(self.john)
+        self.simulation = Simulation(self.department)
+
+    def expected_total(self, department):
+        return sum(salary for _, salary in department.calculate_salaries())
+
+    def test_adjust_role(self):
+        """
+        Test that a role-wide change recomputes only that role and leaves the department unchanged.
+        """
+        result = self.simulation.scenario("designers").adjust(Designer, 'eff_coeff', add=0.1).evaluate()
+        self.assertEqual([(self.lisa, 3708, 3914)], [(employee, round(old), round(new))
+                                                     for employee, old, new in result.changes])
+        self.assertAlmostEqual(206, result.delta)
+        self.assertEqual(0.8, self.lisa.eff_coeff)
+
+        with self.assertRaises(BulkValidationError) as context:
+            self.simulation.scenario().adjust(Designer, 'eff_coeff', add=0.5)
+        self.assertEqual([(1, "Efficiency coefficient must be between 0 and 1.")], context.exception.errors)
+
+    def test_merge_teams_matches_recalculation(self):
+        """
+        Test that merging teams updates the managers' bonuses exactly like rebuilding the department.
+        """
+        result = self.simulation.scenario().merge([self.alice, self.bob], into=self.john).evaluate()
+
+        merged = copy.deepcopy(self.department)
+        alice, john = merged.managers
+        bob = alice.team[1]
+        john.team = list(john.team) + list(alice.team) + list(bob.team)
+        alice.team = []
+        bob.team = []
+        self.assertAlmostEqual(self.expected_total(merged), result.total)
+        self.assertEqual(round(john.calculate_salary()), round(result.salary(self.john)))
+
+    def test_evaluate_many(self):
+        """
+        Test that several scenarios are evaluated against one baseline, and that cycles are rejected.
+        """
+        scenarios = [self.simulation.scenario(str(raise_)).set(self.max, base_salary=1200 + raise_)
+                     for raise_ in (0, 100, 200)]
+        results = self.simulation.evaluate_many(scenarios)
+        self.assertEqual([0, 120, 240], [round(result.delta) for result in results])
+        self.assertEqual(["0", "100", "200"], [result.name for result in results])
+        with self.assertRaises(ValueError):
+            self.simulation.scenario().move(self.alice, self.bob)
+
+
+class TestPayrollPipeline(unittest.TestCase):
+    """
+    Unit tests for the asyncio payroll pipeline.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        for index in range(5):
+            self.department.add_manager(Manager("Alice", "Johnson", 2100 + index, 7, [
+                Designer("Lisa", "Green", 1300, 6, 0.8),
+                Developer("Max", "Black", 1200, index)]))
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "employees.json")
+        self.department.save_employees(self.filename)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_fan_out_to_sinks(self):
+        """
+        Test that every sink receives the records of give_salary and that the loaded managers are kept.
+        """
+        expected = StringIO()
+        self.department.give_salary(TextReportSink(expected))
+
+        report, lines = StringIO(), StringIO()
+        loaded = Department()
+        with patch('asyncio.to_thread', wraps=asyncio.to_thread) as to_thread:
+            totals = asyncio.run(run_payroll_pipeline(self.filename, [TextReportSink(report), JsonLinesSink(lines)],
+                                                      department=loaded, queue_size=1, batch_size=2,
+                                                      manager_batch_size=2))
+        # Managers are loaded two at a time (the last hop finds the end of the file)
+        self.assertEqual(4, sum(1 for call in to_thread.call_args_list if call.args[0] is list))
+        self.assertEqual(expected.getvalue(), report.getvalue())
+        self.assertEqual(15, totals['records'])
+        self.assertEqual(15, len(lines.getvalue().splitlines()))
+        self.assertEqual(5, len(loaded.managers))
+
+        report = StringIO()
+        asyncio.run(self.department.give_salary_async([TextReportSink(report)]))
+        self.assertEqual(expected.getvalue(), report.getvalue())
+
+    def test_sink_error_stops_pipeline(self):
+        """
+        Test that an error in one sink is raised instead of leaving the other stages waiting.
+        """
+        class FailingSink:
+            async def write_batch(self, records):
+                raise OSError("disk full")
+
+            async def flush(self):
+                pass
+
+        with self.assertRaises(OSError):
+            asyncio.run(run_payroll_pipeline(self.department.managers, [TextReportSink(StringIO()), FailingSink()],
+                                             queue_size=1, batch_size=1))
+
+
+class TestOrganization(unittest.TestCase):
+    """
+    Unit tests for the multi-department organization.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.organization = Organization(os.path.join(self.directory.name, "org"))
+        self.sales = Department()
+        self.sales.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9)])]))
+        self.research = Department()
+        self.research.add_manager(Manager("John", "Doe", 2000, 6, [Developer("Eve", "White", 1000, 1)]))
+        self.organization.add_department("sales", self.sales)
+        self.organization.add_department("research", self.research)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_shards_round_trip(self):
+        """
+        Test that each department is saved to its own shard and loaded back on access.
+        """
+        self.organization.save()
+        self.organization.save(format='json')
+        self.assertEqual(["research.json", "sales.json"], sorted(os.listdir(self.organization.directory)))
+
+        loaded = Organization(self.organization.directory)
+        self.assertEqual(["research", "sales"], loaded.names())
+        self.assertEqual([manager.to_dict() for manager in self.sales.managers],
+                         [manager.to_dict() for manager in loaded.department("sales").managers])
+        with self.assertRaises(KeyError):
+            loaded.department("marketing")
+        with self.assertRaises(ValueError):
+            loaded.add_department("../sales", Department())
+
+    def test_failed_save_keeps_previous_shard(self):
+        """
+        Test that a shard that cannot be converted raises and the shard in the other format is kept.
+        """
+        self.sales.managers[0].team[1].team[0].base_salary = 10 ** 400
+        self.organization.save(format='json')
+        loaded = Organization(self.organization.directory)
+        loaded.department("sales")
+        with self.assertRaises(OverflowError):
+            loaded.save()
+        self.assertTrue(os.path.exists(loaded.shard_filename("sales", "json")))
+        self.assertFalse(os.path.exists(loaded.shard_filename("sales")))
+
+    def test_parallel_payroll_merges_shards(self):
+        """
+        Test that the merged statistics equal the salaries calculated per department.
+        """
+        self.organization.save()
+        total, by_department = Organization(self.organization.directory).payroll(workers=2)
+
+        for name, department in (("sales", self.sales), ("research", self.research)):
+            salaries = department.to_columns().calculate_salaries()
+            self.assertEqual(len(salaries), by_department[name].headcount)
+            self.assertAlmostEqual(sum(salaries), by_department[name].total)
+        self.assertEqual(6, total.headcount)
+        self.assertAlmostEqual(by_department["sales"].total + by_department["research"].total, total.total)
+        self.assertEqual(3, total.roles["Manager"]["headcount"])
+        self.assertEqual(1000, total.roles["Developer"]["min"])
+        self.assertAlmostEqual(1470, total.mean("Developer"))
+
+
+class TestLazyLoading(unittest.TestCase):
+    """
+    Unit tests for loading the managers of a JSON file on demand.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        for index in range(4):
+            self.department.add_manager(Manager("Alice", "Johnson", 2100 + index, 7, [
+                Designer("Lisa", "Green", 1300, 6, 0.8),
+                Manager("Bob", "Brown", 1800, 1, [Developer("Max", "Black", 1200, 9)])]))
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "employees.json")
+        self.department.save_employees(self.filename)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_managers_built_on_access(self):
+        """
+        Test that managers are only built (and indexed) when accessed, and equal an eager load.
+        """
+        loaded = Department()
+        loaded.load_employees(self.filename, lazy=True)
+        self.assertIsInstance(loaded.managers, LazyManagers)
+        self.assertEqual(4, len(loaded.managers))
+        self.assertEqual(4, loaded.managers.pending_count())
+        self.assertEqual([], loaded.find_employees("Max", "Black"))
+
+        self.assertEqual(2102, loaded.managers[2].base_salary)
+        self.assertEqual(3, loaded.managers.pending_count())
+        self.assertEqual(1, len(loaded.find_employees("Max", "Black")))
+        self.assertEqual([manager.to_dict() for manager in self.department.managers],
+                         [manager.to_dict() for manager in loaded.managers])
+
+    def test_offset_index_file(self):
+        """
+        Test that the offset index is saved only on request, while saving or after a scan, and is ignored once
+        the file changes.
+        """
+        Department().load_employees(self.filename, lazy=True)
+        self.assertFalse(os.path.exists(self.filename + ".idx"))
+        Department().load_employees(self.filename, lazy=True, save_index=True)
+        with open(self.filename + ".idx", 'r') as file:
+            self.assertEqual(4, len(json.load(file)["starts"]))
+
+        for compact in (False, True):
+            self.department.save_employees(self.filename, compact=compact, index=True)
+            with open(self.filename + ".idx", 'r') as file:
+                index = json.load(file)
+            self.assertEqual([list(offsets) for offsets in scan_offsets(self.filename)],
+                             [index["starts"], index["ends"]])
+
+        loaded = Department()
+        with patch('models.lazy_json.scan_offsets', side_effect=AssertionError("The saved index is current.")):
+            loaded.load_employees(self.filename, lazy=True)
+        self.department.add_manager(Manager("John", "Doe", 2000, 6))
+        self.department.save_employees(self.filename, stream=True, compact=True)
+        with self.assertRaises(ValueError):
+            loaded.managers[0]
+
+        reloaded = Department()
+        reloaded.load_employees(self.filename, lazy=True)
+        self.assertEqual("John", reloaded.managers[4].first_name)
+
+    def test_scan_skips_brackets_in_strings(self):
+        """
+        Test that brackets and escaped quotes inside strings do not confuse the offset scan.
+        """
+        with open(self.filename, 'w') as file:
+            file.write(r' [{"a": "]}\"{\\"}, {"b": ["{", {"c": "\\"}]}]')
+        starts, ends = scan_offsets(self.filename)
+        with open(self.filename, 'rb') as file:
+            data = file.read()
+        self.assertEqual([{"a": ']}"{\\'}, {"b": ["{", {"c": "\\"}]}],
+                         [json.loads(data[start:end]) for start, end in zip(starts, ends)])
+
+
+class TestPayrollService(unittest.TestCase):
+    """
+    Unit tests for the resident payroll service.
+    """
+
+    def setUp(self):
+        self.department = Department()
+        self.department.add_manager(Manager("Alice", "Johnson", 2100, 7, [
+            Designer("Lisa", "Green", 1300, 6, 0.8),
+            Developer("Max", "Black", 1200, 9)]))
+        self.department.add_manager(Manager("John", "Doe", 2000, 6))
+        self.directory = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.directory.name, "employees.snap")
+        self.department.save_snapshot(self.filename)
+
+        self.service = PayrollService(self.filename)
+        self.server = PayrollServer(os.path.join(self.directory.name, "payroll.sock"), self.service)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def client(self):
+        return PayrollClient(self.server.server_address)
+
+    def test_queries(self):
+        """
+        Test the salary, team payroll, report and update requests.
+        """
+        with self.client() as client:
+            self.assertEqual([{"first_name": "Max", "last_name": "Black", "role": "Developer", "salary": 1940.0,
+                               "rounded_salary": 1940, "manager": "Alice Johnson"}],
+                             client.request("salary", first_name="Max", last_name="Black")["result"])
+            team = client.request("team_payroll", first_name="Alice", last_name="Johnson")["result"]
+            self.assertEqual(["Alice", "Lisa", "Max"], [record["first_name"] for record in team["records"]])
+            self.assertEqual(4, len(client.request("report")["result"]["records"]))
+
+            updated = client.request("update", first_name="Max", last_name="Black", fields={"base_salary": 1300})
+            self.assertEqual(2060, updated["result"]["rounded_salary"])
+            self.assertEqual({"ok": False, "error": "No employee named Bob Brown."},
+                             client.request("salary", first_name="Bob", last_name="Brown"))
+            self.assertFalse(client.request("update", first_name="Max", last_name="Black",
+                                            fields={"experience": -1})["ok"])
+        self.assertEqual(1300, read_snapshot(self.filename).base_salary[2])
+        self.assertEqual(1, self.service.reloads)
+
+    def test_failed_update_is_reported_and_undone(self):
+        """
+        Test that an update the file cannot store is answered with an error and leaves the employee unchanged.
+        """
+        with self.client() as client:
+            response = client.request("update", first_name="Max", last_name="Black", fields={"base_salary": 10 ** 400})
+            self.assertFalse(response["ok"])
+            self.assertEqual(1940, client.request("salary", first_name="Max", last_name="Black")["result"][0]["salary"])
+        self.assertEqual(1200, read_snapshot(self.filename).base_salary[2])
+
+    def test_refuses_to_replace_other_files(self):
+        """
+        Test that a path that is not a socket is never deleted to bind the server.
+        """
+        with self.assertRaises(FileExistsError):
+            PayrollServer(self.filename, self.service)
+        self.assertEqual(4, len(read_snapshot(self.filename)))
+
+    def test_hot_reload_and_concurrent_clients(self):
+        """
+        Test that a changed snapshot is picked up and that several clients are served at once.
+        """
+        self.department.add_manager(Manager("Bob", "Brown", 1800, 1))
+        self.department.save_snapshot(self.filename)
+
+        results = []
+
+        def query():
+            with self.client() as client:
+                for _ in range(20):
+                    results.append(client.request("salary", first_name="Bob", last_name="Brown")["result"])
+
+        threads = [threading.Thread(target=query) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(80, len(results))
+        self.assertTrue(all(result[0]["salary"] == 1800 for result in results))
+        self.assertEqual(2, self.service.reloads)
+
+
+class TestDepartmentDiff(unittest.TestCase):
+    """
+    Unit tests for the structural diff between two versions of a department.
+    """
+
+    def build(self):
+        department = Department()
+        for index in range(20):
+            department.add_manager(Manager("Alice", f"Manager{chr(65 + index)}", 2000, 7, [
+                Designer("Lisa", f"Designer{chr(65 + index)}", 1300, 6, 0.8),
+                Developer("Max", f"Developer{chr(65 + index)}", 1200, 9)]))
+        return department
+
+    def test_identical_departments(self):
+        """
+        Test that identical departments (as objects, JSON and snapshot) have no differences.
+        """
+        department = self.build()
+        with tempfile.TemporaryDirectory() as directory:
+            json_filename = os.path.join(directory, "employees.json")
+            snapshot_filename = os.path.join(directory, "employees.snap")
+            department.save_employees(json_filename)
+            department.save_snapshot(snapshot_filename)
+            result = diff_departments(json_filename, snapshot_filename)
+        self.assertFalse(result)
+        self.assertEqual(0, result.compared)
+        self.assertFalse(diff_departments(department, self.build()))
+
+    def test_changes_and_salary_deltas(self):
+        """
+        Test that added, removed, moved and changed employees are reported with salary deltas.
+        """
+        old, new = self.build(), self.build()
+        first, second, third = new.managers[0], new.managers[1], new.managers[2]
+        first.team[0].eff_coeff = 0.9
+        moved = second.team[1]
+        second.remove_team_member(moved)
+        first.add_team_member(moved)
+        third.remove_team_member(third.team[0])
+        third.add_team_member(Developer("Tom", "White", 1000, 1))
+
+        result = diff_departments(old, new)
+        self.assertEqual([("Lisa DesignerC", "Designer")], [(change.name, change.role) for change in result.removed])
+        self.assertEqual(["Tom White"], [change.name for change in result.added])
+        self.assertEqual([("Max DeveloperB", "Alice ManagerB", "Alice ManagerA")],
+                         [(change.name, change.old_manager, change.new_manager) for change in result.moved])
+        changed = {change.name: change for change in result.changed}
+        self.assertEqual({"eff_coeff": (0.8, 0.9)}, changed["Lisa DesignerA"].fields)
+        self.assertEqual({}, changed["Alice ManagerA"].fields)
+
+        expected = (sum(salary for _, salary in new.calculate_salaries())
+                    - sum(salary for _, salary in old.calculate_salaries()))
+        self.assertAlmostEqual(expected, result.salary_delta)
+        self.assertLess(result.compared, 20)
+
+
+class TestPayrollAnalytics(unittest.TestCase):
+    """
+    Unit tests for the streaming payroll analytics.
+    """
+
+    def test_quantiles_within_relative_accuracy(self):
+        """
+        Test that sketch quantiles are within the relative accuracy and merging chunks keeps them.
+        """
+        values = [1000 + (index * 7919) % 50000 for index in range(10000)]
+        whole = QuantileSketch(0.01)
+        for value in values:
+            whole.add(value)
+        merged = QuantileSketch(0.01)
+        for start in range(0, len(values), 1000):
+            chunk = QuantileSketch(0.01)
+            for value in values[start:start + 1000]:
+                chunk.add(value)
+            merged.merge(chunk)
+
+        ordered = sorted(values)
+        for q in (0, 0.5, 0.9, 0.99, 1):
+            exact = ordered[int(q * (len(values) - 1))]
+            self.assertLessEqual(abs(whole.quantile(q) - exact), 0.01 * exact)
+            self.assertEqual(whole.quantile(q), merged.quantile(q))
+        self.assertLess(len(whole._buckets), 500)
+
+    def test_department_summary(self):
+        """
+        Test per-role counts, histograms and top earners from give_salary.
+        """
+        department = Department()
+        for index in range(3):
+            department.add_manager(Manager("Alice", f"Manager{chr(65 + index)}", 2000 + index * 100, 7, [
+                Designer("Lisa", f"Designer{chr(65 + index)}", 1300, 6, 0.8),
+                Developer("Max", f"Developer{chr(65 + index)}", 1200 + index * 100, 9)]))
+        analytics = PayrollAnalytics(histogram_bins=(0, 5000, 10), top_n=2)
+        department.give_salary(analytics)
+
+        records = list(department.iter_payroll())
+        self.assertEqual(9, analytics.count())
+        self.assertEqual(3, analytics.count(Developer))
+        self.assertEqual(3, sum(analytics.histogram("Designer").counts))
+        top = sorted((record.salary, record.name) for record in records if record.role == "Manager")[-2:]
+        self.assertEqual(top[::-1], [(salary, name) for salary, name, _ in analytics.top("Manager")])
+
+        summary = analytics.summary()
+        self.assertAlmostEqual(sum(record.salary for record in records), summary[None]["total"])
+        self.assertEqual(max(record.salary for record in records), summary[None]["top"][0][0])
+        other = PayrollAnalytics(histogram_bins=(0, 5000, 10), top_n=2)
+        other.write_all(records)
+        self.assertEqual(18, analytics.merge(other).count())
+        with self.assertRaises(ValueError):
+            analytics.merge(PayrollAnalytics())
+
+
+class TestCsvImport(unittest.TestCase):
+    """
+    Unit tests for the chunked import of flat CSV exports.
+    """
+
+    def test_out_of_order_nested_rows(self):
+        """
+        Test that shuffled rows with nested managers are imported in small chunks.
+        """
+        department = Department()
+        for index in range(5):
+            department.add_manager(Manager("Alice", f"Manager{chr(65 + index)}", 2000, 7, [
+                Manager("Bob", f"Lead{chr(65 + index)}", 1800, 5, [Developer("Max", "Black", 1200, 9)]),
+                Designer("Lisa", f"Designer{chr(65 + index)}", 1300, 6, 0.8)]))
+        buffer = StringIO()
+        export_csv(department.managers, buffer)
+        header, *lines = buffer.getvalue().splitlines(keepends=True)
+
+        result = import_csv(StringIO(header + "".join(reversed(lines))), chunk_size=4)
+        self.assertEqual(([], 20, 20), (result.errors, result.rows, result.imported))
+        self.assertEqual(sorted(manager.last_name for manager in department.managers),
+                         sorted(manager.last_name for manager in result.managers))
+        imported = Department()
+        for manager in result.managers:
+            imported.add_manager(manager)
+        self.assertEqual(sorted(salary for _, salary in department.calculate_salaries()),
+                         sorted(salary for _, salary in imported.calculate_salaries()))
+
+    def test_row_errors_are_collected(self):
+        """
+        Test that invalid rows are reported by line while the valid rows are imported.
+        """
+        text = ("id,first_name,last_name,role,base_salary,experience,eff_coeff,manager_id\n"
+                "1,Bob,Brown,Manager,2000,7,,\n"
+                "2,John,Doe,Developer,-5,3,,1\n"
+                "3,Jane,Smith,Designer,1200,4,1.5,1\n"
+                "4,Tom,White,Developer,1000,2,,99\n"
+                "5,Eve,Green,Wizard,1000,2,,1\n"
+                "6,Ann,Lee,Manager,1500,3,,7\n"
+                "7,Max,Black,Manager,1500,3,,6\n"
+                "1,Bob,Black,Developer,1000,2,,\n"
+                "8,Lisa,Davis,Designer,1300,6,0.8,1\n")
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "export.csv")
+            with open(filename, "w") as file:
+                file.write(text)
+            department = Department()
+            errors = department.load_csv(filename)
+        self.assertEqual([3, 4, 5, 6, 7, 8, 9], [line for line, _ in errors])
+        self.assertEqual("Base salary must be a positive number.", errors[0][1])
+        self.assertEqual("Efficiency coefficient must be between 0 and 1.", errors[1][1])
+        self.assertIn("'99'", errors[2][1])
+        self.assertIn("Duplicate id", errors[6][1])
+        self.assertEqual(["Lisa Davis"], [f"{member.first_name} {member.last_name}"
+                                          for member in department.managers[0].team])
+
+
+class TestPayrollCache(unittest.TestCase):
+    """
+    Unit tests for the on-disk payroll result cache.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.department = Department()
+        for index in range(10):
+            self.department.add_manager(Manager("Alice", f"Manager{chr(65 + index)}", 2000, 7, [
+                Designer("Lisa", f"Designer{chr(65 + index)}", 1300, 6, 0.8),
+                Developer("Max", f"Developer{chr(65 + index)}", 1200, 9)]))
+        self.filename = os.path.join(self.directory.name, "employees.snap")
+        self.department.save_snapshot(self.filename)
+
+    def tearDown(self):
+        instrumentation.disable()
+        instrumentation.reset()
+        self.directory.cleanup()
+
+    def test_hits_keyed_by_content_and_rules(self):
+        """
+        Test that unchanged content hits the cache, while new content, rules or salary methods miss it.
+        """
+        cache = PayrollCache(os.path.join(self.directory.name, "cache"))
+        instrumentation.enable()
+        expected = list(self.department.iter_payroll())
+        self.assertEqual(expected, cache.payroll(self.filename))
+        os.utime(self.filename, ns=(0, 0))
+        self.assertEqual(expected, PayrollCache(cache.directory).payroll(self.filename))
+        self.assertEqual(expected, cache.payroll(self.filename, DEFAULT_SALARY_RULES))
+
+        self.department.managers[0].base_salary = 2500
+        self.department.save_snapshot(self.filename)
+        self.assertEqual(list(self.department.iter_payroll()), cache.payroll(self.filename))
+        doubled = SalaryRules(dict(DEFAULT_RULES, experience_tiers=[
+            dict(tier, bonus=2 * tier["bonus"]) for tier in DEFAULT_RULES["experience_tiers"]]))
+        self.assertEqual(list(self.department.iter_payroll(doubled)), cache.payroll(self.filename, doubled))
+        counters = instrumentation.stats()["counters"]
+        self.assertEqual((1, 4), (counters["payroll_cache.hits"], counters["payroll_cache.misses"]))
+
+        with patch.object(Employee, "calculate_salary", lambda employee: employee.base_salary):
+            self.assertNotEqual(payroll_cache.METHODS_VERSION, payroll_cache._methods_version())
+
+    def test_lru_eviction_and_concurrent_writers(self):
+        """
+        Test that the least recently used entries are evicted and concurrent writers are safe.
+        """
+        cache = PayrollCache(os.path.join(self.directory.name, "cache"))
+        records = list(self.department.iter_payroll())
+        cache.put("a", records)
+        size = os.path.getsize(cache._entry("a"))
+        cache.max_bytes = 2 * size
+        cache.put("b", records)
+        os.utime(cache._entry("a"), ns=(1, 1))
+        os.utime(cache._entry("b"), ns=(2, 2))
+        self.assertIsNotNone(cache.get("a"))  # Now the most recently used
+        cache.put("c", records)
+        self.assertEqual((True, False, True), tuple(cache.get(key) is not None for key in "abc"))
+
+        def write(worker):
+            writer = PayrollCache(cache.directory, max_bytes=3 * size)
+            for index in range(10):
+                writer.put(f"w{worker}-{index}", records)
+
+        threads = [threading.Thread(target=write, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        entries = [name for name in os.listdir(cache.directory) if name.endswith(".payroll")]
+        self.assertLessEqual(len(entries), 3)
+        self.assertTrue(all(cache.get(name[:-len(".payroll")]) == records for name in entries))